@@ -1,13 +1,7 @@
 from rest_framework import serializers
 
-from .models import ResetPasswordOneTimePassword
-
 from Users.models import User
-from Authentication.models import OneTimePassword
-from OneTimePasswords.serializers import OneTimePasswordSerializer
-
-from random import randint
-import uuid
+from OneTimePasswords.backends import OTPCodeMismatch, OTPNotFound, get_otp_backend
 
 
 
@@ -23,37 +17,17 @@ class ResetPasswordOneTimePasswordSerializer(serializers.Serializer):
         return value
 
     def validate(self, atters):
-        if User.objects.filter(phone=atters['phone']).exists():
+        atters['user_id'] = User.objects.filter(phone=atters['phone']).values_list('pk', flat=True).first()
+        if atters['user_id'] is not None:
             return atters
         else:
             raise serializers.ValidationError('شماره تلفن موجود نیست')
 
     def create(self, validated_data):
 
-        code = randint(100000, 999999)
-
-        token = uuid.uuid4()
-        
-        otp = OneTimePassword.objects.create(
-            token=token,
-            code=code
-        )
-        
-        otp.save()
-
-        otp.get_expiration()
-        
-        user = User.objects.get(phone=validated_data['phone'])
-        
-        reset_password_otp = ResetPasswordOneTimePassword.objects.create(
-            otp=otp,
-            user=user,
-            phone=validated_data['phone']
-        )
+        token, code = get_otp_backend().issue('reset_password', {'user_id': validated_data['user_id']})
 
-        reset_password_otp.save()
-
-        return {'phone': reset_password_otp.phone, 'token': token, 'code': code}
+        return {'phone': validated_data['phone'], 'token': token, 'code': code}
 
 
 
@@ -79,25 +53,20 @@ class ResetPasswordValidateOneTimePasswordSerializer(serializers.Serializer):
     
     
     def validate(self, attrs):
+        # Check if the password and password_conf match; before the OTP is
+        # used up, so a typo does not cost the code.
+        if attrs['password'] != attrs['password_conf']:
+            raise serializers.ValidationError('Passwords do not match')
+        if len(attrs['password']) < 8 or len(attrs['password']) > 16:
+            raise serializers.ValidationError('Password must be between 8 and 16 characters long')
+
         otp_token = self.context.get('otp_token')
-        
-        otp = OneTimePassword.objects.get(token=otp_token)
+
+        # Checking the code and using it up are one atomic step.
         try:
-            reset_password_otp = otp.reset_password.get()
-        except:
-            raise serializers.ValidationError('The otp is not a reset password otp.')
-
-        if otp.status_validation() == 'ACT':
-            if otp.code == attrs['code']:
-                # Check if the password and password_conf match
-                if attrs['password'] != attrs['password_conf']:
-                    raise serializers.ValidationError('Passwords do not match')
-                if len(attrs['password']) < 8 or len(attrs['password']) > 16:
-                    raise serializers.ValidationError('Password must be between 8 and 16 characters long')
-                return attrs
-            else:
-                raise serializers.ValidationError({'code': 'Invalid OTP code.'})
-        else:
-            otp.delete()
-            reset_password_otp.delete()
-            raise serializers.ValidationError('Inactive OTP')
\ No newline at end of file
+            attrs['user_id'] = get_otp_backend().consume(otp_token, attrs['code'], 'reset_password')['user_id']
+        except OTPCodeMismatch:
+            raise serializers.ValidationError({'code': 'Invalid OTP code.'})
+        except OTPNotFound:
+            raise serializers.ValidationError('Inactive OTP')
+        return attrs
@@ -1,17 +1,19 @@
-from django.shortcuts import get_object_or_404
-
 from rest_framework.views import APIView, Response
 from rest_framework.validators import ValidationError
 from rest_framework import status
 
 from .serializers import ResetPasswordOneTimePasswordSerializer, ResetPasswordValidateOneTimePasswordSerializer
 
-from OneTimePasswords.models import OneTimePassword
+from Users.models import User
+
+from Server.throttling import TokenBucketThrottle
 
 
 
 
 class ResetPasswordOneTimePasswordAPIView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'reset_password_otp'
 
     def post(self, request):
         if not request.user.is_authenticated:
@@ -38,27 +40,20 @@ class ResetPasswordOneTimePasswordAPIView(APIView):
 
 class ResetPasswordValidateOneTimePasswordAPIView(APIView):
     def post(self, request, token):
-        otp = get_object_or_404(OneTimePassword, token=token)
-
-        reset_password_otp = otp.reset_password.get()
-        
         serializer = ResetPasswordValidateOneTimePasswordSerializer(data=request.data, context={'otp_token': token})
 
         if request.user.is_authenticated:
             return Response({"message": "شما قبلاً وارد شده‌اید"}, status=status.HTTP_400_BAD_REQUEST)
         else:
             if serializer.is_valid():
-                user = reset_password_otp.user
+                user = User.objects.get(pk=serializer.validated_data['user_id'])
 
                 if not user.is_active:
                     return Response({'error': 'کاربر فعال نیست'}, status=status.HTTP_401_UNAUTHORIZED)
                 
                 password = user.set_password(serializer.validated_data['password'])
 
-                user.save()
-
-                otp.delete()
-                reset_password_otp.delete()
+                user.save(update_fields=['password'])
                 
                 return Response(
                     {
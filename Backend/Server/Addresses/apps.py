@@ -5,3 +5,6 @@ class AddressesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Addresses'
     verbose_name = 'آدرس ها'
+
+    def ready(self):
+        import Addresses.caches
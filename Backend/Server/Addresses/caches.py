@@ -0,0 +1,15 @@
+from Server.reference_cache import ReferenceCache
+from Server.slug_resolver import slug_resolver
+
+from .models import Province, City
+
+
+
+
+# Created at app load (AddressesConfig.ready) so that every save or delete,
+# from any entry point, bumps the version.
+province_list_cache = ReferenceCache('provinces', Province)
+# Cities nest their province.
+city_list_cache = ReferenceCache('cities', City, Province)
+
+slug_resolver.register(Province, City)
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import Province, City, RecipientAddress
 
+from Server.query_plans import QueryPlanMixin
+from Server.slug_resolver import slug_resolver
+
 
 
 
@@ -24,7 +27,7 @@ class ProvinceSerializer(serializers.ModelSerializer):
 
 
 # City is a child of Province.
-class CitySerializer(serializers.ModelSerializer):
+class CitySerializer(QueryPlanMixin, serializers.ModelSerializer):
     # Return nested province details for read.
     province = ProvinceSerializer(read_only=True)
     # For write operations, we require the client's input as province_slug.
@@ -32,6 +35,9 @@ class CitySerializer(serializers.ModelSerializer):
         write_only=True,
         help_text="Slug of the associated province."
     )
+
+    # Query plan: the nested province is read for every city.
+    select_related_fields = ('province',)
     
     class Meta:
         model = City
@@ -45,13 +51,12 @@ class CitySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 "province_slug": "This field is required."
             })
-        try:
-            province = Province.objects.get(slug=province_slug)
-        except Province.DoesNotExist:
+        province_id = slug_resolver.resolve(Province, province_slug)
+        if province_id is None:
             raise serializers.ValidationError({
                 "province_slug": f"No Province exists with the slug '{province_slug}'."
             })
-        attrs['province'] = province
+        attrs['province_id'] = province_id
         return attrs
 
     def create(self, validated_data):
@@ -63,13 +68,12 @@ class CitySerializer(serializers.ModelSerializer):
         # If a new province_slug is provided, update the related province.
         if 'province_slug' in self.initial_data:
             province_slug = self.initial_data.get('province_slug')
-            try:
-                province = Province.objects.get(slug=province_slug)
-            except Province.DoesNotExist:
+            province_id = slug_resolver.resolve(Province, province_slug)
+            if province_id is None:
                 raise serializers.ValidationError({
                     "province_slug": f"No Province exists with the slug '{province_slug}'."
                 })
-            instance.province = province
+            instance.province_id = province_id
         instance.name = validated_data.get('name', instance.name)
         instance.slug = validated_data.get('slug', instance.slug)
         instance.save()
@@ -1,3 +1,55 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Province, City
+
+
+
+
+class ReferenceListCacheTests(TestCase):
+    """
+    Province and city lists are served from the versioned reference cache:
+    repeated reads skip the database, ETags allow 304 revalidation, and any
+    save or delete of a listed (or nested) model publishes a new version.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.province = Province.objects.create(name="province", slug="province")
+        City.objects.create(name="city", slug="city", province=self.province)
+
+    def test_repeated_reads_skip_the_database(self):
+        first = self.client.get("/addresses/cities/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data[0]["province"]["slug"], "province")
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/addresses/cities/")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_etag_revalidation(self):
+        etag = self.client.get("/addresses/provinces/")["ETag"]
+        self.assertTrue(etag.startswith('"'))
+
+        response = self.client.get("/addresses/provinces/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get("/addresses/provinces/", HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_publish_a_new_version(self):
+        etag = self.client.get("/addresses/cities/")["ETag"]
+
+        # Renaming the province changes the city list, which nests it.
+        self.province.name = "renamed"
+        self.province.save()
+        response = self.client.get("/addresses/cities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["province"]["name"], "renamed")
+
+        City.objects.get(slug="city").delete()
+        self.assertEqual(self.client.get("/addresses/cities/").data, [])
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from .models import Province, City, RecipientAddress
 from .serializers import ProvinceSerializer, CitySerializer, RecipientAddressSerializer
 from .permissions import CityProvinceAdminPermission, RecipientAddressPermission
+from .caches import province_list_cache, city_list_cache
 
 
 
@@ -17,7 +18,7 @@ class ProvinceViewSet(viewsets.ViewSet):
     ViewSet for managing Province objects.
 
     Endpoints:
-      - list:     GET /provinces/
+      - list:     GET /provinces/      (cached, ETag / If-None-Match)
       - create:   POST /provinces/create/           (Admin only)
       - retrieve: GET /provinces/<slug>/
       - update:   PUT/PATCH /provinces/<slug>/update/   (Admin only)
@@ -27,9 +28,10 @@ class ProvinceViewSet(viewsets.ViewSet):
     lookup_field = 'slug'
 
     def list(self, request):
-        queryset = Province.objects.all()
-        serializer = ProvinceSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return province_list_cache.response(
+            request,
+            lambda: ProvinceSerializer(Province.objects.all(), many=True, context={'request': request}).data
+        )
 
     def create(self, request):
         serializer = ProvinceSerializer(data=request.data, context={'request': request})
@@ -76,7 +78,7 @@ class CityViewSet(viewsets.ViewSet):
     ViewSet for managing City objects.
 
     Endpoints:
-      - list:     GET /cities/
+      - list:     GET /cities/         (cached, ETag / If-None-Match)
       - create:   POST /cities/create/             (Admin only)
       - retrieve: GET /cities/<slug>/
       - update:   PUT/PATCH /cities/<slug>/update/     (Admin only)
@@ -86,9 +88,10 @@ class CityViewSet(viewsets.ViewSet):
     lookup_field = "slug"
 
     def list(self, request):
-        queryset = City.objects.all()
-        serializer = CitySerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return city_list_cache.response(
+            request,
+            lambda: CitySerializer(City.objects.all(), many=True, context={'request': request}).data
+        )
 
     def create(self, request):
         serializer = CitySerializer(data=request.data, context={'request': request})
@@ -5,3 +5,6 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Authentication'
     verbose_name = 'احراز هویت'
+
+    def ready(self):
+        import Authentication.signals
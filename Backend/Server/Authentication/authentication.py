@@ -0,0 +1,114 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import user_claims
+
+
+
+
+class AuthUserCache:
+    """
+    Per-process cache of the users behind access tokens, so an authenticated
+    request does not SELECT its user every time.
+
+    Entries live for JWT_USER_CACHE_TTL seconds (default 30). Saving or
+    deleting a user (Authentication.signals) bumps a per-user generation in
+    the Django cache, which every process compares on lookup, so changes are
+    seen right away; writes that skip signals (QuerySet.update) are picked up
+    when the entry expires.
+    """
+
+    def __init__(self):
+        self._entries = {}  # user_id -> (user, generation, expires_at)
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'JWT_USER_CACHE_TTL', 30)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'JWT_USER_CACHE_MAX_SIZE', 10000)
+
+    @staticmethod
+    def _generation_key(user_id):
+        return f'users:auth:{user_id}:generation'
+
+    def generation(self, user_id):
+        # Seeded from the clock so a flushed cache never repeats a generation.
+        return cache.get_or_set(self._generation_key(user_id), time.time_ns, timeout=None)
+
+    def get(self, user_id, generation):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] != generation or entry[2] < time.monotonic():
+            return None
+        # A copy per request: views may change request.user.
+        return copy.copy(entry[0])
+
+    def put(self, user, generation):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                now = time.monotonic()
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[2] >= now}
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+            self._entries[user.pk] = (copy.copy(user), generation, time.monotonic() + self.ttl)
+
+    def invalidate(self, user_id):
+        cache.set(self._generation_key(user_id), time.time_ns(), timeout=None)
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = AuthUserCache()
+
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through `user_cache`,
+    going to the database only on a miss.
+
+    Tokens carry the user's role claims (Authentication.tokens). If they no
+    longer match the user, the user is re-read from the database, and if they
+    still differ (the role or status changed after the token was issued) the
+    token is refused. Tokens without the claims are accepted as before.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        generation = user_cache.generation(user_id)
+        user = user_cache.get(user_id, generation)
+        if user is not None and self.claims_match(user, validated_token):
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed("User is inactive", code="user_inactive")
+            return user
+
+        user = super().get_user(validated_token)
+        user_cache.put(user, generation)
+        if not self.claims_match(user, validated_token):
+            raise AuthenticationFailed("Token is outdated; log in again.", code="token_outdated")
+        return user
+
+    @staticmethod
+    def claims_match(user, validated_token):
+        return all(
+            validated_token.get(claim, value) == value
+            for claim, value in user_claims(user).items()
+        )
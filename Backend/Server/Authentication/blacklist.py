@@ -0,0 +1,198 @@
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+
+
+# -------------------------------
+# Blacklist snapshot
+# -------------------------------
+
+class BloomFilter:
+    """
+    Fixed-size set membership with false positives but no false negatives:
+    `item in bloom` being False means the item was never added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(-math.log2(error_rate)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        position = int.from_bytes(digest[:8], 'big') % self.size
+        step = int.from_bytes(digest[8:], 'big') % self.size
+        # Enhanced double hashing: k positions from two hashes. Unlike
+        # a + i*b, a step sharing factors with the size does not fold them
+        # onto a handful of bits.
+        for i in range(self.hashes):
+            yield position
+            position = (position + step) % self.size
+            step = (step + i + 1) % self.size
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistSnapshot:
+    """
+    Per-process Bloom filter of the unexpired blacklisted refresh-token jtis,
+    so checking a valid refresh token usually needs no query.
+
+    The filter is never rebuilt in a request. A periodic task
+    (publish_filter, CELERY_BEAT_SCHEDULE) scans the blacklist and
+    publishes the filter in the shared cache; every blacklisting then
+    appends its jti to a numbered log there (push, from
+    Authentication.signals). Each check reads the log's head and the
+    published filter's sequence in one cache round trip, loads a newer
+    filter and merges the jtis logged since into its own copy:
+
+    - The filter says "not blacklisted": no query.
+    - The filter says "maybe", or it cannot be brought up to date (nothing
+      published yet, or log entries missing): the usual indexed lookup.
+
+    The log only reaches other processes through a shared cache (CACHES):
+    with a per-process one, every check uses the database.
+    """
+
+    sequence_key = 'jwt:blacklist:sequence'
+    log_key = 'jwt:blacklist:log:%d'
+    filter_key = 'jwt:blacklist:filter'
+    published_key = 'jwt:blacklist:filter:sequence'
+
+    def __init__(self):
+        self._bloom = None
+        self._sequence = None
+        self._published = None
+        self._lock = threading.Lock()
+
+    @property
+    def log_size(self):
+        return getattr(settings, 'JWT_BLACKLIST_LOG_SIZE', 10000)
+
+    @property
+    def log_ttl(self):
+        # Outlives a few publications, so a filter plus the log covers all.
+        return 3 * getattr(settings, 'JWT_BLACKLIST_PUBLISH_INTERVAL', 300)
+
+    @property
+    def trusted(self):
+        # A jti logged by another process never reaches a per-process cache.
+        return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+    def head(self):
+        # Seeded from the clock so a flushed cache never repeats a sequence.
+        cache.add(self.sequence_key, time.time_ns(), timeout=None)
+        return cache.get(self.sequence_key)
+
+    def push(self, jti):
+        """
+        Log a jti blacklisted (and committed) since the published filter.
+        """
+        try:
+            sequence = cache.incr(self.sequence_key)
+        except ValueError:
+            self.head()
+            sequence = cache.incr(self.sequence_key)
+        cache.set(self.log_key % sequence, jti, timeout=self.log_ttl)
+
+    def publish_filter(self):
+        """
+        Build the filter from the blacklist and publish it for every
+        process. Returns the number of jtis in it.
+        """
+        # Read before the scan: whatever is logged after it is merged from
+        # the log, whatever was logged before it was committed already.
+        sequence = self.head()
+        blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        count = blacklisted.count()
+        bloom = BloomFilter(
+            count + self.log_size, getattr(settings, 'JWT_BLACKLIST_FALSE_POSITIVE_RATE', 0.01)
+        )
+        for jti in blacklisted.values_list('token__jti', flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        cache.set_many({self.filter_key: (sequence, bloom), self.published_key: sequence}, timeout=None)
+        return count
+
+    def is_blacklisted(self, jti):
+        if self.trusted and self._sync() and jti not in self._bloom:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def _sync(self):
+        """
+        Bring the filter up to the head of the log; False if it cannot be.
+        """
+        state = cache.get_many([self.sequence_key, self.published_key])
+        head, published = state.get(self.sequence_key), state.get(self.published_key)
+        if head is None or published is None:
+            return False
+        with self._lock:
+            if self._published != published:
+                loaded = cache.get(self.filter_key)
+                if loaded is None:
+                    return False
+                (self._sequence, self._bloom), self._published = loaded, published
+            if head < self._sequence or head - self._sequence > self.log_size:
+                return False
+            missing = range(self._sequence + 1, head + 1)
+            logged = cache.get_many([self.log_key % sequence for sequence in missing]) if missing else {}
+            for sequence in missing:
+                jti = logged.get(self.log_key % sequence)
+                if jti is None:
+                    return False  # expired, or pushed but not written yet
+                self._bloom.add(jti)
+                self._sequence = sequence
+            return True
+
+    def clear(self):
+        self._bloom, self._sequence, self._published = None, None, None
+
+
+blacklist_snapshot = BlacklistSnapshot()
+
+
+
+# -------------------------------
+# Compaction
+# -------------------------------
+
+def purge_expired_tokens(batch_size=None):
+    """
+    Delete expired outstanding tokens and their blacklist entries (they
+    cascade) in batches of `batch_size`, walking the primary key so each
+    batch is a short transaction. An expired token is refused by its
+    signature check, so its rows serve no purpose.
+
+    Returns a Counter of deleted rows per model label, plus 'batches'.
+    """
+    batch_size = batch_size or getattr(settings, 'JWT_TOKEN_PURGE_BATCH_SIZE', 1000)
+    expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+
+    removed = Counter()
+    last_id = 0
+    while True:
+        ids = list(expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        deleted, per_model = expired.filter(id__in=ids).delete()
+        removed.update(per_model)
+        removed['batches'] += 1
+        last_id = ids[-1]
@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Authentication.serializers import PasswordLoginSerializer
+from Users.models import User
+
+
+
+class Command(BaseCommand):
+    help = "Measure password logins per second in this process, with the configured password hasher."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help="Logins timed per case.")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        self.stdout.write(f"Password hasher: {get_hasher().algorithm}")
+
+        # A throwaway user, rolled back at the end.
+        with transaction.atomic():
+            user = User.objects.create_user(
+                phone='00000000000',
+                username='benchmark-login',
+                email='benchmark-login@example.com',
+                user_type=User.UserTypes.SERVICERECIPIENT,
+                full_name='Benchmark',
+                password='benchmark-password',
+            )
+            cases = [
+                ("valid login", user.phone, 'benchmark-password'),
+                ("wrong password", user.phone, 'wrong-password'),
+                ("unknown phone", '00000000001', 'benchmark-password'),
+            ]
+            for label, phone, password in cases:
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    PasswordLoginSerializer(data={'phone': phone, 'password': password}).is_valid()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label}: {iterations / elapsed:.1f} logins/s per worker "
+                    f"({elapsed / iterations * 1000:.1f} ms each)"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from Authentication.blacklist import purge_expired_tokens
+
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding tokens and their blacklist entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help="Tokens deleted per batch (default: settings.JWT_TOKEN_PURGE_BATCH_SIZE)."
+        )
+
+    def handle(self, *args, **options):
+        removed = purge_expired_tokens(batch_size=options['batch_size'])
+
+        batches = removed.pop('batches', 0)
+        self.stdout.write(f"Deleted {sum(removed.values())} row(s) in {batches} batch(es).")
+        for label, count in sorted(removed.items()):
+            self.stdout.write(f"  {label}: {count}")
@@ -1,14 +1,15 @@
+from django.contrib.auth.hashers import make_password
+
 from rest_framework import serializers
 from rest_framework import validators
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
-from .models import UserRegisterOTP, UserLoginOTP
+from .models import UserRegisterOTP
+from .tokens import UserRefreshToken
 
 from Users.models import User
-from OneTimePasswords.models import OneTimePassword
-
-from random import randint
-import uuid
+from Users.provisioning import provision_user
+from OneTimePasswords.backends import OTPCodeMismatch, OTPNotFound, get_otp_backend
 
 
 
@@ -17,15 +18,20 @@ import uuid
 
 
 class PasswordLoginSerializer(serializers.Serializer):
+    """
+    Validates phone + password with a single user query and hands the user
+    to the view as validated_data['user'].
+
+    Unknown phones still pay for one password hash, so a wrong phone and a
+    wrong password take the same time and get the same message.
+    """
 
     phone = serializers.CharField(max_length=255)
     password = serializers.CharField(max_length=255, write_only=True)
 
-
-    def validate_phone(self, value):
-        if not User.objects.filter(phone=value).exists():
-            raise serializers.ValidationError('شماره تلفن موجود نیست')
-        return value
+    default_error_messages = {
+        'invalid_credentials': 'شماره تلفن یا رمز عبور اشتباه است',
+    }
 
 
     def validate_password(self, value):
@@ -43,10 +49,17 @@ class PasswordLoginSerializer(serializers.Serializer):
         if phone is None or password is None:
             raise serializers.ValidationError('شماره تلفن و رمز عبور هر دو الزامی هستند')
         
-        user = User.objects.get(phone=phone)
+        try:
+            user = User.objects.get(phone=phone)
+        except User.DoesNotExist:
+            # Same cost as a real check (see django.contrib.auth.backends.ModelBackend).
+            User().set_password(password)
+            self.fail('invalid_credentials')
 
         if not user.check_password(password):
-            raise serializers.ValidationError('رمز عبور اشتباه است')
+            self.fail('invalid_credentials')
+
+        data['user'] = user
         return data
     
 
@@ -151,35 +164,18 @@ class UserRegisterOneTimePasswordSerializer(serializers.ModelSerializer):
 
 
     def create(self, validated_data):
-
-        code = randint(100000, 999999)
-
-        token = uuid.uuid4()
-
-        otp = OneTimePassword.objects.create(
-            token=token,
-            code=code
-        )
-
-        otp.save()
-
-        otp.get_expiration()
-
-        user_register_otp = UserRegisterOTP.objects.create(
-            otp=otp,
-            email=validated_data['email'],
-            phone=validated_data['phone'],
-            username=validated_data['username'],
-            password=validated_data['password'],
-            user_type=validated_data['user_type'],
-            full_name=validated_data['full_name'],
-            password_conf=validated_data['password_conf']
-        )
-
-
-        user_register_otp.save()
-
-        return {'phone': user_register_otp.phone, 'token': token, 'code': code}
+        # The pending registration rides along with the OTP, password hashed,
+        # until the code is confirmed; nothing is written to the database.
+        token, code = get_otp_backend().issue('register', {
+            'email': validated_data['email'],
+            'phone': validated_data['phone'],
+            'username': validated_data['username'],
+            'password': make_password(validated_data['password']),
+            'user_type': validated_data['user_type'],
+            'full_name': validated_data['full_name'],
+        })
+
+        return {'phone': validated_data['phone'], 'token': token, 'code': code}
     
 
 
@@ -191,39 +187,33 @@ class UserRegisterValidateOneTimePasswordSerializer(serializers.Serializer):
         
         otp_token = self.context.get('otp_token')
 
-        otp = OneTimePassword.objects.get(token=otp_token)
-
-        if otp.status_validation() == 'ACT':
-
-            if otp.code == attrs['code']:
-                return attrs
-            else:
-                raise serializers.ValidationError({'code': 'Invalid OTP code.'})
-        else:
+        # Checking the code and using it up are one atomic step.
+        try:
+            attrs['registration'] = get_otp_backend().consume(otp_token, attrs['code'], 'register')
+        except OTPCodeMismatch:
+            raise serializers.ValidationError({'code': 'Invalid OTP code.'})
+        except OTPNotFound:
             raise serializers.ValidationError('Inactive OTP')
+        return attrs
     
 
-    def create(self, validated_data, token):
-
-        otp = OneTimePassword.objects.get(token=token)
-
-        otp.is_used = True
-        otp.save()
+    def create(self, validated_data):
 
-        user_register_otp = otp.registration_otps
+        registration = validated_data['registration']
 
-        user = User.objects.create_user(
-            email=user_register_otp.email,
-            phone=user_register_otp.phone,
-            username=user_register_otp.username,
-            password=user_register_otp.password,
-            full_name=user_register_otp.full_name,
-            user_type=user_register_otp.user_type
+        # The password was hashed when the OTP was issued.
+        user = User(
+            email=User.objects.normalize_email(registration['email']),
+            phone=registration['phone'],
+            username=registration['username'],
+            password=registration['password'],
+            full_name=registration['full_name'],
+            user_type=registration['user_type']
         )
 
-        user.save()
+        provision_user(user)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
 
         return {
             'user': {
@@ -250,37 +240,17 @@ class UserLoginOneTimePasswordSerializer(serializers.Serializer):
         return value
 
     def validate(self, atters):
-        if User.objects.filter(phone=atters['phone']).exists():
+        atters['user_id'] = User.objects.filter(phone=atters['phone']).values_list('pk', flat=True).first()
+        if atters['user_id'] is not None:
             return atters
         else:
             raise serializers.ValidationError('شماره تلفن موجود نیست')
 
     def create(self, validated_data):
 
-        code = randint(100000, 999999)
+        token, code = get_otp_backend().issue('login', {'user_id': validated_data['user_id']})
 
-        token = uuid.uuid4()
-        
-        otp = OneTimePassword.objects.create(
-            token=token,
-            code=code
-        )
-        
-        otp.save()
-
-        otp.get_expiration()
-        
-        user = User.objects.get(phone=validated_data['phone'])
-        
-        user_login_otp = UserLoginOTP.objects.create(
-            otp=otp,
-            user=user,
-            phone=validated_data['phone']
-        )
-
-        user_login_otp.save()
-
-        return {'phone': user_login_otp.phone, 'token': token, 'code': code}
+        return {'phone': validated_data['phone'], 'token': token, 'code': code}
 
 
 
@@ -290,13 +260,22 @@ class UserLoginValidateOneTimePasswordSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         otp_token = self.context.get('otp_token')
-        
-        otp = OneTimePassword.objects.get(token=otp_token)
 
-        if otp.status_validation() == 'ACT':
-            if otp.code == attrs['code']:
-                return attrs
-            else:
-                raise serializers.ValidationError({'code': 'Invalid OTP code.'})
-        else:
-            raise serializers.ValidationError('Inactive OTP')
\ No newline at end of file
+        # Checking the code and using it up are one atomic step.
+        try:
+            attrs['user_id'] = get_otp_backend().consume(otp_token, attrs['code'], 'login')['user_id']
+        except OTPCodeMismatch:
+            raise serializers.ValidationError({'code': 'Invalid OTP code.'})
+        except OTPNotFound:
+            raise serializers.ValidationError('Inactive OTP')
+        return attrs
+
+
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    simplejwt's refresh (rotating and blacklisting the old token, per
+    SIMPLE_JWT) with UserRefreshToken and its snapshot blacklist check.
+    """
+    token_class = UserRefreshToken
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from Users.models import User
+
+from .authentication import user_cache
+from .blacklist import blacklist_snapshot
+
+
+
+
+@receiver(post_save, sender=User, dispatch_uid='auth_user_cache_saved')
+@receiver(post_delete, sender=User, dispatch_uid='auth_user_cache_deleted')
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken, dispatch_uid='jwt_blacklist_snapshot_logged')
+def log_blacklisted_jti(sender, instance, created, **kwargs):
+    # After commit: a process merging the jti may skip the query for it.
+    if created:
+        jti = instance.token.jti
+        transaction.on_commit(lambda: blacklist_snapshot.push(jti))
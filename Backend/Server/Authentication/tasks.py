@@ -0,0 +1,23 @@
+from celery import shared_task
+
+from .blacklist import blacklist_snapshot, purge_expired_tokens
+
+
+
+
+@shared_task
+def purge_expired_tokens_task():
+    """
+    Nightly purge of expired outstanding and blacklisted tokens
+    (CELERY_BEAT_SCHEDULE). Returns the number of deleted rows per model.
+    """
+    return dict(purge_expired_tokens())
+
+
+@shared_task
+def publish_blacklist_filter_task():
+    """
+    Publish the blacklist Bloom filter for every process
+    (CELERY_BEAT_SCHEDULE). Returns the number of jtis in it.
+    """
+    return blacklist_snapshot.publish_filter()
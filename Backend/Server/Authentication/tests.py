@@ -1,3 +1,336 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Users.models import User
+from Server.throttling import TokenBucketLimiter, rate_limiter
+
+from .authentication import CachedJWTAuthentication, user_cache
+from .blacklist import BlacklistSnapshot, BloomFilter, blacklist_snapshot
+from .tokens import UserRefreshToken
+
+
+
+
+class OneTimePasswordFlowTests(TestCase):
+    """
+    Register and log in with OTPs held by the configured backend.
+    """
+
+    def setUp(self):
+        cache.clear()
+        rate_limiter.reset()
+        self.client = APIClient()
+
+    def test_register_then_login(self):
+        response = self.client.post("/auth/register/", {
+            "email": "otp@example.com",
+            "username": "otpuser",
+            "phone": "09120000040",
+            "full_name": "Otp User",
+            "password": "password123",
+            "password_conf": "password123",
+            "user_type": "SC",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(User.objects.filter(phone="09120000040").exists())
+        detail = response.data["Detail"]
+
+        response = self.client.post(f"/auth/register/validate-otp/{detail['token']}/", {"code": detail["code"]})
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(phone="09120000040")
+        self.assertTrue(user.check_password("password123"))
+
+        response = self.client.post("/auth/login/otp/", {"phone": "09120000040"})
+        self.assertEqual(response.status_code, 200)
+        detail = response.data["Detail"]
+        url = f"/auth/login/validate-otp/{detail['token']}/"
+
+        response = self.client.post(url, {"code": detail["code"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+
+        # The code is used up.
+        response = self.client.post(url, {"code": detail["code"]})
+        self.assertEqual(response.status_code, 400)
+
+
+
+class RateLimitTests(TestCase):
+    """
+    Token buckets per phone and per IP in front of the login and OTP endpoints.
+    """
+
+    def setUp(self):
+        cache.clear()
+        rate_limiter.reset()
+        User.objects.create_user(
+            phone="09120000042", username="limited", email="limited@example.com",
+            user_type="SC", full_name="Limited", password="password123",
+        )
+
+    @override_settings(RATE_LIMITS={'login_otp': {'ip': '5/min', 'phone': '2/min'}})
+    def test_429_with_retry_after(self):
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.post("/auth/login/otp/", {"phone": "09120000042"}).status_code, 200)
+        response = client.post("/auth/login/otp/", {"phone": "09120000042"})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response["Retry-After"]) <= 30)
+
+        # Another phone has its own bucket, until the IP bucket runs out.
+        self.assertEqual(client.post("/auth/login/otp/", {"phone": "09120000043"}).status_code, 400)
+        self.assertEqual(client.post("/auth/login/otp/", {"phone": "09120000044"}).status_code, 400)
+        self.assertEqual(client.post("/auth/login/otp/", {"phone": "09120000045"}).status_code, 429)
+
+    @override_settings(RATE_LIMITS={'login_otp': {'ip': '2/min'}})
+    def test_forwarded_for_does_not_reset_the_ip_bucket(self):
+        client = APIClient()
+        statuses = [
+            client.post("/auth/login/otp/", {"phone": "09120000042"}, HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_bucket_refills(self):
+        now = [1000.0]
+        limiter = TokenBucketLimiter(clock=lambda: now[0])
+        self.assertEqual([limiter.hit("k", "2/10s")[0] for _ in range(3)], [True, True, False])
+        now[0] += 5
+        self.assertEqual([limiter.hit("k", "2/10s")[0] for _ in range(2)], [True, False])
+
+    def test_falls_back_to_process_memory(self):
+        broken = mock.MagicMock()
+        broken.add.side_effect = ConnectionError("cache is down")
+        limiter = TokenBucketLimiter()
+        with mock.patch("Server.throttling.caches", {"default": broken}):
+            results = [limiter.hit("k", "2/min") for _ in range(3)]
+        self.assertEqual([allowed for allowed, wait in results], [True, True, False])
+        self.assertAlmostEqual(results[2][1], 30, delta=1)
+
+
+
+class PasswordLoginTests(TestCase):
+    """
+    Password login reads the user once; unknown phones and wrong passwords
+    look the same from outside.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            phone="09120000046", username="password-login", email="password-login@example.com",
+            user_type="SC", full_name="Password Login", password="password123",
+        )
+
+    def setUp(self):
+        cache.clear()
+        rate_limiter.reset()
+
+    def test_single_user_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().post("/auth/login/", {"phone": "09120000046", "password": "password123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+        # The other query records the refresh token for the blacklist app.
+        user_queries = [query for query in queries if '"Users_user"' in query['sql']]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_unknown_phone_and_wrong_password_match(self):
+        with mock.patch.object(User, "set_password", autospec=True) as dummy_hash:
+            unknown = APIClient().post("/auth/login/", {"phone": "09129999999", "password": "password123"})
+        dummy_hash.assert_called_once()
+        wrong = APIClient().post("/auth/login/", {"phone": "09120000046", "password": "wrong-password"})
+        self.assertEqual(unknown.status_code, 400)
+        self.assertEqual(unknown.data, wrong.data)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_login", iterations=1, stdout=out)
+        self.assertIn("unknown phone:", out.getvalue())
+        self.assertFalse(User.objects.filter(username="benchmark-login").exists())
+
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    Access tokens carry the role claims; their users come from the
+    per-process cache until saved.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            phone="09120000047", username="jwt-user", email="jwt-user@example.com",
+            user_type="OW", full_name="Jwt User", password="password123",
+        )
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.access = str(UserRefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_claims(self):
+        token = AccessToken(self.access)
+        self.assertEqual((token["user_type"], token["is_admin"], token["status"]), ("OW", False, "ACT"))
+
+    def test_user_is_cached(self):
+        self.assertEqual(self.authenticate()[0], self.user)
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user, self.user)
+
+    def test_saving_the_user_invalidates(self):
+        self.authenticate()
+        self.user.full_name = "Renamed"
+        self.user.save()
+        with self.assertNumQueries(1):
+            user, token = self.authenticate()
+        self.assertEqual(user.full_name, "Renamed")
+
+    def test_outdated_claims_and_inactive_users_are_refused(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(user_type="SC")
+        # Not seen by signals, but the claims no longer match once re-read.
+        user_cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+        User.objects.filter(pk=self.user.pk).update(user_type="OW")
+        self.user.refresh_from_db()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+
+class TokenBlacklistTests(TestCase):
+    """
+    Refresh rotation checks the blacklist through the per-process snapshot,
+    kept current from the shared log of blacklisted jtis;
+    expired token rows are purged in batches.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            phone="09120000048", username="refresher", email="refresher@example.com",
+            user_type="OW", full_name="Refresher", password="password123",
+        )
+
+    def setUp(self):
+        cache.clear()
+        blacklist_snapshot.clear()
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return APIClient().post("/auth/token/refresh/", {"refresh": token}, format="json")
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_rotated_token_is_refused(self):
+        old = str(UserRefreshToken.for_user(self.user))
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], old)
+        self.assertEqual(AccessToken(response.data["access"])["user_type"], "OW")
+
+        self.assertEqual(self.refresh(old).status_code, 401)
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, 200)
+
+    @mock.patch.object(BlacklistSnapshot, "trusted", True)
+    def test_current_snapshot_skips_the_query(self):
+        revoked = UserRefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            revoked.blacklist()
+        valid = UserRefreshToken.for_user(self.user)
+
+        # Nothing published yet: the database decides.
+        with self.assertNumQueries(1):
+            self.assertFalse(blacklist_snapshot.is_blacklisted(valid["jti"]))
+
+        blacklist_snapshot.publish_filter()
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist_snapshot.is_blacklisted(valid["jti"]))
+        self.assertTrue(blacklist_snapshot.is_blacklisted(revoked["jti"]))
+
+        # Blacklisted after the filter was published: merged from the log.
+        with self.captureOnCommitCallbacks(execute=True):
+            valid.blacklist()
+        with self.assertRaises(TokenError):
+            UserRefreshToken(str(valid))
+
+    @mock.patch.object(BlacklistSnapshot, "trusted", True)
+    def test_rotation_in_another_process(self):
+        blacklist_snapshot.publish_filter()
+        old = str(UserRefreshToken.for_user(self.user))
+        rotated = self.refresh(old).data["refresh"]
+
+        # The rotating process stays current: no invalidation, no rebuild.
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist_snapshot.is_blacklisted(UserRefreshToken(rotated)["jti"]))
+
+        # Another worker merges the logged jti into its own copy.
+        other = BlacklistSnapshot()
+        with mock.patch("Authentication.tokens.blacklist_snapshot", other):
+            with self.assertNumQueries(0):
+                UserRefreshToken(rotated)
+            self.assertEqual(self.refresh(old).status_code, 401)
+
+    @mock.patch.object(BlacklistSnapshot, "trusted", True)
+    def test_missing_log_entry_queries(self):
+        valid = UserRefreshToken.for_user(self.user)
+        blacklist_snapshot.publish_filter()
+        self.assertFalse(blacklist_snapshot.is_blacklisted(valid["jti"]))
+
+        # Logged past the entry's expiry: the filter cannot be trusted.
+        cache.incr(BlacklistSnapshot.sequence_key)
+        with self.assertNumQueries(1):
+            self.assertFalse(blacklist_snapshot.is_blacklisted(valid["jti"]))
+
+    def test_per_process_cache_always_queries(self):
+        # The test cache is LocMemCache: the snapshot is never trusted.
+        valid = UserRefreshToken.for_user(self.user)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertFalse(blacklist_snapshot.is_blacklisted(valid["jti"]))
+
+    def test_purge_expired_tokens(self):
+        tokens = [UserRefreshToken.for_user(self.user) for _ in range(4)]
+        for token in tokens[:2]:
+            token.blacklist()
+        past = timezone.now() - timedelta(days=1)
+        OutstandingToken.objects.filter(jti__in=[tokens[0]["jti"], tokens[2]["jti"]]).update(expires_at=past)
+
+        out = StringIO()
+        call_command("purge_tokens", batch_size=1, stdout=out)
+
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list("jti", flat=True)), {tokens[1]["jti"], tokens[3]["jti"]}
+        )
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, tokens[1]["jti"])
+        self.assertIn("Deleted 3 row(s) in 2 batch(es).", out.getvalue())
+        self.assertIn("token_blacklist.BlacklistedToken: 1", out.getvalue())
@@ -0,0 +1,41 @@
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_snapshot
+
+
+
+
+def user_claims(user):
+    """
+    Claims embedded in every token of `user`, so clients and permission
+    checks can read the role without a query, and authentication can tell
+    when a token was issued for an older role.
+    """
+    return {
+        'user_type': user.user_type,
+        'is_admin': user.is_admin,
+        'status': user.status,
+    }
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    RefreshToken carrying user_claims(); the access tokens made from it copy
+    them. Its blacklist check goes through blacklist_snapshot, so refreshing
+    a valid token usually skips the blacklist query.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
+    def check_blacklist(self):
+        if blacklist_snapshot.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
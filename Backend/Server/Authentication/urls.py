@@ -14,6 +14,8 @@ urlpatterns = [
 
     path('login/validate-otp/<str:token>/', views.UserLoginValidateOneTimePasswordAPIView.as_view()),
 
+    path('token/refresh/', views.UserTokenRefreshAPIView.as_view(), name="token_refresh"),
+
     path('register/', views.UserRegisterOneTimePasswordAPIView.as_view(), name="user_register_otp"),
 
     path('register/validate-otp/<str:token>/', views.UserRegisterValidateOneTimePasswordAPIView.as_view(), name="user_register_otp_validate"),
@@ -1,27 +1,30 @@
-from django.shortcuts import get_object_or_404
-
 from rest_framework.views import APIView, Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.views import TokenRefreshView
 
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from .tokens import UserRefreshToken
 from .serializers import (  
     PasswordLoginSerializer,
     UserRegisterOneTimePasswordSerializer,
     UserRegisterValidateOneTimePasswordSerializer,
     UserLoginOneTimePasswordSerializer,
-    UserLoginValidateOneTimePasswordSerializer
+    UserLoginValidateOneTimePasswordSerializer,
+    UserTokenRefreshSerializer
 )
 
 from Users.models import User
-from OneTimePasswords.models import OneTimePassword
+
+from Server.throttling import TokenBucketThrottle
 
 
 
 
 class UserLoginPasswordAPIView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login_password'
 
     def post(self, request):
         serializer = PasswordLoginSerializer(data=request.data)
@@ -30,13 +33,12 @@ class UserLoginPasswordAPIView(APIView):
             return Response({"message": "شما قبلاً وارد شده‌اید"}, status=status.HTTP_400_BAD_REQUEST)
         else:
             if serializer.is_valid():
-                phone = serializer.validated_data['phone']
-                user = User.objects.get(phone=phone)
+                user = serializer.validated_data['user']
 
                 if not user.is_active:
                     return Response({'error': 'کاربر فعال نیست'}, status=status.HTTP_401_UNAUTHORIZED)
                 
-                refresh = RefreshToken.for_user(user)
+                refresh = UserRefreshToken.for_user(user)
                 
                 return Response(
                     {
@@ -56,6 +58,8 @@ class UserLoginPasswordAPIView(APIView):
 
 
 class UserRegisterOneTimePasswordAPIView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'register_otp'
 
     def post(self, request):
         
@@ -89,39 +93,31 @@ class UserRegisterValidateOneTimePasswordAPIView(APIView):
     def post(self, request, token):
 
         if not request.user.is_authenticated:
-            otp = get_object_or_404(OneTimePassword, token=token)
-            if otp:
-                if otp.registration_otps:
-                    serializer = UserRegisterValidateOneTimePasswordSerializer(data=request.data, context={'otp_token': otp.token})
-                    if serializer.is_valid(raise_exception=True):
-
-                        user_data = serializer.create(
-                            validated_data=serializer.validated_data, 
-                            token=token
-                        )
-
-                        return Response(
-                            {
-                                'Detail': {
-                                    'Message': 'User created successfully',
-                                    'User': user_data['user'],
-                                    'Token': user_data['tokens']
-                                }
-                            },
-                            status=status.HTTP_201_CREATED
-                        )
-                    else:
-                        return Response({'Detail': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
-                else:
-                    return Response({'Detail': 'Otp register does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+            serializer = UserRegisterValidateOneTimePasswordSerializer(data=request.data, context={'otp_token': token})
+            if serializer.is_valid(raise_exception=True):
+
+                user_data = serializer.create(validated_data=serializer.validated_data)
+
+                return Response(
+                    {
+                        'Detail': {
+                            'Message': 'User created successfully',
+                            'User': user_data['user'],
+                            'Token': user_data['tokens']
+                        }
+                    },
+                    status=status.HTTP_201_CREATED
+                )
             else:
-                return Response({'Detail': 'OTP does not exist'}, status=status.HTTP_404_NOT_FOUND)
+                return Response({'Detail': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         else:
             return Response({'Detail': 'You are already authenticated'}, status=status.HTTP_400_BAD_REQUEST)
 
 
 
 class UserLoginOneTimePasswordAPIView(APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login_otp'
 
     def post(self, request):
         if not request.user.is_authenticated:
@@ -148,22 +144,18 @@ class UserLoginOneTimePasswordAPIView(APIView):
 
 class UserLoginValidateOneTimePasswordAPIView(APIView):
     def post(self, request, token):
-        otp = get_object_or_404(OneTimePassword, token=token)
-
-        login_otp = otp.login_otps.get()
-        
         serializer = UserLoginValidateOneTimePasswordSerializer(data=request.data, context={'otp_token': token})
 
         if request.user.is_authenticated:
             return Response({"message": "شما قبلاً وارد شده‌اید"}, status=status.HTTP_400_BAD_REQUEST)
         else:
             if serializer.is_valid():
-                user = login_otp.user
+                user = User.objects.get(pk=serializer.validated_data['user_id'])
 
                 if not user.is_active:
                     return Response({'error': 'کاربر فعال نیست'}, status=status.HTTP_401_UNAUTHORIZED)
                 
-                refresh = RefreshToken.for_user(user)
+                refresh = UserRefreshToken.for_user(user)
                 
                 return Response(
                     {
@@ -178,4 +170,9 @@ class UserLoginValidateOneTimePasswordAPIView(APIView):
     def handle_exception(self, exc):
         if isinstance(exc, ValidationError):
             return Response({'error': 'خطای اعتبارسنجی'}, status=status.HTTP_400_BAD_REQUEST)
-        return super().handle_exception(exc)
\ No newline at end of file
+        return super().handle_exception(exc)
+
+
+
+class UserTokenRefreshAPIView(TokenRefreshView):
+    serializer_class = UserTokenRefreshSerializer
@@ -102,7 +102,10 @@ class CompanyAdmin(admin.ModelAdmin):
     search_fields = ('name', 'employer__username', 'industry__name')
     list_filter = ('is_validated', 'is_off_season', 'industry', 'service_type')
     prepopulated_fields = {"slug": ("name",)}
-    readonly_fields = ('created_at', 'updated_at', 'logo_preview', 'banner_preview')
+    readonly_fields = (
+        'created_at', 'updated_at', 'logo_preview', 'banner_preview',
+        'avg_quality', 'avg_behavior', 'avg_time', 'score_count', 'overall_score',
+    )
     
     fieldsets = (
         ("مشخصات اصلی", {
@@ -123,6 +126,9 @@ class CompanyAdmin(admin.ModelAdmin):
         ("وضعیت", {
             'fields': ('is_validated', 'is_off_season')
         }),
+        ("امتیازات", {
+            'fields': ('overall_score', 'avg_quality', 'avg_behavior', 'avg_time', 'score_count')
+        }),
         ("تاریخ‌ها", {
             'fields': ('created_at', 'updated_at')
         }),
@@ -142,6 +148,7 @@ class CompanyAdmin(admin.ModelAdmin):
             return f"{score:.2f}"
         return "ندارد"
     overall_score_display.short_description = "امتیاز کلی"
+    overall_score_display.admin_order_field = 'overall_score'
     
     def logo_preview(self, obj):
         if obj.logo:
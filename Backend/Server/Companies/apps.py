@@ -5,3 +5,7 @@ class CompaniesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Companies'
     verbose_name = 'شرکت ها'
+
+    def ready(self):
+        import Companies.signals
+        import Companies.caches
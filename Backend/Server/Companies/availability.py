@@ -0,0 +1,232 @@
+import datetime
+import threading
+from bisect import bisect_right
+
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+
+
+
+# -------------------------------
+# Minute-of-week arithmetic
+# -------------------------------
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# WorkDay.DayOfWeek codes in datetime.weekday() order (Monday == 0).
+WEEKDAY_CODES = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+_DAY_INDEX = {code: index for index, code in enumerate(WEEKDAY_CODES)}
+
+# Intervals are bucketed by hour of the week, so a lookup only scans the
+# intervals that overlap the requested hour.
+BUCKET_MINUTES = 60
+BUCKET_COUNT = MINUTES_PER_WEEK // BUCKET_MINUTES
+
+
+def minute_of_week(moment=None):
+    """
+    Position of `moment` (default: now) in the week, in minutes since Monday
+    00:00 local time.
+    """
+    moment = moment or timezone.now()
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def workday_intervals(day_of_week, open_time, close_time, is_closed=False):
+    """
+    Half-open [start, end) minute-of-week intervals covered by one WorkDay.
+
+    A close time at or before the open time means the shift runs past midnight;
+    a shift running past Sunday midnight wraps around to Monday.
+    """
+    if is_closed or open_time is None or close_time is None or day_of_week not in _DAY_INDEX:
+        return []
+    day_start = _DAY_INDEX[day_of_week] * MINUTES_PER_DAY
+    start = day_start + open_time.hour * 60 + open_time.minute
+    end = day_start + close_time.hour * 60 + close_time.minute
+    if end <= start:
+        end += MINUTES_PER_DAY
+    if end <= MINUTES_PER_WEEK:
+        return [(start, end)]
+    return [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# -------------------------------
+# Availability index
+# -------------------------------
+
+class WeeklySchedules:
+    """
+    One build of the availability index: lookups with no freshness check,
+    for loops that check once (AvailabilityIndex.fresh) and then ask many
+    times.
+    """
+
+    def __init__(self, schedules=None, buckets=None):
+        self.schedules = schedules or {}
+        self.buckets = buckets or [[] for _ in range(BUCKET_COUNT)]
+
+    def has_schedule(self, company_id):
+        return company_id in self.schedules
+
+    def is_open(self, company_id, minute):
+        return self.open_until(company_id, minute) is not None
+
+    def open_until(self, company_id, minute):
+        """
+        End (minute of week) of the company's open interval containing
+        `minute`, or None when it is closed then.
+        """
+        schedule = self.schedules.get(company_id)
+        if schedule is None:
+            return None
+        starts, ends = schedule
+        position = bisect_right(starts, minute) - 1
+        if position >= 0 and minute < ends[position]:
+            return ends[position]
+        return None
+
+    def open_company_ids(self, minute):
+        minute %= MINUTES_PER_WEEK
+        return {
+            company_id
+            for start, end, company_id in self.buckets[minute // BUCKET_MINUTES]
+            if start <= minute < end
+        }
+
+
+class AvailabilityIndex:
+    """
+    In-memory weekly schedule of every company, built from WorkDay rows.
+
+    Per company: sorted, merged start/end arrays (minute of week), answered
+    with a binary search. Across companies: hour-of-week buckets of
+    (start, end, company_id), so "who is open at m" scans one bucket instead
+    of every company.
+
+    The index is built lazily with one query. Saving or deleting a WorkDay
+    bumps a generation counter in the Django cache; every process compares it
+    with the generation it was built from and rebuilds when it is stale.
+    Each query below pays that comparison (a cache round trip); loops take
+    fresh() once instead.
+    """
+    generation_key = 'companies:availability:generation'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._built = WeeklySchedules()
+
+    # Building
+
+    def _load(self):
+        from .models import WorkDay  # Import local to avoid circular dependency.
+
+        per_company = {}
+        rows = WorkDay.objects.filter(is_closed=False).values_list(
+            'company_id', 'day_of_week', 'open_time', 'close_time'
+        )
+        for company_id, day_of_week, open_time, close_time in rows.iterator():
+            per_company.setdefault(company_id, []).extend(
+                workday_intervals(day_of_week, open_time, close_time)
+            )
+
+        schedules = {}
+        buckets = [[] for _ in range(BUCKET_COUNT)]
+        for company_id, intervals in per_company.items():
+            intervals = merge_intervals(intervals)
+            if not intervals:
+                continue
+            schedules[company_id] = (
+                [start for start, end in intervals],
+                [end for start, end in intervals],
+            )
+            for start, end in intervals:
+                for bucket in range(start // BUCKET_MINUTES, (end - 1) // BUCKET_MINUTES + 1):
+                    buckets[bucket].append((start, end, company_id))
+        return WeeklySchedules(schedules, buckets)
+
+    def _current_generation(self):
+        return cache.get_or_set(self.generation_key, 0, timeout=None)
+
+    def fresh(self):
+        """
+        The current build, rebuilt first if stale.
+        """
+        generation = self._current_generation()
+        if generation == self._generation:
+            return self._built
+        with self._lock:
+            if generation != self._generation:
+                self._built = self._load()
+                self._generation = generation
+            return self._built
+
+    def invalidate(self):
+        """
+        Mark every process's index stale; called when a WorkDay changes.
+        """
+        try:
+            cache.incr(self.generation_key)
+        except ValueError:
+            cache.set(self.generation_key, 1, timeout=None)
+        # Never trust a local build once a change is known.
+        self._generation = None
+
+    # Queries
+
+    def has_schedule(self, company_id):
+        return self.fresh().has_schedule(company_id)
+
+    def is_open(self, company_id, minute):
+        return self.fresh().is_open(company_id, minute)
+
+    def open_until(self, company_id, minute):
+        return self.fresh().open_until(company_id, minute)
+
+    def open_company_ids(self, minute):
+        return self.fresh().open_company_ids(minute)
+
+
+availability = AvailabilityIndex()
+
+
+def open_filter(moment=None):
+    """
+    Filter for a Company queryset keeping the companies open at `moment`
+    (default: now): an EXISTS over their WorkDay rows with the rules of
+    workday_intervals, so the statement does not grow with the number of
+    open companies the way a `pk__in` list of the index's ids would.
+    """
+    from .models import WorkDay  # Import local to avoid circular dependency.
+
+    moment = moment or timezone.now()
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    day = moment.weekday()
+    now = datetime.time(moment.hour, moment.minute)
+    overnight = Q(close_time__lte=F('open_time'))
+    shifts = WorkDay.objects.filter(
+        company=OuterRef('pk'), is_closed=False, open_time__isnull=False, close_time__isnull=False,
+    ).filter(
+        # A shift of today, started and not over (or running past midnight).
+        Q(day_of_week=WEEKDAY_CODES[day], open_time__lte=now) & (Q(close_time__gt=now) | overnight)
+        # Yesterday's overnight shift, not over yet.
+        | Q(day_of_week=WEEKDAY_CODES[day - 1], close_time__gt=now) & overnight
+    )
+    return Exists(shifts)
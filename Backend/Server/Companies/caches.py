@@ -0,0 +1,11 @@
+from Server.slug_resolver import slug_resolver
+
+from .models import Company
+
+
+
+
+# Registered at app load (CompaniesConfig.ready) so that slug changes from any
+# entry point invalidate the resolver. The flags a service is created against
+# are cached with the id (Services.serializers).
+slug_resolver.register(Company, fields=('is_validated', 'is_off_season'))
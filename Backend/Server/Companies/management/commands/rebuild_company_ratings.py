@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from Companies.ratings import rebuild_company_ratings
+
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized rating columns of every company from its service scores."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of companies written per bulk update."
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding company ratings...")
+        rated = rebuild_company_ratings(batch_size=options['batch_size'])
+        self.stdout.write(f"Company ratings rebuilt; {rated} companies have scores.")
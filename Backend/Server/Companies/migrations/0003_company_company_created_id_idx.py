@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 17:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Addresses', '0003_rename_recipient_recipientaddress_recipient'),
+        ('Companies', '0002_initial'),
+        ('Industries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['-created_at', '-id'], name='company_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-17 17:35
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_ratings(apps, schema_editor):
+    Company = apps.get_model('Companies', 'Company')
+    ServiceScore = apps.get_model('Scores', 'ServiceScore')
+    rows = (
+        ServiceScore.objects
+        .values('service__company')
+        .annotate(q=Avg('quality'), b=Avg('behavior'), t=Avg('time'), n=Count('id'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        Company.objects.filter(pk=row['service__company']).update(
+            avg_quality=row['q'],
+            avg_behavior=row['b'],
+            avg_time=row['t'],
+            score_count=row['n'],
+            overall_score=(row['q'] + row['b'] + row['t']) / 3,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Companies', '0003_company_company_created_id_idx'),
+        ('Scores', '0002_servicescore_score_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='avg_behavior',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='میانگین رفتار'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='avg_quality',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='میانگین کیفیت'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='avg_time',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='میانگین سرعت'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='overall_score',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='امتیاز کلی'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد امتیازها'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
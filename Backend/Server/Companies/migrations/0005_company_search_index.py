@@ -0,0 +1,37 @@
+from django.db import migrations
+
+from Companies.search import BACKENDS, company_documents
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    backend_class = BACKENDS.get(connection.vendor)
+    if backend_class is None:
+        return
+    backend = backend_class()
+    Company = apps.get_model('Companies', 'Company')
+    with connection.cursor() as cursor:
+        cursor.execute(backend.create_sql)
+        backend.update(cursor, company_documents(Company.objects.all()))
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    backend_class = BACKENDS.get(connection.vendor)
+    if backend_class is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(backend_class.drop_sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Companies', '0004_company_avg_behavior_company_avg_quality_and_more'),
+        ('Industries', '0001_initial'),
+        ('Addresses', '0003_rename_recipient_recipientaddress_recipient'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -158,6 +158,43 @@ class Company(models.Model):
         verbose_name="فصل تعطیلات / غیر کاری"
     )
 
+    # Denormalized rating columns, maintained incrementally by Companies.ratings
+    # whenever a ServiceScore changes. Rebuild with `rebuild_company_ratings`.
+    avg_quality = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="میانگین کیفیت"
+    )
+
+    avg_behavior = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="میانگین رفتار"
+    )
+
+    avg_time = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="میانگین سرعت"
+    )
+
+    score_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="تعداد امتیازها"
+    )
+
+    overall_score = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="امتیاز کلی"
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="تاریخ ایجاد"
@@ -172,6 +209,10 @@ class Company(models.Model):
     class Meta:
         verbose_name = "شرکت"
         verbose_name_plural = "شرکت ها"
+        indexes = [
+            # Keyset pagination: ORDER BY created_at DESC, id DESC.
+            models.Index(fields=['-created_at', '-id'], name='company_created_id_idx'),
+        ]
 
 
     def __str__(self):
@@ -199,25 +240,13 @@ class Company(models.Model):
     def average_scores(self):
         """
         میانگین امتیازات کیفیت، رفتار و سرعت بر روی تمامی سرویس‌های این شرکت.
+        از ستون‌های ذخیره شده خوانده می‌شود و کوئری اضافه‌ای ندارد.
         """
-        aggregate = self.service_scores.aggregate(
-            avg_quality=models.Avg('quality'),
-            avg_behavior=models.Avg('behavior'),
-            avg_time=models.Avg('time')
-        )
-        return aggregate
-
-
-    @property
-    def overall_score(self):
-        """
-        محاسبه امتیاز کلی به عنوان میانگین سه شاخص.
-        """
-        scores = self.average_scores
-        if scores['avg_quality'] is not None:
-            overall = (scores['avg_quality'] + scores['avg_behavior'] + scores['avg_time']) / 3
-            return overall
-        return None
+        return {
+            'avg_quality': self.avg_quality,
+            'avg_behavior': self.avg_behavior,
+            'avg_time': self.avg_time,
+        }
 
 
 
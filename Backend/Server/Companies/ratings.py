@@ -0,0 +1,126 @@
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Company
+
+
+
+
+# (ServiceScore field, Company column) pairs kept in sync.
+SCORE_COLUMNS = (
+    ('quality', 'avg_quality'),
+    ('behavior', 'avg_behavior'),
+    ('time', 'avg_time'),
+)
+
+
+def _companies_of_service(service_id):
+    return Company.objects.filter(service_company__id=service_id)
+
+
+def _apply(service_id, averages, count_delta):
+    """
+    Run one UPDATE that sets the three averages, the count and the overall score.
+
+    Every right-hand side refers to the row's values *before* the update, which
+    is how SQLite and PostgreSQL evaluate SET clauses.
+    """
+    updates = {column: expression for column, expression in averages.items()}
+    updates['score_count'] = F('score_count') + count_delta
+    updates['overall_score'] = sum(averages.values(), Value(0.0)) / Value(3.0)
+    _companies_of_service(service_id).update(**updates)
+
+
+def score_added(service_id, values):
+    """
+    Fold a new (quality, behavior, time) score into the service's company.
+    """
+    averages = {}
+    for (field, column), value in zip(SCORE_COLUMNS, values):
+        averages[column] = (
+            Coalesce(F(column), Value(0.0)) * F('score_count') + Value(float(value))
+        ) / (F('score_count') + 1)
+    _apply(service_id, averages, 1)
+
+
+def score_removed(service_id, values):
+    """
+    Take a (quality, behavior, time) score back out of the service's company.
+    """
+    averages = {}
+    for (field, column), value in zip(SCORE_COLUMNS, values):
+        averages[column] = Case(
+            # Removing the last score leaves the company unrated.
+            When(score_count__lte=1, then=Value(None)),
+            default=(F(column) * F('score_count') - Value(float(value))) / (F('score_count') - 1),
+            output_field=FloatField(),
+        )
+    _apply(service_id, averages, -1)
+
+
+def score_changed(service_id, old_values, new_values):
+    """
+    Replace one score with another for the same service.
+    """
+    averages = {}
+    for (field, column), old, new in zip(SCORE_COLUMNS, old_values, new_values):
+        averages[column] = Case(
+            When(score_count__gt=0, then=F(column) + Value(float(new - old)) / F('score_count')),
+            default=F(column),
+            output_field=FloatField(),
+        )
+    _apply(service_id, averages, 0)
+
+
+def rebuild_company_ratings(companies=None, batch_size=1000):
+    """
+    Recompute the rating columns from ServiceScore with one grouped query,
+    written back with bulk updates. Returns the number of rated companies.
+    """
+    from Scores.models import ServiceScore  # Import local to avoid circular dependency.
+
+    if companies is None:
+        companies = Company.objects.all()
+
+    aggregates = (
+        ServiceScore.objects
+        .filter(service__company__in=companies)
+        .values('service__company')
+        .annotate(
+            avg_quality=Avg('quality'),
+            avg_behavior=Avg('behavior'),
+            avg_time=Avg('time'),
+            score_count=Count('id'),
+        )
+        .order_by()
+    )
+    columns = [column for field, column in SCORE_COLUMNS] + ['score_count', 'overall_score']
+
+    rated = 0
+    with transaction.atomic():
+        companies.update(
+            avg_quality=None,
+            avg_behavior=None,
+            avg_time=None,
+            score_count=0,
+            overall_score=None,
+        )
+        batch = []
+        for row in aggregates.iterator(chunk_size=batch_size):
+            batch.append(Company(
+                pk=row['service__company'],
+                avg_quality=row['avg_quality'],
+                avg_behavior=row['avg_behavior'],
+                avg_time=row['avg_time'],
+                score_count=row['score_count'],
+                overall_score=(row['avg_quality'] + row['avg_behavior'] + row['avg_time']) / 3,
+            ))
+            if len(batch) >= batch_size:
+                Company.objects.bulk_update(batch, columns)
+                rated += len(batch)
+                batch = []
+        if batch:
+            Company.objects.bulk_update(batch, columns)
+            rated += len(batch)
+    return rated
@@ -12,6 +12,7 @@ class CompanyRouter(routers.DefaultRouter):
     Endpoints under /companies/:
       - List:           GET /companies/
       - Create:         POST /companies/create/
+      - Search:         GET /companies/search/?q=<text>
       - Retrieve:       GET /companies/<slug:slug>/
       - Update:         PUT/PATCH /companies/<slug:slug>/
       - Delete:         DELETE /companies/<slug:slug>/
@@ -31,6 +32,8 @@ class CompanyRouter(routers.DefaultRouter):
                 path('', views.CompanyViewSet.as_view({'get': 'list'})),
                 # Create route: POST /companies/create/
                 path('create/', views.CompanyViewSet.as_view({'post': 'create'})),
+                # Search route: GET /companies/search/?q=<text>
+                path('search/', views.CompanyViewSet.as_view({'get': 'search'})),
                 # Retrieve, update, and delete using the company slug.
                 path('<slug:slug>/', include([
                     # Basic detail route: GET, PUT/PATCH, DELETE.
@@ -45,7 +48,9 @@ class CompanyRouter(routers.DefaultRouter):
                 ])),
             ])),
         ]
-        return urls + custom_urls
+        # Custom routes go first so that fixed paths such as create/ and search/
+        # are not captured by the default <slug>/ detail route.
+        return custom_urls + urls
 
 
 
@@ -0,0 +1,245 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+
+
+
+
+# -------------------------------
+# Persian text normalization
+# -------------------------------
+
+ZWNJ = '\u200c'
+
+# Arabic code points that Persian keyboards and copy-pasted text mix in.
+_CHARACTER_MAP = str.maketrans({
+    '\u064a': '\u06cc',  # ARABIC YEH            -> FARSI YEH
+    '\u0649': '\u06cc',  # ALEF MAKSURA          -> FARSI YEH
+    '\u0643': '\u06a9',  # ARABIC KAF            -> KEHEH
+    '\u0629': '\u0647',  # TEH MARBUTA           -> HEH
+    '\u0623': '\u0627',  # ALEF WITH HAMZA ABOVE -> ALEF
+    '\u0625': '\u0627',  # ALEF WITH HAMZA BELOW -> ALEF
+    '\u0671': '\u0627',  # ALEF WASLA            -> ALEF
+    '\u0640': None,       # TATWEEL
+    '\u200d': None,       # ZERO WIDTH JOINER
+    '\u200e': None,       # LEFT-TO-RIGHT MARK
+    '\u200f': None,       # RIGHT-TO-LEFT MARK
+    '\ufeff': None,       # BYTE ORDER MARK
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+})
+
+# Harakat, tanwin, shadda, sukun and superscript alef.
+_DIACRITICS = re.compile('[\u064b-\u065f\u0670]')
+
+_TOKEN = re.compile('[\\w\u200c]+')
+
+
+def normalize(text):
+    """
+    Fold the character variants of Persian text onto one form: Arabic yeh/kaf
+    onto their Persian counterparts, Persian digits onto ASCII, diacritics and
+    tatweel removed, lower-cased.
+    """
+    if not text:
+        return ''
+    text = text.translate(_CHARACTER_MAP)
+    text = _DIACRITICS.sub('', text)
+    return text.lower()
+
+
+def tokenize(text):
+    """
+    Split normalized text into search tokens.
+
+    A word written with a zero-width non-joiner (e.g. "می‌روم") yields the joined
+    form and its parts, so it matches whether the user types the ZWNJ, a space
+    or nothing at all.
+    """
+    tokens = []
+    for token in _TOKEN.findall(normalize(text)):
+        parts = [part for part in token.split(ZWNJ) if part]
+        if not parts:
+            continue
+        if len(parts) > 1:
+            tokens.append(''.join(parts))
+        tokens.extend(parts)
+    return tokens
+
+
+def build_document(*fields):
+    return ' '.join(token for field in fields for token in tokenize(field))
+
+
+def company_documents(companies):
+    """
+    Yield (company_id, document) for a Company queryset with a single query.
+    """
+    rows = companies.values_list('id', 'name', 'description', 'industry__name', 'city__name')
+    for company_id, name, description, industry, city in rows.iterator():
+        yield company_id, build_document(name, description, industry, city)
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+
+SEARCH_TABLE = 'companies_search'
+
+
+def _rating_weight():
+    return getattr(settings, 'COMPANY_SEARCH_RATING_WEIGHT', 0.3)
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 virtual table keyed by company id, ranked with bm25().
+    """
+    create_sql = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        f"USING fts5(document, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    drop_sql = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+    def update(self, cursor, rows):
+        rows = list(rows)
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(pk,) for pk, _ in rows])
+        cursor.executemany(f"INSERT INTO {SEARCH_TABLE} (rowid, document) VALUES (%s, %s)", rows)
+
+    def delete(self, cursor, company_ids):
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(pk,) for pk in company_ids])
+
+    def search(self, cursor, tokens, limit, validated_only):
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        # bm25() is negative, lower is better; map it onto [0, 1) before blending.
+        sql = f"""
+            SELECT c.id
+            FROM {SEARCH_TABLE} s
+            JOIN "Companies_company" c ON c.id = s.rowid
+            WHERE {SEARCH_TABLE} MATCH %s {'AND c.is_validated' if validated_only else ''}
+            ORDER BY (-bm25({SEARCH_TABLE})) / (1 - bm25({SEARCH_TABLE})) * (1 - %s)
+                     + COALESCE(c.overall_score, 0) / 10.0 * %s DESC,
+                     c.id DESC
+            LIMIT %s
+        """
+        weight = _rating_weight()
+        cursor.execute(sql, [match, weight, weight, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """
+    tsvector table with a GIN index, ranked with ts_rank(). Documents are
+    normalized in Python, so the language-agnostic 'simple' configuration is used.
+    """
+    create_sql = (
+        f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+        f"company_id bigint PRIMARY KEY REFERENCES \"Companies_company\" (id) ON DELETE CASCADE "
+        f"DEFERRABLE INITIALLY DEFERRED, "
+        f"document tsvector NOT NULL); "
+        f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)"
+    )
+    drop_sql = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+    def update(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (company_id, document) VALUES (%s, to_tsvector('simple', %s)) "
+            f"ON CONFLICT (company_id) DO UPDATE SET document = EXCLUDED.document",
+            list(rows),
+        )
+
+    def delete(self, cursor, company_ids):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE company_id = ANY(%s)", [list(company_ids)])
+
+    def search(self, cursor, tokens, limit, validated_only):
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        sql = f"""
+            SELECT c.id
+            FROM {SEARCH_TABLE} s
+            JOIN "Companies_company" c ON c.id = s.company_id
+            WHERE s.document @@ to_tsquery('simple', %s) {'AND c.is_validated' if validated_only else ''}
+            ORDER BY ts_rank(s.document, to_tsquery('simple', %s)) * (1 - %s)
+                     + COALESCE(c.overall_score, 0) / 10.0 * %s DESC,
+                     c.id DESC
+            LIMIT %s
+        """
+        weight = _rating_weight()
+        cursor.execute(sql, [query, query, weight, weight, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class LikeSearchBackend:
+    """
+    Fallback for the other databases, which have no search index (migration
+    0005 skips them): nothing to maintain, and every token must be a
+    substring of the name, description, industry or city, best rated first.
+    The stored text is not normalized, so some variants the indexes fold
+    together are missed.
+    """
+
+    def update(self, cursor, rows):
+        pass
+
+    def delete(self, cursor, company_ids):
+        pass
+
+    def search(self, cursor, tokens, limit, validated_only):
+        from .models import Company  # Import local to avoid circular dependency.
+
+        companies = Company.objects.filter(is_validated=True) if validated_only else Company.objects.all()
+        for token in tokens:
+            companies = companies.filter(
+                Q(name__icontains=token) | Q(description__icontains=token)
+                | Q(industry__name__icontains=token) | Q(city__name__icontains=token)
+            )
+        ranked = companies.order_by(F('overall_score').desc(nulls_last=True), '-id')
+        return list(ranked.values_list('id', flat=True)[:limit])
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(conn=None):
+    """
+    The search backend of the connection's database; LikeSearchBackend for
+    the ones without an index, so saving a company never fails over search.
+    """
+    conn = conn or connection
+    return BACKENDS.get(conn.vendor, LikeSearchBackend)()
+
+
+# -------------------------------
+# Index maintenance and queries
+# -------------------------------
+
+def index_companies(companies):
+    """
+    (Re)index every company in the queryset.
+    """
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        backend.update(cursor, company_documents(companies))
+
+
+def unindex_companies(company_ids):
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        backend.delete(cursor, company_ids)
+
+
+def search_company_ids(text, limit=20, validated_only=True):
+    """
+    Return company ids matching every token of `text` (as prefixes), ordered by
+    text relevance blended with the denormalized overall score.
+    """
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens:
+        return []
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        return backend.search(cursor, tokens, limit, validated_only)
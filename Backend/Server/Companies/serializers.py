@@ -7,8 +7,11 @@ from .models import *
 
 from Addresses.serializers import CitySerializer, ProvinceSerializer
 from Items.serializers import FirstItemSerializer, SecondItemSerializer
+from Server.query_plans import QueryPlanMixin
+from Server.slug_resolver import slug_resolver
+
+from .availability import minute_of_week, workday_intervals
 
-import datetime
 
 
 
@@ -19,9 +22,12 @@ def get_full_host():
     return settings.ALLOWED_HOSTS[0]
 
 
-class CompanyValidationStatusSerializer(serializers.ModelSerializer):
+class CompanyValidationStatusSerializer(QueryPlanMixin, serializers.ModelSerializer):
     validated_by = serializers.SerializerMethodField()
 
+    # Query plan: get_validated_by reads the validating admin.
+    select_related_fields = ('validated_by',)
+
     class Meta:
         model = CompanyValidationStatus
         fields = "__all__"
@@ -106,7 +112,7 @@ class CompanyValidationStatusSerializer(serializers.ModelSerializer):
 
 
 
-class WorkDaySerializer(serializers.ModelSerializer):
+class WorkDaySerializer(QueryPlanMixin, serializers.ModelSerializer):
     # Returns the human-readable day-of-week (e.g., "دوشنبه")
     day_of_week_display = serializers.CharField(source="get_day_of_week_display", read_only=True)
     # Returns the working hours string using the model’s time_range property.
@@ -135,15 +141,11 @@ class WorkDaySerializer(serializers.ModelSerializer):
         return obj.time_range
 
     def get_is_open_now(self, obj):
-        now = datetime.datetime.now().time()
-        current_day = datetime.datetime.today().strftime("%A").lower()
-        if obj.day_of_week != current_day:
-            return False
-        if obj.is_closed:
-            return False
-        if obj.open_time and obj.close_time and (obj.open_time <= now <= obj.close_time):
-            return True
-        return False
+        # Read the clock once per serializer, not once per row.
+        if not hasattr(self, "_minute_of_week"):
+            self._minute_of_week = minute_of_week()
+        intervals = workday_intervals(obj.day_of_week, obj.open_time, obj.close_time, obj.is_closed)
+        return any(start <= self._minute_of_week < end for start, end in intervals)
 
     def validate(self, attrs):
         """
@@ -216,7 +218,7 @@ class WorkDaySerializer(serializers.ModelSerializer):
 
 
 
-class CompanyFirstItemSerializer(serializers.ModelSerializer):
+class CompanyFirstItemSerializer(QueryPlanMixin, serializers.ModelSerializer):
     # Read-only nested representation for display.
     first_item = FirstItemSerializer(read_only=True)
     # Write-only field expecting the first_item slug.
@@ -224,6 +226,9 @@ class CompanyFirstItemSerializer(serializers.ModelSerializer):
     # Write-only field to supply the company slug.
     company_slug = serializers.CharField(write_only=True)
 
+    # Query plan: the nested first_item is read for every row.
+    select_related_fields = ('first_item',)
+
     class Meta:
         model = CompanyFirstItem
         fields = "__all__"
@@ -231,26 +236,22 @@ class CompanyFirstItemSerializer(serializers.ModelSerializer):
         read_only_fields = ('compay',)
 
     def validate(self, attrs):
-        # Validate the provided company_slug.
-        company_slug = attrs.get('company_slug')
-        try:
-            company = Company.objects.get(slug=company_slug)
-        except Company.DoesNotExist:
+        # Validate the provided company_slug (resolved through the shared slug cache).
+        company_id = slug_resolver.resolve(Company, attrs.get('company_slug'))
+        if company_id is None:
             raise serializers.ValidationError({
                 "company_slug": "Company with the provided slug does not exist."
             })
-        # Save the company instance under the model field name.
-        attrs['compay'] = company
+        # Save the company id under the model field name.
+        attrs['compay_id'] = company_id
 
         # Validate the provided first_item_slug.
-        first_item_slug = attrs.get('first_item_slug')
-        try:
-            first_item = FirstItem.objects.get(slug=first_item_slug)
-        except FirstItem.DoesNotExist:
+        first_item_id = slug_resolver.resolve(FirstItem, attrs.get('first_item_slug'))
+        if first_item_id is None:
             raise serializers.ValidationError({
                 "first_item_slug": "First item with the provided slug does not exist."
             })
-        attrs['first_item'] = first_item
+        attrs['first_item_id'] = first_item_id
 
         return attrs
 
@@ -267,14 +268,14 @@ class CompanyFirstItemSerializer(serializers.ModelSerializer):
         validated_data.pop('company_slug', None)
         validated_data.pop('first_item_slug', None)
         # Allow updating the first_item if provided.
-        if 'first_item' in validated_data:
-            instance.first_item = validated_data['first_item']
+        if 'first_item_id' in validated_data:
+            instance.first_item_id = validated_data['first_item_id']
         instance.save()
         return instance
 
 
 
-class CompanySecondItemSerializer(serializers.ModelSerializer):
+class CompanySecondItemSerializer(QueryPlanMixin, serializers.ModelSerializer):
     # Read-only nested representation for display.
     second_item = SecondItemSerializer(read_only=True)
     # Write-only field for the second_item slug.
@@ -282,6 +283,9 @@ class CompanySecondItemSerializer(serializers.ModelSerializer):
     # Write-only field for the company slug.
     company_slug = serializers.CharField(write_only=True)
 
+    # Query plan: the nested second_item is read for every row.
+    select_related_fields = ('second_item',)
+
     class Meta:
         model = CompanySecondItem
         fields = "__all__"
@@ -289,25 +293,21 @@ class CompanySecondItemSerializer(serializers.ModelSerializer):
         read_only_fields = ('compay',)
 
     def validate(self, attrs):
-        # Validate the provided company_slug.
-        company_slug = attrs.get('company_slug')
-        try:
-            company = Company.objects.get(slug=company_slug)
-        except Company.DoesNotExist:
+        # Validate the provided company_slug (resolved through the shared slug cache).
+        company_id = slug_resolver.resolve(Company, attrs.get('company_slug'))
+        if company_id is None:
             raise serializers.ValidationError({
                 "company_slug": "Company with the provided slug does not exist."
             })
-        attrs['compay'] = company
+        attrs['compay_id'] = company_id
 
         # Validate the provided second_item_slug.
-        second_item_slug = attrs.get('second_item_slug')
-        try:
-            second_item = SecondItem.objects.get(slug=second_item_slug)
-        except SecondItem.DoesNotExist:
+        second_item_id = slug_resolver.resolve(SecondItem, attrs.get('second_item_slug'))
+        if second_item_id is None:
             raise serializers.ValidationError({
                 "second_item_slug": "Second item with the provided slug does not exist."
             })
-        attrs['second_item'] = second_item
+        attrs['second_item_id'] = second_item_id
 
         return attrs
 
@@ -322,15 +322,15 @@ class CompanySecondItemSerializer(serializers.ModelSerializer):
         validated_data.pop('company_slug', None)
         validated_data.pop('second_item_slug', None)
         # Allow updating the second_item if provided.
-        if 'second_item' in validated_data:
-            instance.second_item = validated_data['second_item']
+        if 'second_item_id' in validated_data:
+            instance.second_item_id = validated_data['second_item_id']
         instance.save()
         return instance
     
 
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(QueryPlanMixin, serializers.ModelSerializer):
     logo = serializers.ImageField(required=False)
     banner = serializers.ImageField(required=False)
     intro_video = serializers.FileField(required=False)
@@ -352,6 +352,10 @@ class CompanySerializer(serializers.ModelSerializer):
         write_only=True, help_text="The slug representing the province.", required=False
     )
     name = serializers.CharField(required=False)
+
+    # Query plan: nested serializers above contribute their own plans.
+    select_related_fields = ('validation_status', 'city', 'province')
+    prefetch_related_fields = ('workdays', 'companies_first_item', 'companies_second_item')
     
     class Meta:
         model = Company
@@ -375,7 +379,7 @@ class CompanySerializer(serializers.ModelSerializer):
 
     def validate_industry_slug(self, value):
         """Ensure that the provided industry exists."""
-        if not Industry.objects.filter(slug=value).exists():
+        if slug_resolver.resolve(Industry, value) is None:
             raise serializers.ValidationError("The specified industry does not exist.")
         return value
 
@@ -412,24 +416,21 @@ class CompanySerializer(serializers.ModelSerializer):
                     "city_slug": "Both city_slug and province_slug are required for location.",
                     "province_slug": "Both city_slug and province_slug are required for location."
                 })
-            # Look up the province.
-            try:
-                province = Province.objects.get(slug=province_slug)
-            except Province.DoesNotExist:
+            # Resolve both slugs through the shared slug cache.
+            province_id = slug_resolver.resolve(Province, province_slug)
+            if province_id is None:
                 raise serializers.ValidationError({"province_slug": "Province not found."})
-            # Look up the city.
-            try:
-                city = City.objects.get(slug=city_slug)
-            except City.DoesNotExist:
+            city_id = slug_resolver.resolve(City, city_slug)
+            if city_id is None:
                 raise serializers.ValidationError({"city_slug": "City not found."})
             # Validate that the city belongs to the province.
-            if city.province != province:
+            if not City.objects.filter(pk=city_id, province_id=province_id).exists():
                 raise serializers.ValidationError({
                     "city_slug": "The specified city is not located within the provided province."
                 })
-            # Attach the instances to validated data.
-            attrs["city"] = city
-            attrs["province"] = province
+            # Attach the ids to validated data.
+            attrs["city_id"] = city_id
+            attrs["province_id"] = province_id
         return attrs
 
     def create(self, validated_data):
@@ -438,8 +439,7 @@ class CompanySerializer(serializers.ModelSerializer):
         # Remove industry_slug and fetch the actual Industry instance if provided.
         industry_slug = validated_data.pop('industry_slug', None)
         if industry_slug:
-            industry = Industry.objects.get(slug=industry_slug)
-            validated_data['industry'] = industry
+            validated_data['industry_id'] = slug_resolver.resolve(Industry, industry_slug)
         # Generate a slug for the company based on its name.
         generated_slug = slugify(validated_data.get('name'), allow_unicode=True)
         validated_data['slug'] = generated_slug
@@ -459,10 +459,9 @@ class CompanySerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         request = self.context.get('request')
         # If industry_slug is provided, update the company’s industry.
-        industry_slug = validated_data.get('industry_slug', None)
+        industry_slug = validated_data.pop('industry_slug', None)
         if industry_slug:
-            industry = Industry.objects.get(slug=industry_slug)
-            validated_data['industry'] = industry
+            validated_data['industry_id'] = slug_resolver.resolve(Industry, industry_slug)
         # Prevent non-admin users from updating the is_validated field.
         if not request.user.is_staff and 'is_validated' in validated_data:
             validated_data.pop('is_validated')
@@ -477,11 +476,14 @@ class CompanySerializer(serializers.ModelSerializer):
 
 
 
-class CompanyCardSerializer(serializers.ModelSerializer):
+class CompanyCardSerializer(QueryPlanMixin, serializers.ModelSerializer):
     # Display the company name in read-only mode.
     company = serializers.SlugRelatedField(read_only=True, slug_field='name')
     # Write-only field to lookup the company via its slug.
     company_slug = serializers.CharField(write_only=True, required=True)
+
+    # Query plan: the company name is shown on every card.
+    select_related_fields = ('company',)
     
     class Meta:
         model = CompanyCard
@@ -506,11 +508,10 @@ class CompanyCardSerializer(serializers.ModelSerializer):
         """
         company_slug = attrs.pop("company_slug", None)
         if company_slug is not None:
-            try:
-                company = Company.objects.get(slug=company_slug)
-            except Company.DoesNotExist:
+            company_id = slug_resolver.resolve(Company, company_slug)
+            if company_id is None:
                 raise serializers.ValidationError({"company_slug": "Invalid company slug."})
-            attrs["company"] = company
+            attrs["company_id"] = company_id
             return attrs
         return attrs
         
@@ -536,7 +537,7 @@ class CompanyCardSerializer(serializers.ModelSerializer):
 
 
 
-class CompanyReceptionistSerializer(serializers.ModelSerializer):
+class CompanyReceptionistSerializer(QueryPlanMixin, serializers.ModelSerializer):
     company_slug = serializers.CharField(write_only=True, required=True)
     employee_username = serializers.CharField(write_only=True, required=True)
     
@@ -598,7 +599,7 @@ class CompanyReceptionistSerializer(serializers.ModelSerializer):
 
 
 
-class CompanyAccountantSerializer(serializers.ModelSerializer):
+class CompanyAccountantSerializer(QueryPlanMixin, serializers.ModelSerializer):
     company_slug = serializers.CharField(write_only=True, required=True)
     employee_username = serializers.CharField(write_only=True, required=True)
     
@@ -656,7 +657,7 @@ class CompanyAccountantSerializer(serializers.ModelSerializer):
 
 
 
-class CompanyExpertSerializer(serializers.ModelSerializer):
+class CompanyExpertSerializer(QueryPlanMixin, serializers.ModelSerializer):
     company_slug = serializers.CharField(write_only=True, required=True)
     employee_username = serializers.CharField(write_only=True, required=True)
     
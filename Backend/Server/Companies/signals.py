@@ -0,0 +1,55 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Company, WorkDay
+from .search import index_companies, unindex_companies
+from .availability import availability
+
+from Industries.models import Industry
+from Addresses.models import City
+
+
+
+@receiver(post_save, sender=Company)
+def index_company(sender, instance, raw=False, **kwargs):
+    """
+    Keep the company's full-text search document in sync with its fields.
+    """
+    if raw:
+        return
+    index_companies(Company.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Company)
+def unindex_company(sender, instance, **kwargs):
+    unindex_companies([instance.pk])
+
+
+@receiver(post_save, sender=Industry)
+def reindex_industry_companies(sender, instance, created, raw=False, **kwargs):
+    """
+    Industry names are part of the search document of every company in it.
+    """
+    if raw or created:
+        return
+    index_companies(Company.objects.filter(industry=instance))
+
+
+@receiver(post_save, sender=City)
+def reindex_city_companies(sender, instance, created, raw=False, **kwargs):
+    """
+    City names are part of the search document of every company in it.
+    """
+    if raw or created:
+        return
+    index_companies(Company.objects.filter(city=instance))
+
+
+@receiver(post_save, sender=WorkDay)
+@receiver(post_delete, sender=WorkDay)
+def invalidate_availability(sender, raw=False, **kwargs):
+    """
+    Working hours changed; the precomputed weekly availability is stale.
+    """
+    if raw:
+        return
+    availability.invalidate()
@@ -1,3 +1,506 @@
+import base64
+import json
+from datetime import datetime, time, timezone
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from Users.models import User
+from Industries.models import Industry, IndustryCategory
+from Addresses.models import City, Province, RecipientAddress
+from Items.models import FirstItem, SecondItem
+from Services.models import Service
+from Scores.models import ServiceScore
+from Server.slug_resolver import slug_resolver
+
+from .models import (
+    Company,
+    CompanyFirstItem,
+    CompanySecondItem,
+    CompanyValidationStatus,
+    WorkDay,
+)
+from .serializers import CompanyFirstItemSerializer
+from .ratings import rebuild_company_ratings
+from .search import LikeSearchBackend, get_backend, normalize, tokenize
+from .availability import availability, minute_of_week, open_filter, workday_intervals
+
+
+
+
+class CompanyListTests(TestCase):
+    """
+    The company list nests validation status, workdays, items, city and province.
+    Its query count must stay the same no matter how many companies are listed,
+    and it is served in cursor-paginated pages.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user(
+            phone="09120000000",
+            username="employer",
+            email="employer@example.com",
+            user_type="OW",
+            full_name="Employer",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        cls.industry = Industry.objects.create(name="industry", slug="industry", category=category)
+        cls.province = Province.objects.create(name="province", slug="province")
+        cls.city = City.objects.create(name="city", slug="city", province=cls.province)
+        cls.first_item = FirstItem.objects.create(name="first", slug="first")
+        cls.second_item = SecondItem.objects.create(name="second", slug="second")
+
+    def create_companies(self, count):
+        for index in range(Company.objects.count(), Company.objects.count() + count):
+            company = Company.objects.create(
+                employer=self.employer,
+                industry=self.industry,
+                name=f"company-{index}",
+                city=self.city,
+                province=self.province,
+                is_validated=True,
+            )
+            CompanyValidationStatus.objects.create(company=company, validated_by=self.employer)
+            WorkDay.objects.create(
+                company=company,
+                day_of_week=WorkDay.DayOfWeek.MONDAY,
+                open_time=time(9),
+                close_time=time(17),
+            )
+            CompanyFirstItem.objects.create(compay=company, first_item=self.first_item)
+            CompanySecondItem.objects.create(compay=company, second_item=self.second_item)
+
+    def test_list_query_count_is_constant(self):
+        client = APIClient()
+
+        self.create_companies(2)
+        # companies (+ joins), workdays, first items, second items.
+        with self.assertNumQueries(4):
+            response = client.get("/companies/company/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        self.create_companies(8)
+        with self.assertNumQueries(4):
+            response = client.get("/companies/company/")
+        results = response.data["results"]
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0]["city"]["province"]["slug"], "province")
+        self.assertEqual(results[0]["companies_first_item"][0]["first_item"]["slug"], "first")
+
+    def test_list_cursor_pagination(self):
+        client = APIClient()
+        self.create_companies(7)
+        expected = list(
+            Company.objects.order_by("-created_at", "-id").values_list("slug", flat=True)
+        )
+
+        seen = []
+        pages = []
+        url = "/companies/company/?page_size=3"
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            seen.extend(company["slug"] for company in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(page["results"]) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]["previous"])
+
+        # Walking back from the last page returns the middle page unchanged.
+        response = client.get(pages[-1]["previous"])
+        self.assertEqual(response.data["results"], pages[1]["results"])
+
+    def test_invalid_cursor(self):
+        response = APIClient().get("/companies/company/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+        # Well-formed, but with a key that is not a primary key.
+        position = {"t": "2024-01-01T00:00:00+00:00", "k": "abc", "r": 0}
+        token = base64.urlsafe_b64encode(json.dumps(position).encode("ascii")).decode("ascii")
+        response = APIClient().get(f"/companies/company/?cursor={token}")
+        self.assertEqual(response.status_code, 404)
+
+
+
+class CompanyRatingTests(TestCase):
+    """
+    The denormalized rating columns follow ServiceScore creates, updates and
+    deletes, and always agree with a full rebuild.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user(
+            phone="09120000001",
+            username="owner",
+            email="owner@example.com",
+            user_type="OW",
+            full_name="Owner",
+            password="password123",
+        )
+        cls.recipient = User.objects.create_user(
+            phone="09120000002",
+            username="recipient",
+            email="recipient@example.com",
+            user_type="SC",
+            full_name="Recipient",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        industry = Industry.objects.create(name="industry", slug="industry", category=category)
+        province = Province.objects.create(name="province", slug="province")
+        city = City.objects.create(name="city", slug="city", province=province)
+        cls.address = RecipientAddress.objects.create(
+            city=city, recipient=cls.recipient, title="home", address="street"
+        )
+        cls.company = Company.objects.create(
+            employer=cls.employer, industry=industry, name="rated", is_validated=True
+        )
+
+    def create_service(self):
+        return Service.objects.create(
+            company=self.company,
+            recipient=self.recipient,
+            recipient_address=self.address,
+            title="service",
+            phone="09120000002",
+            descriptions="description",
+            service_type=Service.ServiceType.IN_HOUSE_SERVICE,
+        )
+
+    def assertRating(self, count, quality, behavior, time):
+        company = Company.objects.get(pk=self.company.pk)
+        self.assertEqual(company.score_count, count)
+        if count == 0:
+            self.assertIsNone(company.avg_quality)
+            self.assertIsNone(company.overall_score)
+            return
+        self.assertAlmostEqual(company.avg_quality, quality)
+        self.assertAlmostEqual(company.avg_behavior, behavior)
+        self.assertAlmostEqual(company.avg_time, time)
+        self.assertAlmostEqual(company.overall_score, (quality + behavior + time) / 3)
+
+    def test_incremental_updates(self):
+        first = ServiceScore.objects.create(service=self.create_service(), quality=8, behavior=6, time=4)
+        self.assertRating(1, 8, 6, 4)
+
+        second = ServiceScore.objects.create(service=self.create_service(), quality=4, behavior=10, time=7)
+        self.assertRating(2, 6, 8, 5.5)
+
+        second = ServiceScore.objects.get(pk=second.pk)
+        second.quality = 10
+        with self.assertNumQueries(2):  # the score row and the company row.
+            second.save()
+        self.assertRating(2, 9, 8, 5.5)
+
+        first.delete()
+        self.assertRating(1, 10, 10, 7)
+
+        second.delete()
+        self.assertRating(0, None, None, None)
+
+    def test_deferred_scores(self):
+        score = ServiceScore.objects.create(service=self.create_service(), quality=8, behavior=6, time=4)
+        ServiceScore.objects.create(service=self.create_service(), quality=4, behavior=10, time=7)
+
+        deferred = ServiceScore.objects.only("quality").get(pk=score.pk)
+        deferred.quality = 10
+        deferred.save()
+        self.assertRating(2, 7, 8, 5.5)
+
+        ServiceScore.objects.only("pk").get(pk=score.pk).delete()
+        self.assertRating(1, 4, 10, 7)
+
+    def test_rebuild_matches_incremental(self):
+        for quality, behavior, time in [(1, 2, 3), (9, 9, 9), (5, 7, 2)]:
+            ServiceScore.objects.create(
+                service=self.create_service(), quality=quality, behavior=behavior, time=time
+            )
+        incremental = Company.objects.values(
+            'avg_quality', 'avg_behavior', 'avg_time', 'score_count', 'overall_score'
+        ).get(pk=self.company.pk)
+
+        Company.objects.update(avg_quality=None, score_count=0, overall_score=None)
+        self.assertEqual(rebuild_company_ratings(), 1)
+        rebuilt = Company.objects.values(*incremental).get(pk=self.company.pk)
+        for column, value in incremental.items():
+            self.assertAlmostEqual(rebuilt[column], value)
+
+
+
+class CompanySearchTests(TestCase):
+    """
+    /companies/company/search/ matches Persian text regardless of Arabic
+    character variants and ZWNJ usage, and ranks ties by rating.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user(
+            phone="09120000003",
+            username="searcher",
+            email="searcher@example.com",
+            user_type="OW",
+            full_name="Searcher",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        cls.industry = Industry.objects.create(name="تاسیسات", slug="facilities", category=category)
+        province = Province.objects.create(name="تهران", slug="tehran-province")
+        cls.city = City.objects.create(name="تهران", slug="tehran", province=province)
+
+    def create_company(self, name, description="", **kwargs):
+        return Company.objects.create(
+            employer=self.employer,
+            industry=self.industry,
+            name=name,
+            slug=name,
+            description=description,
+            city=self.city,
+            is_validated=True,
+            **kwargs
+        )
+
+    def search(self, text):
+        response = APIClient().get("/companies/company/search/", {"q": text})
+        self.assertEqual(response.status_code, 200)
+        return [company["name"] for company in response.data["results"]]
+
+    def test_normalization(self):
+        self.assertEqual(normalize("\u0643\u064a\u0641"), "\u06a9\u06cc\u0641")
+        self.assertEqual(normalize("\u06f1\u06f2\u06f3"), "123")
+        self.assertEqual(
+            tokenize("\u0645\u06cc\u200c\u0631\u0648\u0645"),
+            ["\u0645\u06cc\u0631\u0648\u0645", "\u0645\u06cc", "\u0631\u0648\u0645"],
+        )
+
+    def test_search_matches_variants(self):
+        # "کیان" typed with Arabic kaf and yeh still finds the Persian spelling.
+        self.create_company("\u06a9\u06cc\u0627\u0646", "\u062e\u062f\u0645\u0627\u062a\u200c\u0631\u0633\u0627\u0646")
+        self.create_company("other")
+        self.assertEqual(self.search("\u0643\u064a\u0627\u0646"), ["\u06a9\u06cc\u0627\u0646"])
+        # The ZWNJ word matches written joined, with a space, or with the ZWNJ.
+        self.assertEqual(self.search("\u062e\u062f\u0645\u0627\u062a\u0631\u0633\u0627\u0646"), ["\u06a9\u06cc\u0627\u0646"])
+        self.assertEqual(self.search("\u062e\u062f\u0645\u0627\u062a \u0631\u0633\u0627\u0646"), ["\u06a9\u06cc\u0627\u0646"])
+        # Prefixes and related names are searchable too.
+        self.assertEqual(self.search("\u06a9\u06cc"), ["\u06a9\u06cc\u0627\u0646"])
+        self.assertEqual(len(self.search("\u062a\u0647\u0631\u0627\u0646")), 2)
+        self.assertEqual(self.search(""), [])
+
+    def test_rating_breaks_ties(self):
+        low = self.create_company("alpha-low")
+        high = self.create_company("alpha-high")
+        Company.objects.filter(pk=low.pk).update(overall_score=2)
+        Company.objects.filter(pk=high.pk).update(overall_score=9)
+        self.assertEqual(self.search("alpha"), ["alpha-high", "alpha-low"])
+
+    def test_index_follows_changes(self):
+        company = self.create_company("beta")
+        self.industry.name = "plumbing"
+        self.industry.save()
+        self.assertEqual(self.search("plumb"), ["beta"])
+
+        company.name = "gamma"
+        company.save()
+        self.assertEqual(self.search("beta"), [])
+        self.assertEqual(self.search("gamma"), ["gamma"])
+
+        company.delete()
+        self.assertEqual(self.search("gamma"), [])
+
+    def test_unindexed_databases_fall_back_to_like(self):
+        with mock.patch.object(connection, "vendor", "mysql"):
+            self.assertIsInstance(get_backend(), LikeSearchBackend)
+            self.create_company("delta-low", overall_score=2)  # saving does not fail
+            high = self.create_company("delta-high", overall_score=9)
+            high.name = "delta-top"
+            high.save()
+            self.assertEqual(self.search("delta"), ["delta-top", "delta-low"])
+            self.assertEqual(self.search("delta تهران"), ["delta-top", "delta-low"])
+            self.assertEqual(self.search("epsilon"), [])
+
+
+
+class CompanyAvailabilityTests(TestCase):
+    """
+    The open_now / open_at filters are answered from the precomputed weekly
+    availability index, which follows WorkDay changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user(
+            phone="09120000004",
+            username="scheduler",
+            email="scheduler@example.com",
+            user_type="OW",
+            full_name="Scheduler",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        cls.industry = Industry.objects.create(name="industry", slug="industry", category=category)
+
+    def create_company(self, name, *workdays):
+        company = Company.objects.create(
+            employer=self.employer, industry=self.industry, name=name, is_validated=True
+        )
+        for day_of_week, open_time, close_time in workdays:
+            WorkDay.objects.create(
+                company=company, day_of_week=day_of_week, open_time=open_time, close_time=close_time
+            )
+        return company
+
+    def open_at(self, moment):
+        response = APIClient().get("/companies/company/", {"open_at": moment.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return sorted(company["name"] for company in response.data["results"])
+
+    def test_intervals(self):
+        self.assertEqual(workday_intervals("TU", time(9), time(17)), [(1440 + 540, 1440 + 1020)])
+        # Overnight shift on Sunday wraps around to Monday morning.
+        self.assertEqual(workday_intervals("SU", time(22), time(2)), [(9960, 10080), (0, 120)])
+        self.assertEqual(workday_intervals("MO", None, None, is_closed=True), [])
+        # 2026-10-19 is a Monday.
+        self.assertEqual(minute_of_week(datetime(2026, 10, 19, 1, 30, tzinfo=timezone.utc)), 90)
+
+    def test_open_at_filter(self):
+        self.create_company("day", ("MO", time(9), time(17)))
+        self.create_company("night", ("SU", time(22), time(2)))
+        self.create_company("closed")
+
+        self.assertEqual(self.open_at(datetime(2026, 10, 19, 10, tzinfo=timezone.utc)), ["day"])
+        self.assertEqual(self.open_at(datetime(2026, 10, 19, 1, tzinfo=timezone.utc)), ["night"])
+        self.assertEqual(self.open_at(datetime(2026, 10, 19, 17, tzinfo=timezone.utc)), [])
+        # The filter agrees with the index.
+        sunday_night = datetime(2026, 10, 18, 23, tzinfo=timezone.utc)
+        self.assertEqual(self.open_at(sunday_night), ["night"])
+        self.assertEqual(
+            set(Company.objects.filter(open_filter(sunday_night)).values_list("pk", flat=True)),
+            availability.open_company_ids(minute_of_week(sunday_night)),
+        )
+
+        response = APIClient().get("/companies/company/", {"open_at": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_workday_changes(self):
+        company = self.create_company("shop", ("WE", time(8), time(12)))
+        wednesday_noon = datetime(2026, 10, 21, 12, 30, tzinfo=timezone.utc)
+        self.assertEqual(self.open_at(wednesday_noon), [])
+
+        workday = company.workdays.get()
+        workday.close_time = time(13)
+        workday.save()
+        self.assertEqual(self.open_at(wednesday_noon), ["shop"])
+        self.assertEqual(availability.open_company_ids(minute_of_week(wednesday_noon)), {company.pk})
+        # Later lookups reuse the index without touching WorkDay.
+        with self.assertNumQueries(0):
+            availability.open_company_ids(minute_of_week(wednesday_noon))
+
+        workday.delete()
+        self.assertEqual(self.open_at(wednesday_noon), [])
+
+    def test_serializer_is_open_now(self):
+        now = minute_of_week()
+        day = WorkDay.DayOfWeek.values[now // (24 * 60)]
+        # Equal open and close times mean a 24 hour shift.
+        self.create_company("open", (day, time(0), time(0)))
+        response = APIClient().get("/companies/company/", {"open_now": "true"})
+        self.assertEqual([company["name"] for company in response.data["results"]], ["open"])
+        self.assertTrue(response.data["results"][0]["workdays"][0]["is_open_now"])
+
+
+
+class SlugResolverTests(TestCase):
+    """
+    Write serializers resolve slugs through the shared LRU slug cache, which
+    batches misses into one query and forgets slugs that change or disappear.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user(
+            phone="09120000005",
+            username="resolver",
+            email="resolver@example.com",
+            user_type="OW",
+            full_name="Resolver",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        cls.industry = Industry.objects.create(name="industry", slug="industry", category=category)
+        cls.items = [FirstItem.objects.create(name=f"item-{index}", slug=f"item-{index}") for index in range(3)]
+
+    def setUp(self):
+        slug_resolver.clear()
+
+    def test_resolve_caches_existing_rows(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(slug_resolver.resolve(FirstItem, "item-0"), self.items[0].pk)
+            self.assertIsNone(slug_resolver.resolve(FirstItem, "missing"))
+        with self.assertNumQueries(0):
+            self.assertEqual(slug_resolver.resolve(FirstItem, "item-0"), self.items[0].pk)
+
+    def test_registered_fields_are_cached_and_tracked(self):
+        company = Company.objects.create(
+            employer=self.employer, industry=self.industry, name="flags", slug="flags"
+        )
+        self.assertEqual(slug_resolver.lookup(Company, "flags")["is_validated"], company.is_validated)
+
+        company.name = "renamed"
+        company.save()
+        with self.assertNumQueries(0):
+            slug_resolver.lookup(Company, "flags")
+
+        company.is_off_season = not company.is_off_season
+        company.save()
+        self.assertEqual(slug_resolver.lookup(Company, "flags")["is_off_season"], company.is_off_season)
+
+    def test_slug_changes_and_deletes_invalidate(self):
+        item = FirstItem.objects.get(slug="item-0")
+        self.assertEqual(slug_resolver.resolve(FirstItem, "item-0"), item.pk)
+
+        # Saving without touching the slug keeps the cache warm.
+        item.name = "renamed"
+        item.save()
+        with self.assertNumQueries(0):
+            slug_resolver.resolve(FirstItem, "item-0")
+
+        item.slug = "item-renamed"
+        item.save()
+        self.assertIsNone(slug_resolver.resolve(FirstItem, "item-0"))
+        self.assertEqual(slug_resolver.resolve(FirstItem, "item-renamed"), item.pk)
+
+        item.delete()
+        self.assertIsNone(slug_resolver.resolve(FirstItem, "item-renamed"))
+
+    def test_lru_is_bounded(self):
+        with self.settings(SLUG_RESOLVER_MAX_SIZE=2):
+            for slug in ("item-0", "item-1", "item-2"):
+                slug_resolver.resolve(FirstItem, slug)
+            with self.assertNumQueries(1):
+                slug_resolver.resolve(FirstItem, "item-0")
+
+    def test_serializer_uses_resolver(self):
+        company = Company.objects.create(
+            employer=self.employer, industry=self.industry, name="resolved", slug="resolved"
+        )
+        slug_resolver.resolve(Company, "resolved")
+        slug_resolver.resolve(FirstItem, "item-1")
+
+        serializer = CompanyFirstItemSerializer(
+            data={"company_slug": "resolved", "first_item_slug": "item-1"}
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        instance = serializer.save()
+        self.assertEqual((instance.compay_id, instance.first_item_id), (company.pk, self.items[1].pk))
 
-# Create your tests here.
+        serializer = CompanyFirstItemSerializer(data={"company_slug": "nope", "first_item_slug": "item-1"})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("company_slug", serializer.errors)
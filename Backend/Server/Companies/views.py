@@ -1,4 +1,5 @@
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -32,15 +33,31 @@ from .permissions import (
     IsCompanyEmployeeOwnerOrAdmin
 )
 
+from .search import search_company_ids
+from .availability import open_filter
 
+from Server.pagination import PaginatedViewSetMixin
 
-class CompanyViewSet(viewsets.ViewSet):
+
+
+class CompanyViewSet(PaginatedViewSetMixin, viewsets.ViewSet):
     """
     A ViewSet for listing, retrieving, creating, updating, and deleting Company instances.
 
     - List: Admin users see all companies; other users see only validated companies.
+      Cursor paginated, newest first (?cursor=<token>&page_size=<n>).
+      ?open_now=true keeps companies open right now, ?open_at=<ISO timestamp>
+      those open at that moment (an EXISTS over their WorkDay rows, see
+      Companies.availability.open_filter).
     - Retrieve: Returns the company by its slug. Non-validated companies are accessible only to staff.
     - Create, Update, Destroy: Restricted to admin users or users with user_type 'OW'.
+
+    - Search: GET /companies/search/?q=<text>&page_size=<n>
+      Full-text search over name, description, industry and city, ranked by
+      relevance blended with the company's overall score.
+
+    Reads go through CompanySerializer's query plan, so the query count does not
+    grow with the number of companies listed.
     """
     # permission_classes = [IsAdminOrOwner]
     lookup_field = 'slug'
@@ -50,11 +67,39 @@ class CompanyViewSet(viewsets.ViewSet):
             queryset = Company.objects.all()
         else:
             queryset = Company.objects.filter(is_validated=True)
-        serializer = CompanySerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+
+        open_at = request.query_params.get('open_at')
+        if open_at:
+            try:
+                moment = parse_datetime(open_at)
+            except ValueError:
+                moment = None
+            if moment is None:
+                return Response(
+                    {'error': 'open_at must be an ISO 8601 timestamp.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(open_filter(moment))
+        elif request.query_params.get('open_now', '').lower() in ('true', '1'):
+            queryset = queryset.filter(open_filter())
+
+        page = self.paginate_queryset(CompanySerializer.setup_eager_loading(queryset))
+        serializer = CompanySerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+    def search(self, request):
+        text = request.query_params.get('q', '')
+        limit = self.paginator.get_page_size(request)
+        ids = search_company_ids(text, limit=limit, validated_only=not request.user.is_staff)
+        queryset = CompanySerializer.setup_eager_loading(Company.objects.filter(pk__in=ids))
+        companies = {company.pk: company for company in queryset}
+        ranked = [companies[pk] for pk in ids if pk in companies]
+        serializer = CompanySerializer(ranked, many=True, context={'request': request})
+        return Response({'results': serializer.data})
 
     def retrieve(self, request, slug):
-        company = get_object_or_404(Company, slug=slug)
+        queryset = CompanySerializer.setup_eager_loading(Company.objects.all())
+        company = get_object_or_404(queryset, slug=slug)
         if company.is_validated or request.user.is_staff:
             serializer = CompanySerializer(company, context={'request': request})
             return Response(serializer.data)
@@ -5,3 +5,6 @@ class IndustriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Industries'
     verbose_name = 'صنعت ها'
+
+    def ready(self):
+        import Industries.caches
@@ -0,0 +1,14 @@
+from Server.reference_cache import ReferenceCache
+from Server.slug_resolver import slug_resolver
+
+from .models import IndustryCategory, Industry
+
+
+
+
+# Created at app load (IndustriesConfig.ready) so that every save or delete,
+# from any entry point, bumps the version.
+industry_category_list_cache = ReferenceCache('industry-categories', IndustryCategory)
+industry_list_cache = ReferenceCache('industries', Industry, IndustryCategory)
+
+slug_resolver.register(Industry)
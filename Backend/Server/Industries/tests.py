@@ -1,3 +1,35 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Users.models import User
+
+from .models import Industry, IndustryCategory
+
+
+
+
+class IndustryListCacheTests(TestCase):
+    """
+    The cached industry list nests each industry's category, so changing a
+    category publishes a new version of it.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            phone="09120000001", username="reader", email="reader@example.com",
+            user_type="SC", full_name="Reader", password="password123",
+        ))
+        self.category = IndustryCategory.objects.create(name="category", slug="category")
+        Industry.objects.create(name="industry", slug="industry", category=self.category)
+
+    def test_category_changes_publish_a_new_version(self):
+        etag = self.client.get("/industries/industries/")["ETag"]
+
+        self.category.name = "renamed"
+        self.category.save()
+        response = self.client.get("/industries/industries/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["category"]["name"], "renamed")
@@ -5,6 +5,7 @@ from django.shortcuts import get_object_or_404
 
 from .models import IndustryCategory, Industry
 from .serializers import IndustryCategorySerializer, IndustrySerializer
+from .caches import industry_category_list_cache, industry_list_cache
 
 
 
@@ -15,9 +16,10 @@ class IndustryCategoryViewSet(viewsets.ViewSet):
     lookup_field = 'slug'
 
     def list(self, request, *args, **kwargs):
-        queryset = IndustryCategory.objects.all()
-        serializer = IndustryCategorySerializer(queryset, many=True)
-        return Response(serializer.data)
+        return industry_category_list_cache.response(
+            request,
+            lambda: IndustryCategorySerializer(IndustryCategory.objects.all(), many=True).data
+        )
 
     def retrieve(self, request, slug, *args, **kwargs):
         category = get_object_or_404(IndustryCategory, slug=slug)
@@ -69,9 +71,10 @@ class IndustryViewSet(viewsets.ViewSet):
     lookup_field = 'slug'
 
     def list(self, request, *args, **kwargs):
-        queryset = Industry.objects.all()
-        serializer = IndustrySerializer(queryset, many=True)
-        return Response(serializer.data)
+        return industry_list_cache.response(
+            request,
+            lambda: IndustrySerializer(Industry.objects.all(), many=True).data
+        )
 
     def retrieve(self, request, slug, *args, **kwargs):
         industry = get_object_or_404(Industry, slug=slug)
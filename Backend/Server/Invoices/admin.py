@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils import timezone
 from django.utils.html import format_html
-from .models import Invoice, InvoiceItem
+from .models import Invoice, InvoiceItem, InvoiceRun, InvoiceRunShard
 
 
 
@@ -79,3 +79,22 @@ class InvoiceItemAdmin(admin.ModelAdmin):
     search_fields = ('invoice__company__name', 'service__title')
     list_filter = ('invoice__company', 'created_at')
     readonly_fields = ('created_at',)
+
+
+
+class InvoiceRunShardInline(admin.TabularInline):
+    model = InvoiceRunShard
+    extra = 0
+    fields = ('index', 'status', 'last_company_id', 'invoice_count', 'error', 'updated_at')
+    readonly_fields = fields
+
+
+@admin.register(InvoiceRun)
+class InvoiceRunAdmin(admin.ModelAdmin):
+    list_display = ('month', 'year', 'status', 'shard_count', 'invoice_count', 'created_at', 'finished_at')
+    list_filter = ('status', 'year')
+    readonly_fields = (
+        'year', 'month', 'shard_count', 'deadline', 'status', 'invoice_count',
+        'created_at', 'updated_at', 'finished_at',
+    )
+    inlines = [InvoiceRunShardInline]
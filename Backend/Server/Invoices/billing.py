@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Mod
+from django.utils import timezone
+
+from Services.models import Service
+
+from .models import Invoice, InvoiceItem, InvoiceRun, InvoiceRunShard
+
+
+
+
+DEFAULT_DEADLINE_DAYS = 30
+
+
+class InvoiceConflict(Exception):
+    """
+    Some of a company's services were invoiced by someone else while its
+    batch was being written; the batch was rolled back.
+    """
+
+
+
+# -------------------------------
+# Billing periods
+# -------------------------------
+
+def previous_month(today=None):
+    """
+    (year, month) of the month before `today` (default: today).
+    """
+    today = today or timezone.localdate()
+    if today.month == 1:
+        return today.year - 1, 12
+    return today.year, today.month - 1
+
+
+def month_bounds(year, month):
+    """
+    Aware [start, end) datetimes of a calendar month in the current time zone,
+    so the created_at filter is an index range scan rather than year/month
+    extraction on every row.
+    """
+    tz = timezone.get_current_timezone()
+    start = datetime(year, month, 1, tzinfo=tz)
+    if month == 12:
+        end = datetime(year + 1, 1, 1, tzinfo=tz)
+    else:
+        end = datetime(year, month + 1, 1, tzinfo=tz)
+    return start, end
+
+
+def uninvoiced_services(year=None, month=None):
+    """
+    Services not invoiced yet; limited to one month when year/month are given.
+    """
+    services = Service.objects.filter(is_invoiced=False)
+    if year is not None and month is not None:
+        start, end = month_bounds(year, month)
+        services = services.filter(created_at__gte=start, created_at__lt=end)
+    return services
+
+
+def pending_companies(services):
+    """
+    One grouped query: per company with uninvoiced services, how many there are
+    and what they will cost at the company's industry price.
+    """
+    return (
+        services
+        .values('company_id')
+        .annotate(
+            service_count=Count('id'),
+            expected_total=Sum('company__industry__price_per_service'),
+        )
+        .order_by('company_id')
+    )
+
+
+
+# -------------------------------
+# Invoice generation
+# -------------------------------
+
+def invoice_company(company_id, services, deadline=None, batch_size=1000):
+    """
+    Bill every service in `services` belonging to `company_id` on one new invoice.
+
+    Runs in a single transaction, with a fixed number of queries however many
+    services there are: lock and read (service id, industry price) pairs,
+    insert the invoice, bulk-insert its items, flag the services with one
+    UPDATE and sum the total in SQL. If any service turns out to be invoiced
+    already, everything is rolled back with InvoiceConflict, so a company can
+    never be billed twice for the same service.
+
+    Returns the invoice, or None when there is nothing to bill.
+    """
+    deadline = deadline or timezone.now() + timedelta(days=DEFAULT_DEADLINE_DAYS)
+
+    with transaction.atomic():
+        rows = list(
+            services
+            .filter(company_id=company_id, is_invoiced=False)
+            .select_for_update(of=('self',))
+            .values_list('id', 'company__industry__price_per_service')
+        )
+        if not rows:
+            return None
+
+        invoice = Invoice.objects.create(company_id=company_id, deadline=deadline)
+        InvoiceItem.objects.bulk_create(
+            [
+                InvoiceItem(invoice=invoice, service_id=service_id, amount=price or 0)
+                for service_id, price in rows
+            ],
+            batch_size=batch_size,
+        )
+
+        # The rows are locked, so the same filter flags exactly what was read;
+        # a different count means another run got there first.
+        flagged = services.filter(company_id=company_id, is_invoiced=False).update(
+            is_invoiced=True, updated_at=timezone.now()
+        )
+        if flagged != len(rows):
+            raise InvoiceConflict(f"Services of company {company_id} were invoiced concurrently.")
+
+        invoice.calculate_total()
+    return invoice
+
+
+def generate_invoices(services, deadline=None, batch_size=1000):
+    """
+    Invoice every company with services in `services`, one transaction per
+    company. Yields (company_id, invoice) pairs; the invoice is None when a
+    company's batch was skipped because of a concurrent run.
+    """
+    # Materialized up front: no read cursor stays open across the writes.
+    for company in list(pending_companies(services)):
+        try:
+            invoice = invoice_company(company['company_id'], services, deadline, batch_size)
+        except InvoiceConflict:
+            invoice = None
+        yield company['company_id'], invoice
+
+
+
+# -------------------------------
+# Sharded runs
+# -------------------------------
+
+def start_invoice_run(year, month, shard_count, deadline):
+    """
+    Get or create the checkpoint of a month's run, with one row per shard.
+    The shard count and deadline of an existing run are kept, so a resumed
+    run splits companies exactly like the interrupted one.
+    """
+    run, created = InvoiceRun.objects.get_or_create(
+        year=year, month=month, defaults={'shard_count': shard_count, 'deadline': deadline}
+    )
+    if not created and run.status == InvoiceRun.RunStatusChoices.FAILED:
+        run.status = InvoiceRun.RunStatusChoices.RUNNING
+        run.save(update_fields=['status', 'updated_at'])
+    existing = set(run.shards.values_list('index', flat=True))
+    InvoiceRunShard.objects.bulk_create(
+        [InvoiceRunShard(run=run, index=index) for index in range(run.shard_count) if index not in existing],
+        ignore_conflicts=True,
+    )
+    return run
+
+
+def bill_shard(shard, batch_size=1000):
+    """
+    Invoice the companies of one shard, in ascending id order, starting after
+    the shard's checkpoint. Each company's invoice and the checkpoint move are
+    committed together. Returns the number of invoices created.
+    """
+    run = shard.run
+    services = (
+        uninvoiced_services(run.year, run.month)
+        .alias(shard=Mod('company_id', run.shard_count))
+        .filter(shard=shard.index)
+    )
+    created = 0
+    for company in list(pending_companies(services.filter(company_id__gt=shard.last_company_id))):
+        company_id = company['company_id']
+        with transaction.atomic():
+            try:
+                invoice = invoice_company(company_id, services, run.deadline, batch_size)
+            except InvoiceConflict:
+                invoice = None
+            InvoiceRunShard.objects.filter(pk=shard.pk).update(
+                last_company_id=company_id,
+                invoice_count=F('invoice_count') + int(invoice is not None),
+                updated_at=timezone.now(),
+            )
+        created += int(invoice is not None)
+
+    InvoiceRunShard.objects.filter(pk=shard.pk).update(
+        status=InvoiceRunShard.ShardStatusChoices.DONE, error='', updated_at=timezone.now()
+    )
+    return created
+
+
+def finish_invoice_run(run):
+    """
+    Roll the shard counters up into the run and mark it completed, or failed
+    if any shard did not finish.
+    """
+    shards = run.shards.aggregate(
+        invoices=Coalesce(Sum('invoice_count'), 0),
+        unfinished=Count('id', filter=~Q(status=InvoiceRunShard.ShardStatusChoices.DONE)),
+    )
+    run.invoice_count = shards['invoices']
+    if shards['unfinished']:
+        run.status = InvoiceRun.RunStatusChoices.FAILED
+    else:
+        run.status = InvoiceRun.RunStatusChoices.COMPLETED
+        run.finished_at = timezone.now()
+    run.save(update_fields=['invoice_count', 'status', 'finished_at', 'updated_at'])
+    return run
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Invoices.billing import (
+    DEFAULT_DEADLINE_DAYS,
+    generate_invoices,
+    previous_month,
+    uninvoiced_services,
+)
+from Invoices.tasks import generate_month_invoices
+
+
+
+class Command(BaseCommand):
+    help = "Generate monthly invoices for each company based on non-invoiced services."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Billing year (default: last month's).")
+        parser.add_argument('--month', type=int, help="Billing month, 1-12 (default: last month).")
+        parser.add_argument(
+            '--deadline-days',
+            type=int,
+            default=DEFAULT_DEADLINE_DAYS,
+            help="Days from now until the invoices are due."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of invoice items written per bulk insert."
+        )
+        parser.add_argument(
+            '--celery',
+            action='store_true',
+            help="Dispatch the sharded, resumable Celery job instead of billing in this process."
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            help="Number of shards for --celery (default: settings.INVOICE_SHARD_COUNT)."
+        )
+
+    def handle(self, *args, **options):
+        invoice_year, invoice_month = previous_month()
+        if options['year'] or options['month']:
+            if not (options['year'] and options['month']):
+                raise CommandError("--year and --month must be given together.")
+            invoice_year, invoice_month = options['year'], options['month']
+            if not 1 <= invoice_month <= 12:
+                raise CommandError("--month must be between 1 and 12.")
+
+        self.stdout.write(f"Generating invoices for {invoice_month}/{invoice_year}")
+
+        if options['celery']:
+            result = generate_month_invoices.delay(
+                invoice_year, invoice_month, options['shards'], options['deadline_days']
+            )
+            self.stdout.write(f"Dispatched sharded invoice generation (task {result.id}).")
+            return
+
+        # Set a deadline relative to now (adjust with --deadline-days).
+        deadline = timezone.now() + timedelta(days=options['deadline_days'])
+        services = uninvoiced_services(invoice_year, invoice_month)
+
+        created = 0
+        for company_id, invoice in generate_invoices(services, deadline, options['batch_size']):
+            if invoice is None:
+                self.stdout.write(f"Skipped company #{company_id}: its services were invoiced concurrently.")
+                continue
+            created += 1
+            self.stdout.write(
+                f"Created Invoice #{invoice.id} for company #{company_id} with total amount "
+                f"{invoice.total_amount} and deadline {invoice.deadline.strftime('%Y-%m-%d %H:%M')}."
+            )
+
+        self.stdout.write(f"Invoice generation completed; {created} invoices created.")
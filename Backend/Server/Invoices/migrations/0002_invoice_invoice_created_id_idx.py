@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Companies', '0003_company_company_created_id_idx'),
+        ('Invoices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-created_at', '-id'], name='invoice_created_id_idx'),
+        ),
+    ]
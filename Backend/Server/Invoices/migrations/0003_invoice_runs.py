@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-17 17:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Invoices', '0002_invoice_invoice_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='سال')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='ماه')),
+                ('shard_count', models.PositiveSmallIntegerField(verbose_name='تعداد بخش ها')),
+                ('deadline', models.DateTimeField(verbose_name='مهلت پرداخت')),
+                ('status', models.CharField(choices=[('RU', 'در حال اجرا'), ('CO', 'تکمیل شده'), ('FA', 'ناموفق')], default='RU', max_length=2, verbose_name='وضعیت')),
+                ('invoice_count', models.PositiveIntegerField(default=0, verbose_name='تعداد قبض ها')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ شروع')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ به\u200cروزرسانی')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='تاریخ پایان')),
+            ],
+            options={
+                'verbose_name': 'اجرای صدور قبض',
+                'verbose_name_plural': 'اجراهای صدور قبض',
+                'constraints': [models.UniqueConstraint(fields=('year', 'month'), name='invoice_run_unique_month')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceRunShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField(verbose_name='شماره بخش')),
+                ('status', models.CharField(choices=[('PE', 'در انتظار'), ('DO', 'انجام شده'), ('FA', 'ناموفق')], default='PE', max_length=2, verbose_name='وضعیت')),
+                ('last_company_id', models.BigIntegerField(default=0, verbose_name='آخرین شرکت پردازش شده')),
+                ('invoice_count', models.PositiveIntegerField(default=0, verbose_name='تعداد قبض ها')),
+                ('error', models.TextField(blank=True, default='', verbose_name='خطا')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاریخ به\u200cروزرسانی')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='Invoices.invoicerun', verbose_name='اجرا')),
+            ],
+            options={
+                'verbose_name': 'بخش اجرای صدور قبض',
+                'verbose_name_plural': 'بخش های اجرای صدور قبض',
+                'constraints': [models.UniqueConstraint(fields=('run', 'index'), name='invoice_run_shard_unique_index')],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from Companies.models import Company
 from Services.models import Service
@@ -39,11 +41,24 @@ class Invoice(models.Model):
     class Meta:
         verbose_name = "قبض"
         verbose_name_plural = "قبض ها"
+        indexes = [
+            # Keyset pagination: ORDER BY created_at DESC, id DESC.
+            models.Index(fields=['-created_at', '-id'], name='invoice_created_id_idx'),
+        ]
     
     def calculate_total(self):
-        total = sum(item.amount for item in self.items.all())
-        self.total_amount = total
-        self.save(update_fields=['total_amount'])
+        """
+        Set total_amount to the sum of the items, computed by the database in a
+        single UPDATE rather than by loading every item.
+        """
+        total = InvoiceItem.objects.filter(invoice=OuterRef('pk')).values('invoice').annotate(
+            total=Sum('amount')
+        ).values('total')
+        Invoice.objects.filter(pk=self.pk).update(
+            total_amount=Coalesce(Subquery(total), Value(0)),
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['total_amount', 'updated_at'])
     
     def update_deadline_status(self):
         """
@@ -99,3 +114,83 @@ class InvoiceItem(models.Model):
     
     def __str__(self):
         return f"{self.service.title} for {self.invoice.company.name} - {self.amount}"
+
+
+
+class InvoiceRun(models.Model):
+    """
+    Checkpoint of one month's sharded invoice generation (see Invoices.tasks).
+    """
+
+    class RunStatusChoices(models.TextChoices):
+        RUNNING = 'RU', 'در حال اجرا'
+        COMPLETED = 'CO', 'تکمیل شده'
+        FAILED = 'FA', 'ناموفق'
+
+    year = models.PositiveSmallIntegerField(verbose_name="سال")
+    month = models.PositiveSmallIntegerField(verbose_name="ماه")
+    shard_count = models.PositiveSmallIntegerField(verbose_name="تعداد بخش ها")
+    deadline = models.DateTimeField(verbose_name="مهلت پرداخت")
+
+    status = models.CharField(
+        max_length=2,
+        choices=RunStatusChoices.choices,
+        default=RunStatusChoices.RUNNING,
+        verbose_name="وضعیت"
+    )
+    invoice_count = models.PositiveIntegerField(default=0, verbose_name="تعداد قبض ها")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ شروع")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ به‌روزرسانی")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ پایان")
+
+    class Meta:
+        verbose_name = "اجرای صدور قبض"
+        verbose_name_plural = "اجراهای صدور قبض"
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='invoice_run_unique_month'),
+        ]
+
+    def __str__(self):
+        return f"Invoice run {self.month}/{self.year} ({self.get_status_display()})"
+
+
+class InvoiceRunShard(models.Model):
+    """
+    Progress of one shard (companies with id % shard_count == index) of a run.
+    last_company_id is advanced in the same transaction as each company's
+    invoice, so a resumed shard starts right after the last billed company.
+    """
+
+    class ShardStatusChoices(models.TextChoices):
+        PENDING = 'PE', 'در انتظار'
+        DONE = 'DO', 'انجام شده'
+        FAILED = 'FA', 'ناموفق'
+
+    run = models.ForeignKey(
+        InvoiceRun,
+        on_delete=models.CASCADE,
+        related_name='shards',
+        verbose_name="اجرا"
+    )
+    index = models.PositiveSmallIntegerField(verbose_name="شماره بخش")
+    status = models.CharField(
+        max_length=2,
+        choices=ShardStatusChoices.choices,
+        default=ShardStatusChoices.PENDING,
+        verbose_name="وضعیت"
+    )
+    last_company_id = models.BigIntegerField(default=0, verbose_name="آخرین شرکت پردازش شده")
+    invoice_count = models.PositiveIntegerField(default=0, verbose_name="تعداد قبض ها")
+    error = models.TextField(blank=True, default='', verbose_name="خطا")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ به‌روزرسانی")
+
+    class Meta:
+        verbose_name = "بخش اجرای صدور قبض"
+        verbose_name_plural = "بخش های اجرای صدور قبض"
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'index'], name='invoice_run_shard_unique_index'),
+        ]
+
+    def __str__(self):
+        return f"Shard {self.index} of {self.run}"
@@ -4,6 +4,7 @@ from datetime import timedelta
 from rest_framework import serializers
 
 from .models import InvoiceItem, Invoice
+from .billing import InvoiceConflict, invoice_company
 from Companies.models import Company
 from Services.models import Service
 
@@ -65,39 +66,23 @@ class InvoiceSerializer(serializers.ModelSerializer):
           2. Use the provided company (populated during validation).
           3. Retrieve all Service objects for that Company where is_invoiced is False.
           4. Set a deadline 30 days from now.
-          5. Create an Invoice and create an InvoiceItem for each pending service.
-          6. Mark each service as invoiced.
-          7. Calculate and update the total amount of the invoice.
+          5. Create an Invoice, bulk-create an InvoiceItem for each pending service,
+             mark the services as invoiced and total the invoice, atomically.
         """
         # Remove company_slug as it is not part of the model.
         validated_data.pop('company_slug', None)
         company = validated_data.get('company')
 
-        # Retrieve all pending services for this company.
+        # Bill all pending services of this company in one transaction,
+        # with a fixed number of queries (see Invoices.billing).
         services = Service.objects.filter(company=company, is_invoiced=False)
-        if not services.exists():
-            raise serializers.ValidationError("No pending services available for invoicing.")
-
-        # Set a deadline 30 days from now.
         deadline = timezone.now() + timedelta(days=30)
-
-        # Create the Invoice instance.
-        invoice = Invoice.objects.create(
-            company=company,
-            deadline=deadline
-        )
-
-        # For each pending service, create an InvoiceItem and mark the service as invoiced.
-        for service in services:
-            InvoiceItem.objects.create(
-                invoice=invoice,
-                service=service
-            )
-            service.is_invoiced = True
-            service.save()
-
-        # Calculate and update the invoice total (assuming your Invoice model has a method to do this).
-        invoice.calculate_total()
+        try:
+            invoice = invoice_company(company.pk, services, deadline)
+        except InvoiceConflict:
+            invoice = None
+        if invoice is None:
+            raise serializers.ValidationError("No pending services available for invoicing.")
 
         return invoice
 
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from celery import chord, shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .billing import DEFAULT_DEADLINE_DAYS, bill_shard, finish_invoice_run, start_invoice_run
+from .models import InvoiceRun, InvoiceRunShard
+
+
+
+
+@shared_task
+def generate_month_invoices(year, month, shard_count=None, deadline_days=DEFAULT_DEADLINE_DAYS):
+    """
+    Fan a month's invoicing out over per-shard tasks and fan back in with a
+    chord callback that closes the run.
+
+    Safe to call again for the same month: a completed run is left alone, and
+    an interrupted one only re-dispatches the shards that are not done, each
+    resuming from its checkpoint.
+    """
+    shard_count = shard_count or getattr(settings, 'INVOICE_SHARD_COUNT', 8)
+    deadline = timezone.now() + timedelta(days=deadline_days)
+    run = start_invoice_run(year, month, shard_count, deadline)
+    if run.status == InvoiceRun.RunStatusChoices.COMPLETED:
+        return run.pk
+
+    pending = list(
+        run.shards.exclude(status=InvoiceRunShard.ShardStatusChoices.DONE)
+        .order_by('index').values_list('index', flat=True)
+    )
+    if not pending:
+        finish_invoice_run(run)
+        return run.pk
+
+    chord(invoice_shard.s(run.pk, index) for index in pending)(finish_month_invoices.s(run.pk))
+    return run.pk
+
+
+@shared_task
+def invoice_shard(run_id, index):
+    shard = InvoiceRunShard.objects.select_related('run').get(run_id=run_id, index=index)
+    if shard.status == InvoiceRunShard.ShardStatusChoices.DONE:
+        return 0
+    try:
+        return bill_shard(shard)
+    except Exception as exc:
+        # Leave the checkpoint where it is; the next run resumes from it.
+        InvoiceRunShard.objects.filter(pk=shard.pk).update(
+            status=InvoiceRunShard.ShardStatusChoices.FAILED, error=repr(exc), updated_at=timezone.now()
+        )
+        InvoiceRun.objects.filter(pk=run_id).update(
+            status=InvoiceRun.RunStatusChoices.FAILED, updated_at=timezone.now()
+        )
+        raise
+
+
+@shared_task
+def finish_month_invoices(results, run_id):
+    run = finish_invoice_run(InvoiceRun.objects.get(pk=run_id))
+    return run.invoice_count
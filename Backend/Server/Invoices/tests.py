@@ -1,3 +1,190 @@
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Users.models import User
+from Industries.models import Industry, IndustryCategory
+from Addresses.models import City, Province, RecipientAddress
+from Companies.models import Company
+from Services.models import Service
+from Server.celery import app as celery_app
+
+from .billing import invoice_company
+from .models import Invoice, InvoiceItem, InvoiceRun, InvoiceRunShard
+from .tasks import generate_month_invoices
+
+
+
+
+class InvoiceTestCase(TestCase):
+    """
+    Two companies in industries with different prices, and a customer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = User.objects.create_user(
+            phone="09120000010",
+            username="customer",
+            email="customer@example.com",
+            user_type="SC",
+            full_name="Customer",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        province = Province.objects.create(name="province", slug="province")
+        city = City.objects.create(name="city", slug="city", province=province)
+        cls.address = RecipientAddress.objects.create(
+            city=city, recipient=cls.recipient, title="home", address="street"
+        )
+        cls.companies = []
+        for index, price in enumerate([1000, 2500]):
+            industry = Industry.objects.create(
+                name=f"industry-{index}", slug=f"industry-{index}", category=category, price_per_service=price
+            )
+            employer = User.objects.create_user(
+                phone=f"0912000002{index}",
+                username=f"employer-{index}",
+                email=f"employer-{index}@example.com",
+                user_type="OW",
+                full_name="Employer",
+                password="password123",
+            )
+            cls.companies.append(Company.objects.create(
+                employer=employer, industry=industry, name=f"company-{index}", is_validated=True
+            ))
+
+    def create_services(self, company, count, created_at):
+        for _ in range(count):
+            service = Service.objects.create(
+                company=company,
+                recipient=self.recipient,
+                recipient_address=self.address,
+                title="service",
+                phone="09120000010",
+                descriptions="description",
+                service_type=Service.ServiceType.IN_HOUSE_SERVICE,
+            )
+            # created_at is auto_now_add; backdate it into the billing month.
+            Service.objects.filter(pk=service.pk).update(created_at=created_at)
+
+
+
+class GenerateInvoicesTests(InvoiceTestCase):
+    """
+    generate_invoices bills a month's uninvoiced services set-wise: one invoice
+    per company at its industry price, a query count that does not grow with
+    the number of services, and no double billing on a re-run.
+    """
+
+    def generate(self):
+        call_command("generate_invoices", "--year", "2026", "--month", "9", stdout=StringIO())
+
+    def test_bills_the_month_per_company(self):
+        september = timezone.make_aware(datetime(2026, 9, 15))
+        self.create_services(self.companies[0], 3, september)
+        self.create_services(self.companies[1], 2, september)
+        self.create_services(self.companies[1], 1, timezone.make_aware(datetime(2026, 10, 2)))
+
+        self.generate()
+
+        totals = dict(Invoice.objects.values_list("company__name", "total_amount"))
+        self.assertEqual(totals, {"company-0": 3000, "company-1": 5000})
+        self.assertEqual(InvoiceItem.objects.count(), 5)
+        self.assertEqual(Service.objects.filter(is_invoiced=False).count(), 1)
+
+        # Re-running the month bills nothing twice.
+        self.generate()
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_query_count_does_not_grow_with_services(self):
+        september = timezone.make_aware(datetime(2026, 9, 15))
+        self.create_services(self.companies[0], 2, september)
+        with CaptureQueriesContext(connection) as few:
+            self.generate()
+
+        Invoice.objects.all().delete()
+        Service.objects.update(is_invoiced=False)
+        self.create_services(self.companies[0], 20, september)
+        with CaptureQueriesContext(connection) as many:
+            self.generate()
+
+        self.assertEqual(Invoice.objects.get().total_amount, 22000)
+        self.assertEqual(len(few), len(many))
+
+
+
+class ShardedInvoiceGenerationTests(InvoiceTestCase):
+    """
+    The Celery job fans companies out over shards, records its progress and
+    resumes an interrupted month without billing anyone twice.
+    """
+    # Keys carry the CELERY_ namespace the app is configured with.
+    celery_conf = {
+        "CELERY_TASK_ALWAYS_EAGER": True,
+        "CELERY_TASK_EAGER_PROPAGATES": True,
+        "CELERY_BROKER_URL": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
+    }
+
+    def setUp(self):
+        self.previous_conf = {key: celery_app.conf.get(key) for key in self.celery_conf}
+        celery_app.conf.update(self.celery_conf)
+
+    def tearDown(self):
+        celery_app.conf.update(self.previous_conf)
+
+    def generate(self):
+        generate_month_invoices.delay(2026, 9, shard_count=2)
+
+    def test_bills_every_shard_once(self):
+        september = timezone.make_aware(datetime(2026, 9, 15))
+        self.create_services(self.companies[0], 3, september)
+        self.create_services(self.companies[1], 2, september)
+
+        self.generate()
+        run = InvoiceRun.objects.get(year=2026, month=9)
+        self.assertEqual(run.status, InvoiceRun.RunStatusChoices.COMPLETED)
+        self.assertEqual(run.invoice_count, 2)
+        self.assertEqual(run.shards.filter(status=InvoiceRunShard.ShardStatusChoices.DONE).count(), 2)
+        totals = dict(Invoice.objects.values_list("company__name", "total_amount"))
+        self.assertEqual(totals, {"company-0": 3000, "company-1": 5000})
+
+        # Re-running a completed month is a no-op.
+        self.generate()
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_interrupted_run_resumes(self):
+        september = timezone.make_aware(datetime(2026, 9, 15))
+        for company in self.companies:
+            self.create_services(company, 2, september)
+        failing = self.companies[1].pk
+
+        def invoice_or_fail(company_id, *args, **kwargs):
+            if company_id == failing:
+                raise RuntimeError("database went away")
+            return invoice_company(company_id, *args, **kwargs)
+
+        with mock.patch("Invoices.billing.invoice_company", side_effect=invoice_or_fail):
+            with self.assertRaises(RuntimeError):
+                self.generate()
+
+        run = InvoiceRun.objects.get(year=2026, month=9)
+        self.assertEqual(run.status, InvoiceRun.RunStatusChoices.FAILED)
+        failed = run.shards.get(index=failing % 2)
+        self.assertEqual(failed.status, InvoiceRunShard.ShardStatusChoices.FAILED)
+        self.assertLess(failed.last_company_id, failing)
+        self.assertFalse(Invoice.objects.filter(company_id=failing).exists())
 
-# Create your tests here.
+        self.generate()
+        run.refresh_from_db()
+        self.assertEqual(run.status, InvoiceRun.RunStatusChoices.COMPLETED)
+        self.assertEqual(run.invoice_count, 2)
+        self.assertEqual(Invoice.objects.count(), 2)
+        self.assertFalse(Service.objects.filter(is_invoiced=False).exists())
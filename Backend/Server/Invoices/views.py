@@ -6,10 +6,12 @@ from .models import Invoice
 from .serializers import InvoiceSerializer
 from .permissions import IsInvoiceAdmin
 
+from Server.pagination import PaginatedViewSetMixin
 
 
 
-class InvoiceViewSet(viewsets.ViewSet):
+
+class InvoiceViewSet(PaginatedViewSetMixin, viewsets.ViewSet):
     """
     ViewSet for managing Invoice objects.
 
@@ -18,6 +20,7 @@ class InvoiceViewSet(viewsets.ViewSet):
            • If request.user.is_staff, returns all invoices (or filtered by company_slug if provided).
            • If request.user.user_type == "OW", returns invoices for companies where the user is the owner.
            • Otherwise, returns a 403 error.
+           • Cursor paginated, newest first.
       - Create:    POST /invoices/create/
            • Only accessible to admin users (via IsInvoiceAdmin).
       - Retrieve:  GET /invoices/<pk>/
@@ -52,8 +55,9 @@ class InvoiceViewSet(viewsets.ViewSet):
                     {"detail": "You do not have permission to list invoices."},
                     status=status.HTTP_403_FORBIDDEN
                 )
-        serializer = InvoiceSerializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = InvoiceSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     def create(self, request):
         serializer = InvoiceSerializer(data=request.data)
@@ -0,0 +1,14 @@
+from Server.reference_cache import ReferenceCache
+from Server.slug_resolver import slug_resolver
+
+from .models import FirstItem, SecondItem
+
+
+
+
+# Created at app load (ItemsConfig.ready) so that every save or delete,
+# from any entry point, bumps the version.
+first_item_list_cache = ReferenceCache('first-items', FirstItem)
+second_item_list_cache = ReferenceCache('second-items', SecondItem)
+
+slug_resolver.register(FirstItem, SecondItem)
@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from .models import FirstItem, SecondItem
 from .serializers import FirstItemSerializer, SecondItemSerializer
 from .permissions import IsAdminOrReadOnly
+from .caches import first_item_list_cache, second_item_list_cache
 
 
 
@@ -13,7 +14,7 @@ from .permissions import IsAdminOrReadOnly
 class FirstItemViewSet(viewsets.ViewSet):
     """
     A ViewSet for managing FirstItem instances.
-    - Listing: Available to all users.
+    - Listing: Available to all users. Served from a versioned cache with an ETag.
     - Retrieve: Available to all users.
     - Create, Update, Delete: Restricted to admin users.
     """
@@ -21,9 +22,10 @@ class FirstItemViewSet(viewsets.ViewSet):
     lookup_field = "slug"
 
     def list(self, request):
-        queryset = FirstItem.objects.all()
-        serializer = FirstItemSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return first_item_list_cache.response(
+            request,
+            lambda: FirstItemSerializer(FirstItem.objects.all(), many=True, context={'request': request}).data
+        )
 
     def retrieve(self, request, slug):
         first_item = get_object_or_404(FirstItem, slug=slug)
@@ -74,7 +76,7 @@ class FirstItemViewSet(viewsets.ViewSet):
 class SecondItemViewSet(viewsets.ViewSet):
     """
     A ViewSet for managing SecondItem instances.
-    - Listing: Available to all users.
+    - Listing: Available to all users. Served from a versioned cache with an ETag.
     - Retrieve: Available to all users.
     - Create, Update, Delete: Restricted to admin users.
     """
@@ -82,9 +84,10 @@ class SecondItemViewSet(viewsets.ViewSet):
     lookup_field = "slug"
 
     def list(self, request):
-        queryset = SecondItem.objects.all()
-        serializer = SecondItemSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return second_item_list_cache.response(
+            request,
+            lambda: SecondItemSerializer(SecondItem.objects.all(), many=True, context={'request': request}).data
+        )
 
     def retrieve(self, request, slug):
         second_item = get_object_or_404(SecondItem, slug=slug)
@@ -0,0 +1,189 @@
+import secrets
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+
+
+
+# -------------------------------
+# Errors
+# -------------------------------
+
+class OTPError(Exception):
+    pass
+
+
+class OTPNotFound(OTPError):
+    """
+    No usable OTP for the token: unknown, expired, already used, or issued
+    for another purpose.
+    """
+
+
+class OTPCodeMismatch(OTPError):
+    pass
+
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+
+class BaseOTPBackend:
+    """
+    Stores one-time passwords for a purpose ('login', 'register', ...) with
+    an arbitrary JSON-serializable payload (the user id, the pending
+    registration...).
+
+    - issue(purpose, payload) -> (token, code)
+    - consume(token, code, purpose) -> payload; verifying and consuming are a
+      single atomic step, so a code can be redeemed once, and only before it
+      expires. Raises OTPNotFound or OTPCodeMismatch.
+
+    After OTP_MAX_ATTEMPTS wrong codes the OTP is dropped.
+
+    Settings:
+      - OTP_TTL: lifetime in seconds (default 120).
+      - OTP_MAX_ATTEMPTS: wrong codes tolerated per OTP (default 5).
+    """
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'OTP_TTL', 120)
+
+    @property
+    def max_attempts(self):
+        return getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+
+    @staticmethod
+    def generate_code():
+        return str(100000 + secrets.randbelow(900000))
+
+    def issue(self, purpose, payload):
+        raise NotImplementedError
+
+    def consume(self, token, code, purpose):
+        raise NotImplementedError
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    OTPs live in a Django cache (OTP_CACHE_ALIAS, default 'default'): one SET
+    to issue, no database writes at all, and expiry is the cache's own TTL.
+
+    Consuming claims the OTP with cache.add(), which is atomic on Redis,
+    Memcached and the local-memory cache, so of two concurrent requests with
+    the right code only one gets the payload.
+    """
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'OTP_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def _key(token):
+        return f'otp:{token}'
+
+    def issue(self, purpose, payload):
+        token, code = str(uuid.uuid4()), self.generate_code()
+        self.cache.set(self._key(token), {'purpose': purpose, 'code': code, 'payload': payload}, timeout=self.ttl)
+        return token, code
+
+    def consume(self, token, code, purpose):
+        key = self._key(token)
+        entry = self.cache.get(key)
+        if entry is None or entry['purpose'] != purpose:
+            raise OTPNotFound(token)
+
+        if not constant_time_compare(entry['code'], str(code)):
+            attempts_key = f'{key}:attempts'
+            self.cache.add(attempts_key, 0, timeout=self.ttl)
+            try:
+                attempts = self.cache.incr(attempts_key)
+            except ValueError:
+                attempts = 1
+            if attempts >= self.max_attempts:
+                self.cache.delete_many([key, attempts_key])
+            raise OTPCodeMismatch(token)
+
+        if not self.cache.add(f'{key}:used', True, timeout=self.ttl):
+            raise OTPNotFound(token)
+        self.cache.delete_many([key, f'{key}:attempts'])
+        return entry['payload']
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """
+    OTPs as OneTimePassword rows, for deployments without a shared cache.
+    Issuing is one INSERT; consuming is one conditional UPDATE that only
+    matches an unused, unexpired row with the right code.
+    """
+
+    def issue(self, purpose, payload):
+        from .models import OneTimePassword
+
+        code = self.generate_code()
+        otp = OneTimePassword.objects.create(
+            code=code,
+            purpose=purpose,
+            payload=payload,
+            expiration=timezone.now() + timedelta(seconds=self.ttl),
+        )
+        return str(otp.token), code
+
+    def consume(self, token, code, purpose):
+        from .models import OneTimePassword
+
+        try:
+            token = uuid.UUID(str(token))
+        except ValueError:
+            raise OTPNotFound(token)
+
+        usable = OneTimePassword.objects.filter(
+            token=token,
+            purpose=purpose,
+            is_used=False,
+            expiration__gt=timezone.now(),
+            attempts__lt=self.max_attempts,
+        )
+        consumed = usable.filter(code=str(code)).update(
+            is_used=True, status=OneTimePassword.OtpStatus.USED, updated_at=timezone.now()
+        )
+        if consumed:
+            return OneTimePassword.objects.values_list('payload', flat=True).get(token=token)
+        if usable.update(attempts=F('attempts') + 1):
+            raise OTPCodeMismatch(token)
+        raise OTPNotFound(token)
+
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_otp_backend():
+    """
+    The configured backend (settings.OTP_BACKEND, a dotted path; default the
+    cache backend), created on first use.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'OTP_BACKEND', 'OneTimePasswords.backends.CacheOTPBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+def reset_otp_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from OneTimePasswords.purge import purge_otps
+
+
+
+class Command(BaseCommand):
+    help = "Delete expired and used one-time passwords, with the rows that point at them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            help="Minutes a dead OTP is kept (default: settings.OTP_PURGE_AFTER_MINUTES)."
+        )
+        parser.add_argument('--batch-size', type=int, help="OTPs deleted per batch.")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(minutes=options['older_than']) if options['older_than'] else None
+        removed = purge_otps(older_than=older_than, batch_size=options['batch_size'])
+
+        batches = removed.pop('batches', 0)
+        self.stdout.write(f"Deleted {sum(removed.values())} row(s) in {batches} batch(es).")
+        for label, count in sorted(removed.items()):
+            self.stdout.write(f"  {label}: {count}")
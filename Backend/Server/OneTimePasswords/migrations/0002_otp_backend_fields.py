@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OneTimePasswords', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='onetimepassword',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='تعداد تلاش ناموفق'),
+        ),
+        migrations.AddField(
+            model_name='onetimepassword',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict, verbose_name='داده همراه'),
+        ),
+        migrations.AddField(
+            model_name='onetimepassword',
+            name='purpose',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='کاربرد'),
+        ),
+    ]
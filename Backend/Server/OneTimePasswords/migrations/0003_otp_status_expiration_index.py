@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('OneTimePasswords', '0002_otp_backend_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='onetimepassword',
+            index=models.Index(fields=['status', 'expiration'], name='otp_status_expiration_idx'),
+        ),
+    ]
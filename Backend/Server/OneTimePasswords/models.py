@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -24,6 +25,13 @@ class OneTimePassword(models.Model):
     expiration = models.DateTimeField(blank=True, null=True)
 
     is_used = models.BooleanField(default=False, verbose_name="استفاده شده؟")
+
+    # Used by OneTimePasswords.backends.DatabaseOTPBackend.
+    purpose = models.CharField(max_length=20, blank=True, default='', verbose_name="کاربرد")
+
+    payload = models.JSONField(default=dict, blank=True, verbose_name="داده همراه")
+
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="تعداد تلاش ناموفق")
     
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -38,14 +46,18 @@ class OneTimePassword(models.Model):
     class Meta:
         verbose_name = "رمز یکبار مصرف"
         verbose_name_plural = "رمز های یکبار مصرف"
+        indexes = [
+            # Purge of dead OTPs (OneTimePasswords.purge).
+            models.Index(fields=['status', 'expiration'], name='otp_status_expiration_idx'),
+        ]
 
     def __str__(self):
         return f'{self.status}----{self.code}----{self.token}'
 
     def get_expiration(self):
-        expiration = self.created_at + timezone.timedelta(minutes=2)
+        expiration = self.created_at + timezone.timedelta(seconds=getattr(settings, 'OTP_TTL', 120))
         self.expiration = expiration
-        self.save()
+        self.save(update_fields=['expiration', 'updated_at'])
 
     def status_validation(self):
         if self.is_used == True:
@@ -0,0 +1,63 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OneTimePassword
+
+
+
+
+Status = OneTimePassword.OtpStatus
+
+
+def purgeable_otps(cutoff):
+    """
+    Querysets of OTPs that can go, one per index-friendly condition (each is
+    a range on the (status, expiration) index or close to it), rather than a
+    single OR that no index serves:
+      - used or expired, and untouched since `cutoff`;
+      - still marked active but past their expiration before `cutoff`;
+      - legacy rows that never got an expiration.
+    """
+    return [
+        OneTimePassword.objects.filter(status__in=(Status.USED, Status.EXPIRED), updated_at__lt=cutoff),
+        OneTimePassword.objects.filter(status=Status.ACTIVE, expiration__lt=cutoff),
+        OneTimePassword.objects.filter(status=Status.ACTIVE, expiration__isnull=True, created_at__lt=cutoff),
+    ]
+
+
+def purge_otps(older_than=None, batch_size=None):
+    """
+    Delete dead OTPs together with the rows that point at them (login,
+    registration and reset-password OTPs cascade), `batch_size` OTPs per
+    DELETE, walking the primary key so each batch is a short transaction
+    and no lock is held for long.
+
+    Returns a Counter of deleted rows per model label, plus 'batches'.
+
+    Settings:
+      - OTP_PURGE_AFTER_MINUTES: how long dead OTPs are kept (default 60).
+      - OTP_PURGE_BATCH_SIZE: OTPs per batch (default 1000).
+    """
+    older_than = older_than or timedelta(minutes=getattr(settings, 'OTP_PURGE_AFTER_MINUTES', 60))
+    batch_size = batch_size or getattr(settings, 'OTP_PURGE_BATCH_SIZE', 1000)
+    cutoff = timezone.now() - older_than
+
+    removed = Counter()
+    for otps in purgeable_otps(cutoff):
+        last_token = None
+        while True:
+            batch = otps.order_by('token')
+            if last_token is not None:
+                batch = batch.filter(token__gt=last_token)
+            tokens = list(batch.values_list('token', flat=True)[:batch_size])
+            if not tokens:
+                break
+            # The DELETE repeats the filter, so a row that changed meanwhile is kept.
+            deleted, per_model = otps.filter(token__in=tokens).delete()
+            removed.update(per_model)
+            removed['batches'] += 1
+            last_token = tokens[-1]
+    return removed
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .purge import purge_otps
+
+
+
+
+@shared_task
+def purge_otps_task():
+    """
+    Hourly purge of dead OTP rows (CELERY_BEAT_SCHEDULE). Returns the number
+    of deleted rows per model.
+    """
+    return dict(purge_otps())
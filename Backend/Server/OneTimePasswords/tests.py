@@ -1,3 +1,147 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .backends import (
+    CacheOTPBackend,
+    DatabaseOTPBackend,
+    OTPCodeMismatch,
+    OTPNotFound,
+)
+from .models import OneTimePassword
+from Authentication.models import UserLoginOTP
+from Users.models import User
+
+
+
+
+class OTPBackendContract:
+    """
+    Behaviour every OTP backend must have; mixed into one TestCase per backend.
+    """
+    backend_class = None
+
+    def setUp(self):
+        cache.clear()
+        self.backend = self.backend_class()
+
+    def wrong(self, code):
+        return str((int(code) + 1 - 100000) % 900000 + 100000)
+
+    def test_issue_and_consume(self):
+        token, code = self.backend.issue('login', {'user_id': 7})
+        self.assertEqual(len(code), 6)
+        self.assertEqual(self.backend.consume(token, code, 'login'), {'user_id': 7})
+
+    def test_code_is_single_use(self):
+        token, code = self.backend.issue('login', {'user_id': 7})
+        self.backend.consume(token, code, 'login')
+        with self.assertRaises(OTPNotFound):
+            self.backend.consume(token, code, 'login')
+
+    def test_wrong_code_and_purpose(self):
+        token, code = self.backend.issue('login', {'user_id': 7})
+        with self.assertRaises(OTPCodeMismatch):
+            self.backend.consume(token, self.wrong(code), 'login')
+        with self.assertRaises(OTPNotFound):
+            self.backend.consume(token, code, 'register')
+        # Still usable after both.
+        self.assertEqual(self.backend.consume(token, code, 'login'), {'user_id': 7})
+
+    @override_settings(OTP_MAX_ATTEMPTS=3)
+    def test_too_many_wrong_codes_drop_the_otp(self):
+        token, code = self.backend.issue('login', {'user_id': 7})
+        for _ in range(3):
+            with self.assertRaises(OTPCodeMismatch):
+                self.backend.consume(token, self.wrong(code), 'login')
+        with self.assertRaises(OTPNotFound):
+            self.backend.consume(token, code, 'login')
+
+    def test_unknown_token(self):
+        with self.assertRaises(OTPNotFound):
+            self.backend.consume('not-a-token', '123456', 'login')
+
+
+class CacheOTPBackendTests(OTPBackendContract, TestCase):
+    backend_class = CacheOTPBackend
+
+    def test_no_database_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            token, code = self.backend.issue('login', {'user_id': 7})
+            self.backend.consume(token, code, 'login')
+        self.assertEqual(len(queries), 0)
+
+    @override_settings(OTP_TTL=0.05)
+    def test_expired(self):
+        token, code = self.backend.issue('login', {'user_id': 7})
+        time.sleep(0.1)
+        with self.assertRaises(OTPNotFound):
+            self.backend.consume(token, code, 'login')
+
+
+class DatabaseOTPBackendTests(OTPBackendContract, TestCase):
+    backend_class = DatabaseOTPBackend
+
+    def test_one_write_each_way(self):
+        with CaptureQueriesContext(connection) as queries:
+            token, code = self.backend.issue('login', {'user_id': 7})
+        self.assertEqual(len(queries), 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.backend.consume(token, code, 'login')
+        self.assertEqual(len(queries), 2)  # conditional UPDATE, payload read
+
+    def test_expired(self):
+        token, code = self.backend.issue('login', {'user_id': 7})
+        OneTimePassword.objects.filter(token=token).update(expiration=timezone.now() - timedelta(seconds=1))
+        with self.assertRaises(OTPNotFound):
+            self.backend.consume(token, code, 'login')
+
+
+class PurgeOTPTests(TestCase):
+    """
+    Dead OTPs go in batches, with the login/registration/reset rows pointing
+    at them; live ones stay.
+    """
+
+    def otp(self, age, **fields):
+        otp = OneTimePassword.objects.create(code="123456", **fields)
+        then = timezone.now() - age
+        OneTimePassword.objects.filter(pk=otp.pk).update(created_at=then, updated_at=then)
+        return otp
+
+    def test_purge(self):
+        user = User.objects.create_user(
+            phone="09120000041", username="purged", email="purged@example.com",
+            user_type="SC", full_name="Purged", password="password123",
+        )
+        old, recent = timedelta(hours=2), timedelta(minutes=1)
+        dead = [
+            self.otp(old, status=OneTimePassword.OtpStatus.USED, is_used=True),
+            self.otp(old, expiration=timezone.now() - old),
+            self.otp(old, expiration=timezone.now() - old),
+            self.otp(old),  # legacy, no expiration
+        ]
+        live = [
+            self.otp(recent, expiration=timezone.now() + recent),
+            # Just used: kept for the grace period.
+            self.otp(recent, status=OneTimePassword.OtpStatus.USED, is_used=True),
+        ]
+        UserLoginOTP.objects.create(otp=dead[1], user=user, phone=user.phone)
+        UserLoginOTP.objects.create(otp=live[0], user=user, phone=user.phone)
+
+        out = StringIO()
+        call_command("purge_otps", batch_size=1, stdout=out)
+
+        self.assertEqual(
+            set(OneTimePassword.objects.values_list('pk', flat=True)), {otp.pk for otp in live}
+        )
+        self.assertEqual(UserLoginOTP.objects.count(), 1)
+        self.assertIn("Deleted 5 row(s) in 4 batch(es).", out.getvalue())
+        self.assertIn("Authentication.UserLoginOTP: 1", out.getvalue())
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import PaymentInvoice
+from .models import PaymentInvoice, PaymentReconciliation
 
 
 @admin.register(PaymentInvoice)
@@ -15,7 +15,7 @@ class PaymentInvoiceAdmin(admin.ModelAdmin):
     )
     list_filter = ('payment_status', 'created_at')
     search_fields = ('invoice__id', 'transaction_id', 'invoice__company__name')
-    readonly_fields = ('timestamp', 'created_at', 'updated_at')
+    readonly_fields = ('timestamp', 'callback_at', 'created_at', 'updated_at')
     actions = ['mark_successful_action']
     
     fieldsets = (
@@ -23,7 +23,7 @@ class PaymentInvoiceAdmin(admin.ModelAdmin):
             'fields': ('invoice', 'amount', 'transaction_id', 'authority', 'payment_status'),
         }),
         ("زمان‌بندی", {
-            'fields': ('timestamp', 'created_at', 'updated_at'),
+            'fields': ('timestamp', 'callback_at', 'created_at', 'updated_at'),
         }),
     )
     
@@ -39,3 +39,9 @@ class PaymentInvoiceAdmin(admin.ModelAdmin):
                 count += 1
         self.message_user(request, f"{count} پرداخت به عنوان موفق علامت گذاری شد.")
     mark_successful_action.short_description = "علامت گذاری پرداخت‌های انتخاب شده به عنوان موفق"
+
+
+@admin.register(PaymentReconciliation)
+class PaymentReconciliationAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'cutoff', 'checked', 'succeeded', 'failed', 'errors', 'skipped', 'finished_at')
+    readonly_fields = ('cutoff', 'checked', 'succeeded', 'failed', 'errors', 'skipped', 'created_at', 'finished_at')
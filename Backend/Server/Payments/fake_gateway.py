@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+
+
+REQUEST_PATH = '/pg/rest/WebGate/PaymentRequest.json'
+VERIFY_PATH = '/pg/rest/WebGate/PaymentVerification.json'
+STARTPAY_PATH = '/pg/StartPay/'
+
+
+class FakeZarinpalGateway:
+    """
+    In-process stand-in for the Zarinpal REST gateway, for offline tests and
+    local development (see the `fake_zarinpal` management command).
+
+    - PaymentRequest answers Status 100 with a fresh Authority.
+    - PaymentVerification answers 100 with a RefID the first time, 101 after
+      that, and -54 for unknown authorities, like the real gateway.
+    - `latency` delays every answer; `fail_next(count, status)` makes the next
+      calls answer with an HTTP error; `outcomes[authority] = status` forces a
+      verification status (e.g. -21 for a cancelled payment).
+
+        with FakeZarinpalGateway(latency=0.05) as gateway:
+            client = ZarinpalClient(request_url=gateway.request_url, verify_url=gateway.verify_url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.payments = {}    # authority -> {'amount': ..., 'verified': bool, 'ref_id': ...}
+        self.outcomes = {}    # authority -> forced verification status
+        self.calls = []       # (path, payload) in arrival order
+        self.connections = 0  # TCP connections accepted (keep-alive reuses them)
+        self._failures = []   # HTTP statuses to answer with, one per upcoming call
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    # Lifecycle
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def request_url(self):
+        return self.url + REQUEST_PATH
+
+    @property
+    def verify_url(self):
+        return self.url + VERIFY_PATH
+
+    @property
+    def startpay_url(self):
+        return self.url + STARTPAY_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Behaviour
+
+    def fail_next(self, count=1, status=503):
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def call_count(self, path):
+        return sum(1 for called, payload in self.calls if called == path)
+
+    def _respond(self, path, payload):
+        with self._lock:
+            self.calls.append((path, payload))
+            if self._failures:
+                return self._failures.pop(0), {'errors': 'injected failure'}
+
+            if path == REQUEST_PATH:
+                if not payload.get('MerchantID') or not payload.get('Amount'):
+                    return 200, {'Status': -1, 'Authority': ''}
+                authority = 'A' + uuid.uuid4().hex[:35]
+                self.payments[authority] = {'amount': payload['Amount'], 'verified': False, 'ref_id': None}
+                return 200, {'Status': 100, 'Authority': authority}
+
+            if path == VERIFY_PATH:
+                authority = payload.get('Authority')
+                if authority in self.outcomes:
+                    return 200, {'Status': self.outcomes[authority], 'RefID': 0}
+                payment = self.payments.get(authority)
+                if payment is None:
+                    return 200, {'Status': -54, 'RefID': 0}
+                if payment['amount'] != payload.get('Amount'):
+                    return 200, {'Status': -50, 'RefID': 0}
+                if payment['verified']:
+                    return 200, {'Status': 101, 'RefID': payment['ref_id']}
+                payment['verified'] = True
+                payment['ref_id'] = int(time.time() * 1000) % 10 ** 10
+                return 200, {'Status': 100, 'RefID': payment['ref_id']}
+
+        return 404, {'errors': 'not found'}
+
+    def _handler_class(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real gateway
+
+            def setup(self):
+                super().setup()
+                with gateway._lock:
+                    gateway.connections += 1
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    payload = {}
+                if gateway.latency:
+                    time.sleep(gateway.latency)
+                status, body = gateway._respond(self.path, payload)
+                content = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out and went away.
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,257 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+
+
+
+# -------------------------------
+# Errors
+# -------------------------------
+
+class GatewayError(Exception):
+    """
+    Base class for failures talking to the payment gateway.
+    """
+
+
+class GatewayTimeout(GatewayError):
+    pass
+
+
+class GatewayUnavailable(GatewayError):
+    """
+    The gateway could not be reached, answered with a server error, or the
+    circuit breaker is open.
+    """
+
+
+class CircuitOpen(GatewayUnavailable):
+    pass
+
+
+
+# -------------------------------
+# Circuit breaker
+# -------------------------------
+
+class CircuitBreaker:
+    """
+    Closed: calls go through; `threshold` consecutive failures open it.
+    Open: calls fail fast with CircuitOpen for `reset_timeout` seconds.
+    Half-open: one trial call is let through; success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self._trial_running):
+                raise CircuitOpen("The payment gateway is unavailable; try again later.")
+            if state == 'half-open':
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+
+# -------------------------------
+# Client
+# -------------------------------
+
+class ZarinpalClient:
+    """
+    Zarinpal REST client shared by the whole process.
+
+    - One requests.Session with a connection pool, so calls reuse keep-alive
+      TCP/TLS connections instead of opening a new one each time.
+    - Short, separate connect and read timeouts.
+    - Retries with full-jitter exponential backoff that respect idempotency:
+      PaymentRequest creates a new authority on every call, so it is retried
+      only when the request provably never reached the gateway (connection
+      errors); PaymentVerification is idempotent on the gateway side and is
+      also retried after read timeouts and 5xx answers.
+    - A total deadline across all attempts and backoffs, so a call never
+      holds the request worker longer than ZP_DEADLINE seconds.
+    - A circuit breaker that fails fast while the gateway keeps failing.
+
+    Settings (all optional):
+      ZP_CONNECT_TIMEOUT, ZP_READ_TIMEOUT, ZP_DEADLINE, ZP_MAX_RETRIES,
+      ZP_RETRY_BACKOFF, ZP_RETRY_BACKOFF_MAX, ZP_POOL_SIZE,
+      ZP_BREAKER_THRESHOLD, ZP_BREAKER_RESET
+    """
+
+    def __init__(self, request_url=None, verify_url=None, merchant_id=None, connect_timeout=None,
+                 read_timeout=None, deadline=None, max_retries=None, backoff=None, backoff_max=None,
+                 pool_size=None, breaker=None, sleep=time.sleep, clock=time.monotonic):
+        self.request_url = request_url or settings.ZP_API_REQUEST
+        self.verify_url = verify_url or settings.ZP_API_VERIFY
+        self.merchant_id = merchant_id or settings.MERCHANT
+        self.timeout = (
+            connect_timeout or getattr(settings, 'ZP_CONNECT_TIMEOUT', 3.0),
+            read_timeout or getattr(settings, 'ZP_READ_TIMEOUT', 5.0),
+        )
+        self.deadline = deadline or getattr(settings, 'ZP_DEADLINE', 6.0)
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'ZP_MAX_RETRIES', 2)
+        self.backoff = backoff if backoff is not None else getattr(settings, 'ZP_RETRY_BACKOFF', 0.2)
+        self.backoff_max = backoff_max if backoff_max is not None else getattr(settings, 'ZP_RETRY_BACKOFF_MAX', 2.0)
+        self.breaker = breaker or CircuitBreaker(
+            threshold=getattr(settings, 'ZP_BREAKER_THRESHOLD', 5),
+            reset_timeout=getattr(settings, 'ZP_BREAKER_RESET', 30.0),
+        )
+        self.sleep = sleep
+        self.clock = clock
+
+        pool_size = pool_size or getattr(settings, 'ZP_POOL_SIZE', 10)
+        self.session = requests.Session()
+        # Retries are handled here, not by urllib3, so they can follow idempotency.
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json', 'Accept': 'application/json'})
+
+    # Public API
+
+    def request_payment(self, amount, description, callback_url, metadata=None):
+        """
+        Ask for a payment authority. Returns the gateway's JSON answer
+        (Status, Authority).
+        """
+        payload = {
+            "MerchantID": self.merchant_id,
+            "Amount": amount,
+            "Description": description,
+            "CallbackURL": callback_url,
+            "metadata": metadata or {},
+        }
+        return self._post(self.request_url, payload, idempotent=False)
+
+    def verify(self, authority, amount):
+        """
+        Verify a payment by its authority. Returns the gateway's JSON answer
+        (Status, RefID).
+        """
+        payload = {
+            "MerchantID": self.merchant_id,
+            "Amount": amount,
+            "Authority": authority,
+        }
+        return self._post(self.verify_url, payload, idempotent=True)
+
+    def close(self):
+        self.session.close()
+
+    # Internals
+
+    def _backoff_delay(self, attempt):
+        # Full jitter: spreads the retries of many workers over the window.
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+
+    def _post(self, url, payload, idempotent):
+        deadline = self.clock() + self.deadline
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            remaining = deadline - self.clock()
+            timeout = tuple(min(limit, remaining) for limit in self.timeout)
+            try:
+                response = self.session.post(url, json=payload, timeout=timeout)
+                if response.status_code >= 500:
+                    raise GatewayUnavailable(f"Gateway answered {response.status_code}.")
+                data = response.json()
+            except requests.exceptions.ConnectTimeout as exc:
+                # Never connected: nothing reached the gateway.
+                error, retryable = GatewayTimeout(str(exc)), True
+            except requests.exceptions.Timeout as exc:
+                error, retryable = GatewayTimeout(str(exc)), idempotent
+            except requests.exceptions.ConnectionError as exc:
+                # Connection refused/reset before a response: treated like a
+                # connect failure for payment requests only if nothing was sent.
+                error = GatewayUnavailable(str(exc))
+                retryable = idempotent or _not_sent(exc)
+            except GatewayUnavailable as exc:
+                error, retryable = exc, idempotent
+            except ValueError as exc:
+                # A 2xx/4xx body that is not JSON: the gateway is misbehaving.
+                error, retryable = GatewayUnavailable(f"Invalid gateway response: {exc}"), idempotent
+            else:
+                self.breaker.record_success()
+                return data
+
+            self.breaker.record_failure()
+            delay = self._backoff_delay(attempt)
+            # No retry that could not finish (connect at least) in time.
+            if not retryable or attempt >= self.max_retries or self.clock() + delay >= deadline:
+                raise error
+            self.sleep(delay)
+            attempt += 1
+
+
+def _not_sent(exc):
+    """
+    Whether a ConnectionError happened while establishing the connection
+    (so the request body was never sent).
+    """
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return type(reason).__name__ in ('NewConnectionError', 'NameResolutionError', 'ConnectTimeoutError')
+
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The process-wide client (created on first use).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ZarinpalClient()
+    return _client
+
+
+def reset_client():
+    """
+    Drop the process-wide client, e.g. after changing gateway settings in tests.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
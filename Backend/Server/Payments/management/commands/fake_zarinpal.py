@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Payments.fake_gateway import FakeZarinpalGateway
+
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Zarinpal gateway for offline development."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help="Port to listen on.")
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help="Seconds to wait before every answer, to simulate a slow gateway."
+        )
+
+    def handle(self, *args, **options):
+        gateway = FakeZarinpalGateway(port=options['port'], latency=options['latency'])
+        gateway.start()
+        self.stdout.write(f"Fake Zarinpal gateway listening on {gateway.url}")
+        self.stdout.write("Point the client at it with:")
+        self.stdout.write(f"  ZP_API_REQUEST = '{gateway.request_url}'")
+        self.stdout.write(f"  ZP_API_VERIFY = '{gateway.verify_url}'")
+        self.stdout.write(f"  ZP_API_STARTPAY = '{gateway.startpay_url}'")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            gateway.stop()
+            self.stdout.write("Fake gateway stopped.")
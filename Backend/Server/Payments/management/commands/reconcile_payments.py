@@ -0,0 +1,40 @@
+import csv
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from Payments.reconciliation import reconcile_payments
+
+
+
+class Command(BaseCommand):
+    help = "Re-check stale pending payments with the gateway and settle them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            help="Minutes since a payment last changed (default: settings.PAYMENT_RECONCILE_AFTER_MINUTES)."
+        )
+        parser.add_argument('--chunk-size', type=int, help="Payments read and written per chunk.")
+        parser.add_argument('--workers', type=int, help="Concurrent gateway calls.")
+        parser.add_argument('--report', help="Also write one CSV line per checked payment to this file.")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(minutes=options['older_than']) if options['older_than'] else None
+        kwargs = {'older_than': older_than, 'chunk_size': options['chunk_size'], 'workers': options['workers']}
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report_file:
+                writer = csv.writer(report_file)
+                writer.writerow(['payment_id', 'authority', 'invoice_id', 'amount', 'outcome', 'detail'])
+                report = reconcile_payments(
+                    on_result=lambda row, outcome, detail: writer.writerow([*row, outcome, detail]), **kwargs
+                )
+        else:
+            report = reconcile_payments(**kwargs)
+
+        self.stdout.write(
+            f"Checked {report.checked} payment(s): {report.succeeded} succeeded, {report.failed} failed, "
+            f"{report.errors} gateway error(s), {report.skipped} changed meanwhile."
+        )
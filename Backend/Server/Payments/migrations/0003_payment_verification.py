@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Payments', '0002_paymentinvoice_payment_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentinvoice',
+            name='callback_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='زمان بازگشت از درگاه'),
+        ),
+        migrations.AlterField(
+            model_name='paymentinvoice',
+            name='authority',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentinvoice',
+            name='payment_status',
+            field=models.CharField(choices=[('PE', 'در انتظار پرداخت'), ('VE', 'در حال بررسی'), ('SU', 'موفق'), ('FA', 'ناموفق')], default='PE', max_length=3, verbose_name='وضعیت پرداخت'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-17 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Invoices', '0003_invoice_runs'),
+        ('Payments', '0003_payment_verification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentReconciliation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateTimeField(verbose_name='بازه بررسی (آخرین تغییر قبل از)')),
+                ('checked', models.PositiveIntegerField(default=0, verbose_name='تعداد بررسی شده')),
+                ('succeeded', models.PositiveIntegerField(default=0, verbose_name='تعداد موفق')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='تعداد ناموفق')),
+                ('errors', models.PositiveIntegerField(default=0, verbose_name='خطای درگاه')),
+                ('skipped', models.PositiveIntegerField(default=0, verbose_name='تغییر کرده در حین بررسی')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ شروع')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='تاریخ پایان')),
+            ],
+            options={
+                'verbose_name': 'تطبیق پرداخت ها',
+                'verbose_name_plural': 'تطبیق های پرداخت',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='paymentinvoice',
+            index=models.Index(fields=['payment_status', 'updated_at'], name='payment_status_updated_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from Invoices.models import Invoice
 
 class PaymentInvoice(models.Model):
@@ -7,6 +8,7 @@ class PaymentInvoice(models.Model):
 
     class PaymentStatusChoices(models.TextChoices):
         PENDING = 'PE', 'در انتظار پرداخت'
+        VERIFYING = 'VE', 'در حال بررسی'
         SUCCESS = 'SU', 'موفق'
         FAILED = 'FA', 'ناموفق'
 
@@ -33,7 +35,9 @@ class PaymentInvoice(models.Model):
         verbose_name='وضعیت پرداخت'
     )
     
-    authority = models.CharField(max_length=50, null=True, blank=True)
+    authority = models.CharField(max_length=50, null=True, blank=True, db_index=True)
+
+    callback_at = models.DateTimeField(null=True, blank=True, verbose_name='زمان بازگشت از درگاه')
 
     timestamp = models.DateTimeField(auto_now_add=True, auto_now=False)
 
@@ -44,18 +48,63 @@ class PaymentInvoice(models.Model):
     class Meta:
         verbose_name = "پرداخت قبض"
         verbose_name_plural = "پرداخت قبض ها"
+        indexes = [
+            # Keyset pagination: ORDER BY created_at DESC, id DESC.
+            models.Index(fields=['-created_at', '-id'], name='payment_created_id_idx'),
+            # Reconciliation: open payments not touched since a cutoff.
+            models.Index(fields=['payment_status', 'updated_at'], name='payment_status_updated_idx'),
+        ]
 
 
     def __str__(self):
         return f"Payment for Invoice #{self.invoice.id} - {self.get_payment_status_display()}"
 
-    def mark_successful(self):
+    def mark_successful(self, transaction_id=None):
         """
-        When a payment is confirmed (e.g., via a gateway callback),
+        When a payment is confirmed (e.g., by the verification worker),
         mark the payment and update the corresponding invoice.
+
+        One transaction with two narrow writes: the payment's status columns
+        and the invoice's is_paid flag, without loading the invoice.
         """
+        fields = ['payment_status', 'updated_at']
         self.payment_status = self.PaymentStatusChoices.SUCCESS
-        self.save()
-        # When payment succeeds, update the invoice’s is_paid flag.
-        self.invoice.is_paid = True
-        self.invoice.save()
+        if transaction_id is not None:
+            self.transaction_id = transaction_id
+            fields.append('transaction_id')
+        with transaction.atomic():
+            self.save(update_fields=fields)
+            # When payment succeeds, update the invoice’s is_paid flag.
+            Invoice.objects.filter(pk=self.invoice_id).update(is_paid=True, updated_at=timezone.now())
+        if 'invoice' in self._state.fields_cache:
+            self.invoice.is_paid = True
+
+    @property
+    def is_final(self):
+        return self.payment_status in (self.PaymentStatusChoices.SUCCESS, self.PaymentStatusChoices.FAILED)
+
+
+
+class PaymentReconciliation(models.Model):
+    """
+    Report of one reconciliation pass over stale payments (see
+    Payments.reconciliation): how many were re-checked with the gateway and
+    what became of them.
+    """
+    cutoff = models.DateTimeField(verbose_name='بازه بررسی (آخرین تغییر قبل از)')
+
+    checked = models.PositiveIntegerField(default=0, verbose_name='تعداد بررسی شده')
+    succeeded = models.PositiveIntegerField(default=0, verbose_name='تعداد موفق')
+    failed = models.PositiveIntegerField(default=0, verbose_name='تعداد ناموفق')
+    errors = models.PositiveIntegerField(default=0, verbose_name='خطای درگاه')
+    skipped = models.PositiveIntegerField(default=0, verbose_name='تغییر کرده در حین بررسی')
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ شروع')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='تاریخ پایان')
+
+    class Meta:
+        verbose_name = "تطبیق پرداخت ها"
+        verbose_name_plural = "تطبیق های پرداخت"
+
+    def __str__(self):
+        return f"Reconciliation {self.created_at:%Y-%m-%d %H:%M}: {self.checked} checked"
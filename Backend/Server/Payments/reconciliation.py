@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from Invoices.models import Invoice
+
+from .gateway import CircuitOpen, GatewayError, get_client
+from .models import PaymentInvoice, PaymentReconciliation
+from .verification import VERIFIED_STATUSES
+
+
+
+
+Status = PaymentInvoice.PaymentStatusChoices
+
+# Payments that may still turn out either way.
+OPEN_STATUSES = (Status.PENDING, Status.VERIFYING)
+
+SUCCEEDED, FAILED, ERROR = 'succeeded', 'failed', 'error'
+
+
+
+# -------------------------------
+# Stale payments
+# -------------------------------
+
+def stale_payments(cutoff):
+    """
+    Open payments with a gateway authority that nothing has touched since
+    `cutoff`: verifications that timed out or whose worker gave up, and
+    payers who never came back from the gateway.
+    """
+    return (
+        PaymentInvoice.objects
+        .filter(payment_status__in=OPEN_STATUSES, updated_at__lt=cutoff, authority__isnull=False)
+        .exclude(authority='')
+    )
+
+
+def stale_chunks(cutoff, chunk_size):
+    """
+    Yield lists of (id, authority, invoice_id, amount) tuples, at most
+    `chunk_size` at a time, walking the primary key so only one chunk is
+    ever in memory and no query uses OFFSET.
+    """
+    last_id = None
+    while True:
+        payments = stale_payments(cutoff).order_by('pk')
+        if last_id is not None:
+            payments = payments.filter(pk__gt=last_id)
+        rows = list(payments.values_list('pk', 'authority', 'invoice_id', 'invoice__total_amount')[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+
+# -------------------------------
+# Reconciliation
+# -------------------------------
+
+def check_with_gateway(client, row):
+    """
+    Ask the gateway about one payment. Returns (row, outcome, detail), detail
+    being the RefID, the gateway status or the error.
+    """
+    payment_id, authority, invoice_id, amount = row
+    try:
+        response_data = client.verify(authority, amount)
+    except GatewayError as exc:
+        return row, ERROR, exc
+    if response_data.get('Status') in VERIFIED_STATUSES:
+        return row, SUCCEEDED, response_data.get('RefID')
+    return row, FAILED, response_data.get('Status')
+
+
+def apply_outcomes(results, cutoff):
+    """
+    Write a chunk's outcomes with a fixed number of statements: one bulk
+    UPDATE for the successes (each with its own transaction id), one to flag
+    their invoices paid and one for the failures.
+
+    Rows are re-read under lock and only those still open and untouched since
+    `cutoff` are written, so a payment settled (or re-requested) meanwhile by
+    the callback worker is never overwritten. Returns (succeeded, failed,
+    skipped) counts.
+    """
+    decided = {row[0]: (row, outcome, detail) for row, outcome, detail in results if outcome != ERROR}
+    if not decided:
+        return 0, 0, 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        still_open = set(
+            stale_payments(cutoff)
+            .filter(pk__in=decided)
+            .select_for_update()
+            .values_list('pk', flat=True)
+        )
+        successes = [decided[pk] for pk in still_open if decided[pk][1] == SUCCEEDED]
+        failures = [pk for pk in still_open if decided[pk][1] == FAILED]
+
+        PaymentInvoice.objects.bulk_update(
+            [
+                PaymentInvoice(pk=row[0], payment_status=Status.SUCCESS, transaction_id=ref_id, updated_at=now)
+                for row, outcome, ref_id in successes
+            ],
+            ['payment_status', 'transaction_id', 'updated_at'],
+        )
+        if successes:
+            Invoice.objects.filter(pk__in=[row[2] for row, outcome, ref_id in successes]).update(
+                is_paid=True, updated_at=now
+            )
+        if failures:
+            PaymentInvoice.objects.filter(pk__in=failures).update(payment_status=Status.FAILED, updated_at=now)
+
+    return len(successes), len(failures), len(decided) - len(still_open)
+
+
+def reconcile_payments(older_than=None, chunk_size=None, workers=None, client=None, on_result=None):
+    """
+    Re-check every stale open payment with the gateway and settle it.
+
+    Chunks of `chunk_size` payments are verified concurrently on a pool of
+    `workers` threads (gateway calls only; the database is used from this
+    thread alone), then written back in bulk. Gateway errors leave a payment
+    as it is for the next pass; if the circuit breaker opens, the pass stops.
+
+    `on_result(row, outcome, detail)`, if given, is called for every checked
+    payment (e.g. to write a CSV report). Returns the saved
+    PaymentReconciliation report.
+
+    Settings:
+      - PAYMENT_RECONCILE_AFTER_MINUTES: staleness threshold (default 60).
+      - PAYMENT_RECONCILE_CHUNK_SIZE: payments per chunk (default 500).
+      - PAYMENT_RECONCILE_WORKERS: concurrent gateway calls (default 8).
+    """
+    older_than = older_than or timedelta(minutes=getattr(settings, 'PAYMENT_RECONCILE_AFTER_MINUTES', 60))
+    chunk_size = chunk_size or getattr(settings, 'PAYMENT_RECONCILE_CHUNK_SIZE', 500)
+    workers = workers or getattr(settings, 'PAYMENT_RECONCILE_WORKERS', 8)
+    client = client or get_client()
+
+    report = PaymentReconciliation.objects.create(cutoff=timezone.now() - older_than)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rows in stale_chunks(report.cutoff, chunk_size):
+            results = list(pool.map(lambda row: check_with_gateway(client, row), rows))
+            succeeded, failed, skipped = apply_outcomes(results, report.cutoff)
+
+            errors = [detail for row, outcome, detail in results if outcome == ERROR]
+            report.checked += len(results)
+            report.succeeded += succeeded
+            report.failed += failed
+            report.skipped += skipped
+            report.errors += len(errors)
+            if on_result is not None:
+                for result in results:
+                    on_result(*result)
+            if any(isinstance(error, CircuitOpen) for error in errors):
+                break
+
+    report.finished_at = timezone.now()
+    report.save()
+    return report
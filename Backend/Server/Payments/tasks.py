@@ -0,0 +1,32 @@
+from celery import shared_task
+from django.conf import settings
+
+from .gateway import GatewayError
+from .reconciliation import reconcile_payments
+from .verification import verify_payment
+
+
+
+
+@shared_task(
+    autoretry_for=(GatewayError,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=getattr(settings, 'PAYMENT_VERIFY_MAX_RETRIES', 8),
+)
+def verify_payment_task(payment_id):
+    """
+    Background verification of a payment whose callback came back. Retried
+    with backoff while the gateway is failing; the payment stays VERIFYING
+    in the meantime.
+    """
+    return verify_payment(payment_id).payment_status
+
+
+@shared_task
+def reconcile_payments_task():
+    """
+    Nightly pass over stale pending payments (CELERY_BEAT_SCHEDULE).
+    """
+    return reconcile_payments().pk
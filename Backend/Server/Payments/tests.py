@@ -1,3 +1,369 @@
-from django.test import TestCase
+import csv
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Users.models import User
+from Industries.models import Industry, IndustryCategory
+from Companies.models import Company
+from Invoices.models import Invoice
+
+from .fake_gateway import REQUEST_PATH, VERIFY_PATH, FakeZarinpalGateway
+from .gateway import (
+    CircuitBreaker,
+    CircuitOpen,
+    GatewayTimeout,
+    GatewayUnavailable,
+    ZarinpalClient,
+    reset_client,
+)
+from .models import PaymentInvoice, PaymentReconciliation
+from .reconciliation import apply_outcomes, reconcile_payments
+from .verification import verify_payment
+from Server.celery import app as celery_app
+
+
+
+
+class ZarinpalClientTests(SimpleTestCase):
+    """
+    The gateway client against the local fake gateway: pooled connections,
+    retries that respect idempotency and a deadline, and the circuit breaker.
+    """
+
+    def setUp(self):
+        self.gateway = FakeZarinpalGateway().start()
+        self.addCleanup(self.gateway.stop)
+
+    def client_for(self, **kwargs):
+        kwargs.setdefault("sleep", lambda seconds: None)
+        client = ZarinpalClient(
+            request_url=self.gateway.request_url,
+            verify_url=self.gateway.verify_url,
+            merchant_id="merchant",
+            **kwargs
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def test_request_and_verify(self):
+        client = self.client_for()
+        authority = client.request_payment(5000, "invoice", "http://callback/")["Authority"]
+        self.assertEqual(client.verify(authority, 5000)["Status"], 100)
+        # Verification is idempotent on the gateway: a repeat answers 101.
+        self.assertEqual(client.verify(authority, 5000)["Status"], 101)
+        self.assertEqual(client.verify("unknown", 5000)["Status"], -54)
+
+    def test_connections_are_reused(self):
+        client = self.client_for()
+        for _ in range(5):
+            client.request_payment(5000, "invoice", "http://callback/")
+        self.assertEqual(self.gateway.connections, 1)
+
+    def test_verify_is_retried(self):
+        client = self.client_for(max_retries=2)
+        authority = client.request_payment(5000, "invoice", "http://callback/")["Authority"]
+        self.gateway.fail_next(2)
+        self.assertEqual(client.verify(authority, 5000)["Status"], 100)
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 3)
+
+    def test_payment_request_is_not_retried_once_sent(self):
+        client = self.client_for(max_retries=2)
+        self.gateway.fail_next(1)
+        with self.assertRaises(GatewayUnavailable):
+            client.request_payment(5000, "invoice", "http://callback/")
+        self.assertEqual(self.gateway.call_count(REQUEST_PATH), 1)
+
+    def test_read_timeouts(self):
+        self.gateway.latency = 0.3
+        client = self.client_for(read_timeout=0.05, max_retries=1)
+        with self.assertRaises(GatewayTimeout):
+            client.request_payment(5000, "invoice", "http://callback/")
+        with self.assertRaises(GatewayTimeout):
+            client.verify("unknown", 5000)
+        time.sleep(0.5)  # let the slow answers drain before counting
+        self.assertEqual(self.gateway.call_count(REQUEST_PATH), 1)
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 2)
+
+    def test_unreachable_gateway_is_retried_and_reported(self):
+        url = self.gateway.request_url
+        self.gateway.stop()
+        sleeps = []
+        client = ZarinpalClient(request_url=url, verify_url=url, merchant_id="m", max_retries=2,
+                                sleep=sleeps.append)
+        with self.assertRaises(GatewayUnavailable):
+            client.request_payment(5000, "invoice", "http://callback/")
+        # Nothing was sent, so even the non-idempotent call was retried, with jitter.
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(all(0 <= delay <= client.backoff_max for delay in sleeps))
+        self.gateway = FakeZarinpalGateway().start()
+
+    def test_circuit_breaker(self):
+        now = [0.0]
+        breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=lambda: now[0])
+        client = self.client_for(max_retries=0, breaker=breaker)
+
+        self.gateway.fail_next(2)
+        for _ in range(2):
+            with self.assertRaises(GatewayUnavailable):
+                client.verify("unknown", 5000)
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpen):
+            client.verify("unknown", 5000)
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 2)
+
+        # After the reset timeout one trial call goes through and closes it.
+        now[0] = 11
+        self.assertEqual(breaker.state, "half-open")
+        self.assertEqual(client.verify("unknown", 5000)["Status"], -54)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_retries_stop_at_the_deadline(self):
+        url = self.gateway.request_url
+        self.gateway.stop()
+        now, sleeps = [0.0], []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        client = ZarinpalClient(request_url=url, verify_url=url, merchant_id="m", max_retries=5, deadline=1.0,
+                                backoff=0.4, sleep=sleep, clock=lambda: now[0])
+        with mock.patch("Payments.gateway.random.uniform", lambda low, high: high):
+            with self.assertRaises(GatewayUnavailable):
+                client.request_payment(5000, "invoice", "http://callback/")
+        # 0.4s, then a 0.8s backoff would end past the 1s deadline.
+        self.assertEqual(sleeps, [0.4])
+        self.gateway = FakeZarinpalGateway().start()
+
+
+
+class PaymentViewsTests(TestCase):
+    """
+    The pay and verify endpoints go through the gateway client; the callback
+    only records the authority and verification runs on the (eager) worker.
+    """
+    # Keys carry the CELERY_ namespace the app is configured with.
+    celery_conf = {
+        "CELERY_TASK_ALWAYS_EAGER": True,
+        "CELERY_TASK_EAGER_PROPAGATES": True,
+        "CELERY_BROKER_URL": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user(
+            phone="09120000030",
+            username="payer",
+            email="payer@example.com",
+            user_type="OW",
+            full_name="Payer",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        industry = Industry.objects.create(name="industry", slug="industry", category=category)
+        company = Company.objects.create(employer=cls.employer, industry=industry, name="payer-company")
+        cls.invoice = Invoice.objects.create(company=company, total_amount=12000)
+
+    def setUp(self):
+        self.gateway = FakeZarinpalGateway().start()
+        self.addCleanup(self.gateway.stop)
+        overrides = override_settings(
+            ZP_API_REQUEST=self.gateway.request_url,
+            ZP_API_VERIFY=self.gateway.verify_url,
+            ZP_API_STARTPAY=self.gateway.startpay_url,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        reset_client()
+        self.addCleanup(reset_client)
+        previous_conf = {key: celery_app.conf.get(key) for key in self.celery_conf}
+        celery_app.conf.update(self.celery_conf)
+        self.addCleanup(celery_app.conf.update, previous_conf)
+
+    def pay(self):
+        client = APIClient()
+        client.force_authenticate(self.employer)
+        response = client.get(f"/payments/zarinpal-pay/{self.invoice.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["url"].startswith(self.gateway.startpay_url))
+        return response.data["authority"]
+
+    def test_pay_and_verify(self):
+        authority = self.pay()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().get("/payments/zarinpal-verify/", {"Authority": authority})
+        # Answered before the worker ran.
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], PaymentInvoice.PaymentStatusChoices.VERIFYING)
+
+        response = APIClient().get(f"/payments/zarinpal-status/{authority}/")
+        self.assertEqual(response.data["status"], PaymentInvoice.PaymentStatusChoices.SUCCESS)
+        self.assertTrue(response.data["final"])
+        self.assertTrue(response.data["transaction_id"])
+        self.invoice.refresh_from_db()
+        self.assertTrue(self.invoice.is_paid)
+
+    def test_duplicate_callbacks_verify_once(self):
+        authority = self.pay()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for _ in range(3):
+                APIClient().get("/payments/zarinpal-verify/", {"Authority": authority})
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 1)
+
+        response = APIClient().get("/payments/zarinpal-verify/", {"Authority": authority})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 1)
+
+    def test_cancelled_payment_is_not_verified(self):
+        authority = self.pay()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = APIClient().get("/payments/zarinpal-verify/", {"Authority": authority, "Status": "NOK"})
+        self.assertEqual(response.status_code, 417)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 0)
+
+    def test_gateway_errors_leave_payment_verifying(self):
+        authority = self.pay()
+        APIClient().get("/payments/zarinpal-verify/", {"Authority": authority})
+        payment = PaymentInvoice.objects.get(authority=authority)
+
+        self.gateway.fail_next(1)
+        failing = ZarinpalClient(
+            request_url=self.gateway.request_url, verify_url=self.gateway.verify_url, max_retries=0
+        )
+        self.addCleanup(failing.close)
+        with self.assertRaises(GatewayUnavailable):
+            verify_payment(payment.pk, client=failing)
+        payment.refresh_from_db()
+        self.assertEqual(payment.payment_status, PaymentInvoice.PaymentStatusChoices.VERIFYING)
+
+        # A retry settles it.
+        self.assertEqual(verify_payment(payment.pk, client=failing).payment_status,
+                         PaymentInvoice.PaymentStatusChoices.SUCCESS)
+
+    def test_status_answers_without_waiting(self):
+        authority = self.pay()
+        response = APIClient().get(f"/payments/zarinpal-status/{authority}/")
+        self.assertEqual(response.data["status"], PaymentInvoice.PaymentStatusChoices.PENDING)
+        self.assertFalse(response.data["final"])
+        self.assertEqual(response["Retry-After"], "2")
+
+    def test_gateway_down(self):
+        self.gateway.fail_next(1)
+        client = APIClient()
+        client.force_authenticate(self.employer)
+        response = client.get(f"/payments/zarinpal-pay/{self.invoice.id}/")
+        self.assertEqual(response.status_code, 503)
+
+
+
+class PaymentReconciliationTests(TestCase):
+    """
+    Stale open payments are re-checked with the (fake) gateway and settled in
+    bulk; recent or concurrently settled ones are left alone.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user(
+            phone="09120000031",
+            username="reconciled",
+            email="reconciled@example.com",
+            user_type="OW",
+            full_name="Reconciled",
+            password="password123",
+        )
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        industry = Industry.objects.create(name="industry", slug="industry", category=category)
+        cls.company = Company.objects.create(employer=employer, industry=industry, name="reconciled-company")
+
+    def setUp(self):
+        self.gateway = FakeZarinpalGateway().start()
+        self.addCleanup(self.gateway.stop)
+        self.client = ZarinpalClient(
+            request_url=self.gateway.request_url, verify_url=self.gateway.verify_url, max_retries=0
+        )
+        self.addCleanup(self.client.close)
+
+    def payment(self, status=PaymentInvoice.PaymentStatusChoices.PENDING, stale=True):
+        invoice = Invoice.objects.create(company=self.company, total_amount=5000)
+        authority = self.client.request_payment(5000, "test", "http://testserver/")["Authority"]
+        payment = PaymentInvoice.objects.create(
+            invoice=invoice, amount=5000, authority=authority, payment_status=status
+        )
+        if stale:
+            PaymentInvoice.objects.filter(pk=payment.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        return payment
+
+    def reconcile(self, **kwargs):
+        return reconcile_payments(client=self.client, workers=4, **kwargs)
+
+    def test_settles_stale_payments_in_chunks(self):
+        paid = [self.payment() for _ in range(3)]
+        verifying = self.payment(PaymentInvoice.PaymentStatusChoices.VERIFYING)
+        abandoned = self.payment()
+        self.gateway.outcomes[abandoned.authority] = -21
+        recent = self.payment(stale=False)
+
+        seen = []
+        report = self.reconcile(chunk_size=2, on_result=lambda row, outcome, detail: seen.append(row[0]))
+
+        self.assertEqual((report.checked, report.succeeded, report.failed, report.errors), (5, 4, 1, 0))
+        self.assertEqual(sorted(seen), sorted(p.pk for p in [*paid, verifying, abandoned]))
+        for payment in [*paid, verifying]:
+            payment.refresh_from_db()
+            self.assertEqual(payment.payment_status, PaymentInvoice.PaymentStatusChoices.SUCCESS)
+            self.assertTrue(payment.transaction_id)
+            self.assertTrue(Invoice.objects.get(pk=payment.invoice_id).is_paid)
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.payment_status, PaymentInvoice.PaymentStatusChoices.FAILED)
+        recent.refresh_from_db()
+        self.assertEqual(recent.payment_status, PaymentInvoice.PaymentStatusChoices.PENDING)
+        self.assertEqual(self.gateway.call_count(VERIFY_PATH), 5)
+
+    def test_gateway_errors_leave_payments_open(self):
+        payment = self.payment()
+        self.gateway.fail_next(1)
+        report = self.reconcile()
+        self.assertEqual((report.checked, report.errors), (1, 1))
+        payment.refresh_from_db()
+        self.assertEqual(payment.payment_status, PaymentInvoice.PaymentStatusChoices.PENDING)
+
+    def test_concurrently_settled_payments_are_skipped(self):
+        payment = self.payment()
+        row = (payment.pk, payment.authority, payment.invoice_id, 5000)
+        cutoff = timezone.now() - timedelta(hours=1)
+        # The callback worker settles it between the gateway call and the write.
+        PaymentInvoice.objects.filter(pk=payment.pk).update(
+            payment_status=PaymentInvoice.PaymentStatusChoices.FAILED
+        )
+        self.assertEqual(apply_outcomes([(row, "succeeded", 123)], cutoff), (0, 0, 1))
+        payment.refresh_from_db()
+        self.assertEqual(payment.payment_status, PaymentInvoice.PaymentStatusChoices.FAILED)
+
+    def test_command_writes_report(self):
+        self.payment()
+        path = os.path.join(tempfile.mkdtemp(), "report.csv")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with override_settings(ZP_API_VERIFY=self.gateway.verify_url):
+            reset_client()
+            self.addCleanup(reset_client)
+            out = StringIO()
+            call_command("reconcile_payments", report=path, stdout=out)
+        self.assertIn("Checked 1 payment(s): 1 succeeded", out.getvalue())
+        with open(path) as report_file:
+            rows = list(csv.reader(report_file))
+        self.assertEqual(rows[1][4], "succeeded")
+        self.assertEqual(PaymentReconciliation.objects.count(), 1)
@@ -16,5 +16,6 @@ urlpatterns = [
     path('invoices/', include(invoice_router.get_urls())),
 
     path('zarinpal-pay/<str:invoice_id>/', views.SendPaymentRequest.as_view()),
-    path('zarinpal-verify/', views.VerifyPaymentRequest.as_view())
+    path('zarinpal-verify/', views.VerifyPaymentRequest.as_view()),
+    path('zarinpal-status/<str:authority>/', views.PaymentStatusView.as_view()),
 ]
\ No newline at end of file
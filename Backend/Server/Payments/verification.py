@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .gateway import get_client
+from .models import PaymentInvoice
+
+
+
+
+Status = PaymentInvoice.PaymentStatusChoices
+
+# Gateway verification answers: 100 verified now, 101 verified before (e.g. a
+# retried worker whose first answer was lost).
+VERIFIED_STATUSES = (100, 101)
+
+
+
+# -------------------------------
+# Callback
+# -------------------------------
+
+def record_callback(authority, gateway_status='OK'):
+    """
+    Record Zarinpal's redirect back for `authority` without talking to the
+    gateway. Returns (payment, queued), payment being None for an unknown
+    authority.
+
+    A pending payment moves to VERIFYING (or straight to FAILED when the
+    gateway reports NOK, i.e. the user cancelled) with one conditional UPDATE,
+    so of several duplicate callbacks exactly one gets `queued=True` and
+    should hand the payment to the verification worker.
+    """
+    payment = PaymentInvoice.objects.filter(authority=authority).first()
+    if payment is None:
+        return None, False
+
+    now = timezone.now()
+    new_status = Status.FAILED if gateway_status == 'NOK' else Status.VERIFYING
+    moved = PaymentInvoice.objects.filter(pk=payment.pk, payment_status=Status.PENDING).update(
+        payment_status=new_status, callback_at=now, updated_at=now
+    )
+    if moved:
+        payment.payment_status, payment.callback_at, payment.updated_at = new_status, now, now
+    else:
+        payment.refresh_from_db()
+    return payment, bool(moved) and new_status == Status.VERIFYING
+
+
+
+# -------------------------------
+# Worker
+# -------------------------------
+
+def verify_payment(payment_id, client=None):
+    """
+    Verify a VERIFYING payment with the gateway and settle it.
+
+    The payment row stays locked (SELECT ... FOR UPDATE) for the whole round
+    trip, so concurrent workers for the same payment run one after the other
+    and every one but the first finds it already settled. Gateway errors
+    propagate with the payment still VERIFYING, for the caller to retry.
+    """
+    with transaction.atomic():
+        payment = (
+            PaymentInvoice.objects
+            .select_related('invoice')
+            .select_for_update(of=('self',))
+            .get(pk=payment_id)
+        )
+        if payment.payment_status != Status.VERIFYING:
+            return payment
+
+        response_data = (client or get_client()).verify(payment.authority, payment.invoice.total_amount)
+        if response_data.get('Status') in VERIFIED_STATUSES:
+            # Capture the transaction ID (RefID) returned by Zarinpal.
+            payment.mark_successful(transaction_id=response_data.get('RefID'))
+        else:
+            payment.payment_status = Status.FAILED
+            payment.save(update_fields=['payment_status', 'updated_at'])
+    return payment
@@ -1,5 +1,8 @@
+from functools import partial
+
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.db import transaction
 
 from rest_framework import viewsets, status, permissions
 from rest_framework.views import Response, APIView
@@ -10,15 +13,17 @@ from .permissions import PaymentInvoicePermission
 
 from Invoices.models import Invoice
 
-import requests
+from Server.pagination import PaginatedViewSetMixin
 
-import json
+from .gateway import GatewayTimeout, GatewayUnavailable, get_client
+from .tasks import verify_payment_task
+from .verification import record_callback
 
 
 
 
 
-class PaymentInvoiceViewSet(viewsets.ViewSet):
+class PaymentInvoiceViewSet(PaginatedViewSetMixin, viewsets.ViewSet):
     """
     A ViewSet for managing PaymentInvoice objects.
 
@@ -27,6 +32,7 @@ class PaymentInvoiceViewSet(viewsets.ViewSet):
           * If admin (is_staff), returns all PaymentInvoice objects.
           * If company employer (user_type "OW"), returns PaymentInvoice objects where
             invoice.company.owner equals the requesting user.
+          * Cursor paginated, newest first.
       - Create:    POST /payment-invoices/create/
           * Allowed only for company employers (OW); additional invoice validation is done by the serializer.
       - Retrieve:  GET /payment-invoices/<pk>/
@@ -49,8 +55,9 @@ class PaymentInvoiceViewSet(viewsets.ViewSet):
                 {"detail": "You do not have permission to list payment records."},
                 status=status.HTTP_403_FORBIDDEN
             )
-        serializer = PaymentInvoiceSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = PaymentInvoiceSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
     def create(self, request):
         serializer = PaymentInvoiceSerializer(data=request.data, context={'request': request})
@@ -121,41 +128,39 @@ class SendPaymentRequest(APIView):
                 "payment_status": PaymentInvoice.PaymentStatusChoices.PENDING,
             }
         )
+        if payment_invoice.payment_status == PaymentInvoice.PaymentStatusChoices.SUCCESS:
+            return Response({"message": "این فاکتور قبلا پرداخت شده است."}, status=status.HTTP_400_BAD_REQUEST)
+        if payment_invoice.payment_status == PaymentInvoice.PaymentStatusChoices.VERIFYING:
+            # A new authority would orphan the one being verified.
+            return Response({"message": "پرداخت قبلی در حال بررسی است."}, status=status.HTTP_409_CONFLICT)
 
         description = get_invoice_description(invoice)
-        data = {
-            "MerchantID": settings.MERCHANT,
-            "Amount": invoice.total_amount,
-            "Description": description,
-            "CallbackURL": settings.CallbackURL,  # Ensure you pass the callback URL from settings.
-            "metadata": {
-                "Email": request.user.email,
-                "mobile": request.user.phone,
-                "invoice_id": invoice_id,
-                "payment_invoice_id": str(payment_invoice.id)
-            },
-        }
-
-        json_data = json.dumps(data)
-        headers = {
-            'Content-Type': 'application/json',
-            'Content-Length': str(len(json_data))
+        metadata = {
+            "Email": request.user.email,
+            "mobile": request.user.phone,
+            "invoice_id": str(invoice_id),
+            "payment_invoice_id": str(payment_invoice.id)
         }
 
+        # Pooled, retried and circuit-broken call, held to ZP_DEADLINE seconds
+        # in all (see Payments.gateway).
         try:
-            response = requests.post(settings.ZP_API_REQUEST, data=json_data, headers=headers, timeout=10)
-        except requests.exceptions.Timeout:
+            response_data = get_client().request_payment(
+                invoice.total_amount, description, settings.ZP_CALLBACK_URL, metadata
+            )
+        except GatewayTimeout:
             return Response({'status': False, 'code': 'timeout'}, status=status.HTTP_408_REQUEST_TIMEOUT)
-        except requests.exceptions.ConnectionError:
+        except GatewayUnavailable:
             return Response({'status': False, 'code': 'connection error'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        if response.status_code == 200:
-            response_data = response.json()
+        if response_data:
             if response_data.get('Status') == 100:
                 authority = response_data.get('Authority')
-                # Save the authority into the PaymentInvoice record.
+                # Save the authority into the PaymentInvoice record; a retry
+                # after a failed attempt starts pending again.
                 payment_invoice.authority = authority
-                payment_invoice.save()
+                payment_invoice.payment_status = PaymentInvoice.PaymentStatusChoices.PENDING
+                payment_invoice.save(update_fields=['authority', 'payment_status', 'updated_at'])
 
                 # Build the payment URL by appending the authority as a GET parameter.
                 # The final URL will look like:  
@@ -175,7 +180,26 @@ class SendPaymentRequest(APIView):
 
 
 
+def payment_status_payload(payment):
+    return {
+        "status": payment.payment_status,
+        "status_display": payment.get_payment_status_display(),
+        "final": payment.is_final,
+        "payment_invoice_id": str(payment.id),
+        "invoice_id": str(payment.invoice_id),
+        "transaction_id": payment.transaction_id,
+    }
+
+
 class VerifyPaymentRequest(APIView):
+    """
+    Zarinpal's callback. It only records that the user came back and hands
+    the payment to the verification worker (Payments.tasks), so it answers
+    right away however slow the gateway is:
+      - 202 while verification is pending; poll the status endpoint.
+      - 200 / 417 when the payment was already settled (duplicate callback,
+        or Status=NOK from the gateway).
+    """
     # The callback endpoint is accessed without user authentication.
     permission_classes = [permissions.AllowAny]
 
@@ -186,47 +210,38 @@ class VerifyPaymentRequest(APIView):
             return Response({"message": "پارامتر Authority ارسال نشده است."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Locate the PaymentInvoice using the authority.
-            payment_invoice = PaymentInvoice.objects.get(authority=authority)
-        except PaymentInvoice.DoesNotExist:
+        payment_invoice, queued = record_callback(authority, request.GET.get('Status', 'OK'))
+        if payment_invoice is None:
             return Response({"message": "رکورد پرداخت یافت نشد."}, status=status.HTTP_404_NOT_FOUND)
+        if queued:
+            transaction.on_commit(partial(verify_payment_task.delay, str(payment_invoice.id)))
 
-        invoice = payment_invoice.invoice
-        data = {
-            "MerchantID": settings.MERCHANT,
-            "Amount": invoice.total_amount,
-            "Authority": authority,
-        }
-        json_data = json.dumps(data)
-        headers = {
-            'Content-Type': 'application/json',
-            'Content-Length': str(len(json_data))
-        }
+        data = payment_status_payload(payment_invoice)
+        data["status_url"] = f"/payments/zarinpal-status/{authority}/"
+        if payment_invoice.payment_status == PaymentInvoice.PaymentStatusChoices.SUCCESS:
+            return Response({"message": "پرداخت با موفقیت انجام شد.", **data})
+        if payment_invoice.payment_status == PaymentInvoice.PaymentStatusChoices.FAILED:
+            return Response({"message": "پرداخت با شکست مواجه شد.", **data},
+                            status=status.HTTP_417_EXPECTATION_FAILED)
+        return Response({"message": "پرداخت در حال بررسی است.", **data}, status=status.HTTP_202_ACCEPTED)
 
-        try:
-            response = requests.post(settings.ZP_API_VERIFY, data=json_data, headers=headers, timeout=10)
-        except requests.exceptions.Timeout:
-            payment_invoice.payment_status = PaymentInvoice.PaymentStatusChoices.FAILED
-            payment_invoice.save()
-            return Response({"message": "Timeout during verification."}, status=status.HTTP_408_REQUEST_TIMEOUT)
-        except requests.exceptions.ConnectionError:
-            payment_invoice.payment_status = PaymentInvoice.PaymentStatusChoices.FAILED
-            payment_invoice.save()
-            return Response({"message": "Connection error during verification."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-        if response.status_code == 200:
-            response_data = response.json()
-            if response_data.get('Status') == 100:
-                # Capture the transaction ID (RefID) returned by Zarinpal.
-                payment_invoice.transaction_id = response_data.get('RefID')
-                payment_invoice.mark_successful()
-                return Response({"message": "پرداخت با موفقیت انجام شد."})
-            else:
-                payment_invoice.payment_status = PaymentInvoice.PaymentStatusChoices.FAILED
-                payment_invoice.save()
-                return Response({"message": "پرداخت با شکست مواجه شد."}, status=status.HTTP_417_EXPECTATION_FAILED)
 
-        payment_invoice.payment_status = PaymentInvoice.PaymentStatusChoices.FAILED
-        payment_invoice.save()
-        return Response({"message": "خطای غیرمنتظره در بررسی تراکنش."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PaymentStatusView(APIView):
+    """
+    GET /payments/zarinpal-status/<authority>/
+
+    The verification result for the frontend, answered right away: holding
+    anonymous requests open would tie up a worker each. While the payment
+    is not settled the answer carries Retry-After
+    (PAYMENT_STATUS_RETRY_AFTER seconds) for the next poll.
+    """
+    # The authority is an unguessable token handed to the payer's browser.
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, authority):
+        payment_invoice = get_object_or_404(PaymentInvoice, authority=authority)
+        response = Response(payment_status_payload(payment_invoice))
+        if not payment_invoice.is_final:
+            response['Retry-After'] = str(getattr(settings, 'PAYMENT_STATUS_RETRY_AFTER', 2))
+        return response
@@ -5,3 +5,6 @@ class ScoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Scores'
     verbose_name = 'امتیازات'
+
+    def ready(self):
+        import Scores.signals
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Scores', '0001_initial'),
+        ('Services', '0006_service_suggested_time_alter_service_finished_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicescore',
+            index=models.Index(fields=['-created_at', '-id'], name='score_created_id_idx'),
+        ),
+    ]
@@ -26,10 +26,31 @@ class ServiceScore(models.Model):
     class Meta:
         verbose_name = "امتیاز سرویس"
         verbose_name_plural = "امتیازات سرویس"
+        indexes = [
+            # Keyset pagination: ORDER BY created_at DESC, id DESC.
+            models.Index(fields=['-created_at', '-id'], name='score_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"امتیاز برای {self.service.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so the rating signals can apply a delta.
+        instance._loaded_scores = instance.score_state()
+        return instance
+
+    def score_state(self):
+        """
+        Returns (service_id, (quality, behavior, time)), or None when any of
+        them was deferred at load time.
+        """
+        names = ('service_id', 'quality', 'behavior', 'time')
+        if any(name not in self.__dict__ for name in names):
+            return None
+        return self.service_id, (self.quality, self.behavior, self.time)
+
     @property
     def overall(self):
         """
@@ -0,0 +1,65 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import ServiceScore
+
+from Companies.ratings import score_added, score_removed, score_changed, rebuild_company_ratings
+from Companies.models import Company
+
+
+
+@receiver(post_save, sender=ServiceScore)
+def update_company_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the company's denormalized rating columns in step with its scores,
+    with a single UPDATE on the company row.
+    """
+    if raw:
+        return
+
+    state = instance.score_state()
+    if state is None:
+        # Some score fields were deferred: recompute this score's company.
+        rebuild_company_ratings(Company.objects.filter(service_company__score__pk=instance.pk))
+        instance._loaded_scores = None
+        return
+
+    service_id, values = state
+    loaded = getattr(instance, '_loaded_scores', None)
+
+    if created:
+        score_added(service_id, values)
+    elif loaded is None:
+        # Nothing to diff against: recompute this company from scratch.
+        rebuild_company_ratings(Company.objects.filter(service_company__id=service_id))
+    elif loaded[0] != service_id:
+        score_removed(*loaded)
+        score_added(service_id, values)
+    elif loaded[1] != values:
+        score_changed(service_id, loaded[1], values)
+
+    instance._loaded_scores = (service_id, values)
+
+
+@receiver(pre_delete, sender=ServiceScore)
+def load_score_before_delete(sender, instance, **kwargs):
+    """
+    A score loaded with deferred fields reads them while its row still
+    exists, so the delete can take it out of the rating.
+    """
+    if getattr(instance, '_loaded_scores', None) is not None or instance.score_state() is not None:
+        return
+    row = ServiceScore.objects.filter(pk=instance.pk).values_list('service_id', 'quality', 'behavior', 'time').first()
+    if row is not None:
+        service_id, *values = row
+        instance._loaded_scores = (service_id, tuple(values))
+
+
+@receiver(post_delete, sender=ServiceScore)
+def update_company_rating_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted score from its company's rating columns.
+    """
+    state = getattr(instance, '_loaded_scores', None) or instance.score_state()
+    if state is None:
+        return  # the row was already gone when the delete started
+    score_removed(*state)
@@ -5,16 +5,18 @@ from .models import ServiceScore
 from .serializers import ServiceScoreSerializer
 from .permissions import ServiceScorePermission  # custom permission per our previous discussion
 
+from Server.pagination import PaginatedViewSetMixin
 
 
 
 
-class ServiceScoreViewSet(viewsets.ViewSet):
+
+class ServiceScoreViewSet(PaginatedViewSetMixin, viewsets.ViewSet):
     """
     A ViewSet for managing ServiceScore records.
 
     Endpoints:
-      - List:       GET /service-scores/
+      - List:       GET /service-scores/ (cursor paginated, newest first)
       - Retrieve:   GET /service-scores/<pk>/
       - Create:     POST /service-scores/create/
       - Update:     PUT/PATCH /service-scores/<pk>/update/
@@ -29,9 +31,9 @@ class ServiceScoreViewSet(viewsets.ViewSet):
     permission_classes = [ServiceScorePermission]
 
     def list(self, request):
-        queryset = ServiceScore.objects.all()
-        serializer = ServiceScoreSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        page = self.paginate_queryset(ServiceScore.objects.all())
+        serializer = ServiceScoreSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
     def retrieve(self, request, pk=None):
         instance = get_object_or_404(ServiceScore, pk=pk)
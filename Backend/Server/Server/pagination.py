@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a (timestamp, primary key) pair, newest first.
+
+    Unlike offset pagination, every page is a single indexed range scan:
+        WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC
+    so deep pages cost the same as the first one and inserts between requests
+    never shift or duplicate rows.
+
+    The cursor is an opaque, URL-safe token encoding the boundary row's position
+    and the direction of travel.
+
+    Settings:
+      - PAGINATION_PAGE_SIZE: default page size.
+      - PAGINATION_MAX_PAGE_SIZE: cap applied to the `page_size` query parameter.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    time_field = 'created_at'
+    key_field = 'pk'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'PAGINATION_PAGE_SIZE', 20)
+        max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 100)
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                requested = int(requested)
+            except ValueError:
+                requested = 0
+            if requested > 0:
+                page_size = requested
+        return min(page_size, max_page_size)
+
+    def encode_cursor(self, instance, reverse):
+        position = {
+            't': getattr(instance, self.time_field).isoformat(),
+            'k': str(getattr(instance, self.key_field)),
+            'r': int(reverse),
+        }
+        token = base64.urlsafe_b64encode(json.dumps(position).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        if self.key_field == 'pk':
+            key_field = model._meta.pk
+        else:
+            key_field = model._meta.get_field(self.key_field)
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            timestamp = parse_datetime(position['t'])
+            # A hand-edited key must not reach the database as a bad lookup.
+            key = key_field.to_python(position['k'])
+            reverse = bool(position['r'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None or key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, key, reverse
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        time_field, key_field = self.time_field, self.key_field
+        reverse = False
+        if cursor is None:
+            queryset = queryset.order_by(f'-{time_field}', f'-{key_field}')
+        else:
+            timestamp, key, reverse = cursor
+            if reverse:
+                # Walking back towards newer rows: seek forwards, then flip the page.
+                queryset = queryset.filter(
+                    Q(**{f'{time_field}__gt': timestamp})
+                    | Q(**{time_field: timestamp, f'{key_field}__gt': key})
+                ).order_by(time_field, key_field)
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{time_field}__lt': timestamp})
+                    | Q(**{time_field: timestamp, f'{key_field}__lt': key})
+                ).order_by(f'-{time_field}', f'-{key_field}')
+
+        # One extra row tells us whether there is anything beyond this page.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+
+class PaginatedViewSetMixin:
+    """
+    Gives a hand-written viewsets.ViewSet the same paginate_queryset /
+    get_paginated_response API that GenericAPIView provides.
+
+        page = self.paginate_queryset(queryset)
+        serializer = SomeSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+    Apply any serializer query plan to `queryset` before paginating it, since
+    the page handed to the serializer is already a list.
+    """
+    pagination_class = KeysetCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+
+    def paginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_queryset(queryset, self.request, view=self)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
@@ -0,0 +1,77 @@
+from django.db.models import Prefetch, QuerySet
+
+
+
+
+class QueryPlanMixin:
+    """
+    Lets a serializer declare the relations it reads, so that the rows it
+    renders are loaded up front instead of one query per row and per field.
+
+    - select_related_fields: forward FK / one-to-one paths joined into the main query.
+    - prefetch_related_fields: reverse FK / many-to-many relations, one extra query each.
+
+    When a declared field is itself a nested serializer with a plan, the nested
+    plan is composed in: joins are prefixed onto select_related, and prefetches
+    get a Prefetch() whose queryset carries the nested plan.
+
+    Any queryset handed to the serializer with many=True is planned automatically.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def _nested_plan_serializer(cls, field_name):
+        field = cls._declared_fields.get(field_name)
+        # many=True fields are ListSerializers wrapping the real serializer.
+        field = getattr(field, 'child', field)
+        if isinstance(field, QueryPlanMixin):
+            return field.__class__
+        return None
+
+    @classmethod
+    def get_select_related(cls):
+        lookups = []
+        for lookup in cls.select_related_fields:
+            lookups.append(lookup)
+            nested = cls._nested_plan_serializer(lookup)
+            if nested is not None:
+                lookups.extend(f"{lookup}__{path}" for path in nested.get_select_related())
+        return lookups
+
+    @classmethod
+    def get_prefetch_related(cls):
+        prefetches = []
+        for lookup in cls.prefetch_related_fields:
+            nested = cls._nested_plan_serializer(lookup)
+            if nested is not None:
+                model = nested.Meta.model
+                queryset = nested.setup_eager_loading(model._default_manager.all())
+                prefetches.append(Prefetch(lookup, queryset=queryset))
+            else:
+                prefetches.append(lookup)
+        return prefetches
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Return `queryset` with this serializer's query plan applied.
+        """
+        select_related = cls.get_select_related()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = cls.get_prefetch_related()
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # Plan querysets passed positionally or as `instance`, as long as they
+        # have not been evaluated yet (re-planning would throw the cache away).
+        if args and isinstance(args[0], QuerySet) and args[0]._result_cache is None:
+            args = (cls.setup_eager_loading(args[0]),) + args[1:]
+        instance = kwargs.get('instance')
+        if isinstance(instance, QuerySet) and instance._result_cache is None:
+            kwargs['instance'] = cls.setup_eager_loading(instance)
+        return super().many_init(*args, **kwargs)
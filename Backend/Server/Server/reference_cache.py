@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+
+
+class ReferenceCache:
+    """
+    Versioned read-through cache for small, rarely changing lists
+    (provinces, cities, industries, items...).
+
+    Every entry is keyed by a version counter kept in the Django cache:
+      1. process memory, if it holds the current version;
+      2. the Django cache, shared by every process;
+      3. otherwise the list is rebuilt and stored in both.
+
+    Saving or deleting any of the watched models bumps the counter, which
+    orphans every cached copy at once; nothing has to be deleted.
+
+    Each version carries a strong ETag (a hash of its JSON), so clients can
+    revalidate with If-None-Match and get a 304.
+
+        provinces = ReferenceCache('provinces', Province)
+
+        def list(self, request):
+            return provinces.response(request, lambda: ProvinceSerializer(...).data)
+
+    Watch every model whose fields end up in the cached payload (e.g. the
+    province nested into each city).
+    """
+    timeout = 60 * 60 * 24
+
+    def __init__(self, name, *models):
+        self.name = name
+        self.version_key = f'reference:{name}:version'
+        self._local = None  # (version, data, etag)
+        self._lock = threading.Lock()
+        for model in models:
+            uid = f'reference_cache:{name}:{model._meta.label}'
+            post_save.connect(self._changed, sender=model, weak=False, dispatch_uid=uid)
+            post_delete.connect(self._changed, sender=model, weak=False, dispatch_uid=uid)
+
+    def _changed(self, sender, **kwargs):
+        self.invalidate()
+        # A reader may rebuild from the pre-commit rows in between; bump again
+        # once the change is visible to everyone.
+        transaction.on_commit(self.invalidate)
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, self._initial_version(), timeout=None)
+        self._local = None
+
+    def version(self):
+        return cache.get_or_set(self.version_key, self._initial_version, timeout=None)
+
+    @staticmethod
+    def _initial_version():
+        # Not 1: after a cache flush the counter must not restart at a version
+        # some process still holds in memory.
+        return time.time_ns()
+
+    def get(self, build):
+        """
+        Return (data, etag) for the current version, calling `build()` only
+        when neither process memory nor the Django cache has it.
+        """
+        version = self.version()
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1], local[2]
+
+        with self._lock:
+            key = f'reference:{self.name}:{version}'
+            entry = cache.get(key)
+            if entry is None:
+                data = build()
+                content = json.dumps(data, cls=DjangoJSONEncoder)
+                # Round-trip through JSON so every process serves identical data.
+                entry = (json.loads(content), '"%s"' % hashlib.sha256(content.encode()).hexdigest())
+                cache.set(key, entry, timeout=self.timeout)
+            self._local = (version, entry[0], entry[1])
+        return entry
+
+    def response(self, request, build):
+        data, etag = self.get(build)
+        matches = _if_none_match(request)
+        if '*' in matches or etag in matches:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+
+def _if_none_match(request):
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    header = request.headers.get('If-None-Match', '')
+    tags = (tag.strip() for tag in header.split(','))
+    return {tag[2:] if tag.startswith('W/') else tag for tag in tags if tag}
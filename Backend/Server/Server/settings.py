@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 import os
+from celery.schedules import crontab
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -114,6 +115,27 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (Users/hashers.py). Argon2 is used when the optional
+# argon2-cffi package is installed; otherwise PBKDF2. The first hasher hashes
+# new passwords, the others only verify existing hashes, which are upgraded
+# on the next login. Measure with `manage.py benchmark_login` when tuning.
+try:
+    import argon2  # noqa: F401
+    _preferred_hashers = ['Users.hashers.TunedArgon2PasswordHasher']
+except ImportError:
+    _preferred_hashers = []
+
+PASSWORD_HASHERS = _preferred_hashers + [
+    'Users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 102400
+ARGON2_PARALLELISM = 8
+PBKDF2_ITERATIONS = 1_000_000
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -149,19 +171,121 @@ CORS_ALLOW_ALL_ORIGINS = True
 # Auth user model
 AUTH_USER_MODEL = "Users.User"
 
+# Users (and their profiles) inserted per transaction by bulk provisioning
+# and the users_import command (Users/provisioning.py).
+USER_PROVISION_BATCH_SIZE = 1000
+# Processes hashing clear-text passwords during users_import (None: CPU count).
+# Measure with `manage.py benchmark_users_io`.
+USER_IMPORT_HASH_WORKERS = None
+
+# Cache shared by every worker process, on the Redis server at REDIS_URL
+# (e.g. redis://localhost:6379/1): OTPs, rate-limit buckets and the
+# generation counters that tell each process its in-memory indexes are
+# stale all have to be seen by every worker, so deployments running more
+# than one process must set it. Without it each process keeps its own cache,
+# which is enough for a single development server. The test runner
+# (TEST_RUNNER) always uses a per-process one.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TEST_RUNNER = 'Server.test_runner.LocalCacheTestRunner'
+
+# One-time passwords (OneTimePasswords.backends), kept in the shared cache
+# above. 'OneTimePasswords.backends.DatabaseOTPBackend' stores them in the
+# database instead.
+OTP_BACKEND = 'OneTimePasswords.backends.CacheOTPBackend'
+OTP_TTL = 120
+OTP_MAX_ATTEMPTS = 5
+# Dead OTP rows are kept this long, then deleted in batches of this size.
+OTP_PURGE_AFTER_MINUTES = 60
+OTP_PURGE_BATCH_SIZE = 1000
+
 # Celery settings
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 
+CELERY_BEAT_SCHEDULE = {
+    # Re-check payments left pending with the gateway (Payments.reconciliation).
+    'reconcile-payments': {
+        'task': 'Payments.tasks.reconcile_payments_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Delete expired and used OTPs (OneTimePasswords.purge).
+    'purge-otps': {
+        'task': 'OneTimePasswords.tasks.purge_otps_task',
+        'schedule': crontab(minute=15),
+    },
+    # Delete expired outstanding/blacklisted JWTs (Authentication.blacklist).
+    'purge-expired-tokens': {
+        'task': 'Authentication.tasks.purge_expired_tokens_task',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    # Publish the refresh-token blacklist filter (Authentication.blacklist),
+    # every JWT_BLACKLIST_PUBLISH_INTERVAL.
+    'publish-blacklist-filter': {
+        'task': 'Authentication.tasks.publish_blacklist_filter_task',
+        'schedule': crontab(minute='*/5'),
+    },
+    # Give pending services an expert (Services.dispatch).
+    'dispatch-experts': {
+        'task': 'Services.tasks.dispatch_experts_task',
+        'schedule': crontab(),
+    },
+}
+
+# Expert dispatch (Services/dispatch.py): pending services read per batch,
+# and the pending + in progress services an expert may hold.
+DISPATCH_BATCH_SIZE = 1000
+DISPATCH_MAX_LOAD = 5
+
+# Expert calendars (Services/slots.py): slot length, how far ahead free
+# slots are looked for, and how many are offered when the asked one is taken.
+SERVICE_SLOT_MINUTES = 60
+SERVICE_SLOT_SEARCH_DAYS = 7
+SERVICE_SLOT_OFFERS = 3
+
+# Invoices: companies are split into this many shards (one Celery task each).
+INVOICE_SHARD_COUNT = 8
+
 
 # Rest framework
 REST_FRAMEWORK = {
     #  Authentications classes
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # simplejwt's JWTAuthentication with a cached user lookup.
+        "Authentication.authentication.CachedJWTAuthentication",
     ),
+    # Client IPs (rate limits, Server/throttling.py) come from REMOTE_ADDR,
+    # never a client-supplied X-Forwarded-For. Set to the number of reverse
+    # proxies in front of the app when deployed behind them.
+    "NUM_PROXIES": 0,
 }
 
+# Token-bucket quotas per endpoint (Server/throttling.py): one bucket per
+# client IP and per phone number in the request body, 'tokens/period'.
+RATE_LIMITS = {
+    'login_password': {'ip': '20/min', 'phone': '5/min'},
+    'login_otp': {'ip': '10/min', 'phone': '3/min'},
+    'register_otp': {'ip': '5/min', 'phone': '3/min'},
+    'reset_password_otp': {'ip': '5/min', 'phone': '3/min'},
+}
+
+# Default page size of the paginated list endpoints (Server/pagination.py,
+# set per viewset rather than as DRF's global PAGE_SIZE), and the upper bound
+# for their ?page_size= query parameter.
+PAGINATION_PAGE_SIZE = 20
+PAGINATION_MAX_PAGE_SIZE = 100
+
+# Share of the company search rank taken by the rating (the rest is text relevance).
+COMPANY_SEARCH_RATING_WEIGHT = 0.3
+
 # JWT settings
 SIMPLE_JWT = {
     #  Tokens life time
@@ -174,7 +298,8 @@ SIMPLE_JWT = {
     # Blacklist 
     'BLACKLIST_AFTER_ROTATION': True,
     
-    # Last Login refreshing
+    # Last Login refreshing (only simplejwt's token-obtain views; request
+    # authentication never writes).
     'UPDATE_LAST_LOGIN': True,
     
     # Algorithm
@@ -212,6 +337,21 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Authenticated requests resolve their user from a per-process cache
+# (Authentication/authentication.py) kept this many seconds.
+JWT_USER_CACHE_TTL = 30
+
+# Refresh tokens are checked against a per-process Bloom filter of the
+# blacklist (Authentication/blacklist.py), published in the cache every
+# JWT_BLACKLIST_PUBLISH_INTERVAL seconds (CELERY_BEAT_SCHEDULE) and kept
+# current from a log of newer jtis; a process more than JWT_BLACKLIST_LOG_SIZE
+# jtis behind uses the database until the next publication.
+JWT_BLACKLIST_PUBLISH_INTERVAL = 300
+JWT_BLACKLIST_LOG_SIZE = 10000
+JWT_BLACKLIST_FALSE_POSITIVE_RATE = 0.01
+# Expired outstanding tokens (and their blacklist rows) deleted per batch.
+JWT_TOKEN_PURGE_BATCH_SIZE = 1000
+
 
 # SANDBOX MODE
 MERCHANT = "00000000-0000-0000-0000-000000000000"
@@ -231,7 +371,32 @@ ZP_API_VERIFY = f"https://{sandbox}.zarinpal.com/pg/rest/WebGate/PaymentVerifica
 # URL for starting the payment (we’ll append the authority as a query parameter)
 ZP_API_STARTPAY = f"https://{sandbox}.zarinpal.com/pg/StartPay/"
 
-CallbackURL = 'http://127.0.0.1:8080/payments/zarinpal-verify//'  # Your callback URL
+# Your callback URL. Only upper-case names are exposed by django.conf.settings.
+ZP_CALLBACK_URL = 'http://127.0.0.1:8080/payments/zarinpal-verify/'
+
+# Gateway client (Payments.gateway): timeouts in seconds, a deadline for a
+# call and all its retries, retries with jittered backoff, and a circuit
+# breaker that fails fast after repeated failures.
+ZP_CONNECT_TIMEOUT = 3.0
+ZP_READ_TIMEOUT = 5.0
+ZP_DEADLINE = 6.0
+ZP_MAX_RETRIES = 2
+ZP_RETRY_BACKOFF = 0.2
+ZP_RETRY_BACKOFF_MAX = 2.0
+ZP_POOL_SIZE = 10
+ZP_BREAKER_THRESHOLD = 5
+ZP_BREAKER_RESET = 30.0
+
+# Payment verification runs on a Celery worker (Payments.tasks); clients
+# poll the status endpoint for its result, this many seconds apart.
+PAYMENT_VERIFY_MAX_RETRIES = 8
+PAYMENT_STATUS_RETRY_AFTER = 2
+
+# Nightly reconciliation: open payments untouched for this long are re-checked
+# with the gateway, in chunks, with this many concurrent gateway calls.
+PAYMENT_RECONCILE_AFTER_MINUTES = 60
+PAYMENT_RECONCILE_CHUNK_SIZE = 500
+PAYMENT_RECONCILE_WORKERS = 8
 
 
 
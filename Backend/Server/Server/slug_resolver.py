@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_init, post_save, post_delete
+
+
+
+
+class SlugResolver:
+    """
+    Bounded LRU cache of slug -> primary key (and any registered fields) for
+    the models write serializers look up by slug (companies, cities,
+    provinces, industries, items).
+
+    - resolve(Model, slug): the pk, or None if no row has that slug.
+    - lookup(Model, slug): {'pk': ..., field: ...} for the fields registered
+      with the model, or None; e.g. the flags a write path checks, so it
+      needs no query of its own for them.
+
+    Only existing rows are cached; unknown slugs always go to the database.
+
+    Each registered model has a generation counter in the Django cache.
+    Changing a row's slug or a registered field, or deleting the row, bumps
+    it, so every process drops the model's entries on its next lookup. Saves
+    that leave them alone (tracked from the values loaded in post_init) do
+    not.
+
+    Settings:
+      - SLUG_RESOLVER_MAX_SIZE: entries kept per process (default 10000).
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # (label, slug) -> {'pk': ..., field: ...}
+        self._generations = {}         # label -> generation the entries belong to
+        self._fields = {}              # label -> fields cached besides the pk
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'SLUG_RESOLVER_MAX_SIZE', 10000)
+
+    # Registration and invalidation
+
+    def register(self, *models, fields=()):
+        """
+        Start tracking slug (and `fields`) changes of `models`; call it at
+        app load (ready()).
+        """
+        for model in models:
+            label = model._meta.label
+            self._fields[label] = tuple(fields)
+            uid = f'slug_resolver:{label}'
+            post_init.connect(self._loaded, sender=model, weak=False, dispatch_uid=uid)
+            post_save.connect(self._saved, sender=model, weak=False, dispatch_uid=uid)
+            post_delete.connect(self._deleted, sender=model, weak=False, dispatch_uid=uid)
+
+    def _tracked(self, sender):
+        return ('slug',) + self._fields[sender._meta.label]
+
+    def _loaded(self, sender, instance, **kwargs):
+        # Deferred fields are not in __dict__; they count as unknown.
+        instance._resolver_state = tuple(instance.__dict__.get(field) for field in self._tracked(sender))
+
+    def _saved(self, sender, instance, created, update_fields=None, raw=False, **kwargs):
+        tracked = self._tracked(sender)
+        loaded = instance.__dict__.get('_resolver_state')
+        instance._resolver_state = tuple(getattr(instance, field) for field in tracked)
+        if created or raw:
+            return
+        if update_fields is not None and not set(tracked) & set(update_fields):
+            return
+        if loaded is not None and None not in loaded and loaded == instance._resolver_state:
+            return
+        self.invalidate(sender)
+
+    def _deleted(self, sender, instance, **kwargs):
+        self.invalidate(sender)
+
+    @staticmethod
+    def _generation_key(label):
+        return f'slug_resolver:{label}:generation'
+
+    def invalidate(self, model):
+        label = model._meta.label
+        try:
+            cache.incr(self._generation_key(label))
+        except ValueError:
+            cache.set(self._generation_key(label), time.time_ns(), timeout=None)
+        with self._lock:
+            self._drop(label)
+
+    def _drop(self, label):
+        for key in [key for key in self._entries if key[0] == label]:
+            del self._entries[key]
+        self._generations.pop(label, None)
+
+    def _sync(self, label):
+        # Seeded from the clock so a flushed cache never repeats a generation.
+        generation = cache.get_or_set(self._generation_key(label), time.time_ns, timeout=None)
+        if self._generations.get(label) != generation:
+            self._drop(label)
+            self._generations[label] = generation
+
+    # Lookups
+
+    def resolve(self, model, slug):
+        row = self.lookup(model, slug)
+        return None if row is None else row['pk']
+
+    def lookup(self, model, slug):
+        label = model._meta.label
+        if label not in self._fields:
+            raise LookupError(f'{label} is not registered with the slug resolver.')
+        if not slug:
+            return None
+
+        with self._lock:
+            self._sync(label)
+            generation = self._generations[label]
+            row = self._entries.get((label, slug))
+            if row is not None:
+                self._entries.move_to_end((label, slug))
+                return row
+
+        row = model._default_manager.filter(slug=slug).values('pk', *self._fields[label]).first()
+        if row is None:
+            return None
+        with self._lock:
+            # Do not cache a row read before a concurrent invalidation.
+            if self._generations.get(label) == generation:
+                self._entries[(label, slug)] = row
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return row
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+slug_resolver = SlugResolver()
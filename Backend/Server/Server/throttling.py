@@ -0,0 +1,145 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.throttling import BaseThrottle
+
+
+
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """
+    '5/min' -> (5, 60): a bucket of 5 tokens that refills completely in a
+    minute. The period may carry a count, e.g. '10/15m'.
+    """
+    count, period = rate.split('/')
+    digits = ''.join(ch for ch in period if ch.isdigit())
+    unit = period[len(digits):]
+    return int(count), int(digits or 1) * PERIODS[unit]
+
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets kept in a shared Django cache, in the GCRA formulation: a
+    bucket is a single integer, its "theoretical arrival time" (TAT) in
+    milliseconds, so taking a token is one atomic cache.incr rather than a
+    read-modify-write. A request is allowed while the TAT stays within one
+    period of now; a refused request gives its increment back with decr.
+
+    The key's TTL follows the TAT, so an idle bucket (full again) simply
+    expires and the next request starts it with cache.add.
+
+    If the shared cache fails (e.g. Redis is down), buckets fall back to this
+    process's memory instead of letting every request through.
+
+    Settings:
+      - RATE_LIMIT_CACHE_ALIAS: cache holding the buckets (default 'default').
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._local = {}  # key -> TAT, used while the shared cache is failing
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+    def hit(self, key, rate):
+        """
+        Take a token from the bucket `key` with `rate` ('5/min').
+        Returns (allowed, retry_after_seconds).
+        """
+        capacity, period = parse_rate(rate)
+        period_ms = period * 1000
+        interval_ms = period_ms // capacity
+        now = int(self.clock() * 1000)
+        key = f'ratelimit:{key}'
+        try:
+            return self._hit_shared(key, now, period_ms, interval_ms)
+        except Exception:
+            return self._hit_local(key, now, period_ms, interval_ms)
+
+    def _hit_shared(self, key, now, period_ms, interval_ms):
+        cache = self.cache
+        if cache.add(key, now + interval_ms, timeout=math.ceil(interval_ms / 1000)):
+            return True, 0
+        try:
+            tat = cache.incr(key, interval_ms)
+        except ValueError:
+            # Expired between add() and incr(): the bucket is full again.
+            cache.set(key, now + interval_ms, timeout=math.ceil(interval_ms / 1000))
+            return True, 0
+
+        if tat - now > period_ms:
+            cache.decr(key, interval_ms)
+            return False, (tat - period_ms - now) / 1000
+        cache.touch(key, math.ceil((tat - now) / 1000))
+        return True, 0
+
+    def _hit_local(self, key, now, period_ms, interval_ms):
+        with self._lock:
+            tat = max(self._local.get(key, now), now) + interval_ms
+            if tat - now > period_ms:
+                return False, (tat - period_ms - now) / 1000
+            self._local[key] = tat
+            # Forget full buckets so the table does not grow without bound.
+            if len(self._local) > 10000:
+                self._local = {k: v for k, v in self._local.items() if v > now}
+            return True, 0
+
+    def reset(self):
+        with self._lock:
+            self._local.clear()
+
+
+rate_limiter = TokenBucketLimiter()
+
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle backed by `rate_limiter`. The view names its quota with
+    `throttle_scope`; settings.RATE_LIMITS maps each scope to one bucket per
+    key kind:
+
+        RATE_LIMITS = {
+            'login_otp': {'ip': '10/min', 'phone': '3/min'},
+        }
+
+    'ip' is the client address (honouring NUM_PROXIES), 'phone' the phone
+    number in the request body. A request must get a token from every
+    bucket; otherwise DRF answers 429 with a Retry-After header.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        limits = getattr(settings, 'RATE_LIMITS', {}).get(scope, {})
+        self.retry_after = None
+        for kind, rate in limits.items():
+            ident = self.get_key_ident(kind, request)
+            if not ident:
+                continue
+            allowed, retry_after = rate_limiter.hit(f'{scope}:{kind}:{ident}', rate)
+            if not allowed:
+                self.retry_after = retry_after
+                return False
+        return True
+
+    def get_key_ident(self, kind, request):
+        if kind == 'ip':
+            return self.get_ident(request)
+        if kind == 'phone':
+            phone = request.data.get('phone') if hasattr(request.data, 'get') else None
+            return str(phone).strip() if phone else None
+        raise ValueError(f'Unknown rate limit key {kind!r}.')
+
+    def wait(self):
+        return self.retry_after
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Service
+from .models import ExpertSlot, Service, ServiceTransition
 
 
 
@@ -67,4 +67,20 @@ class ServiceAdmin(admin.ModelAdmin):
         if obj.transaction_screenshot:
             return format_html('<img src="{}" width="100" height="100" />', obj.transaction_screenshot.url)
         return "فاقد تصویر"
-    transaction_screenshot_preview.short_description = "پیش نمایش فاکتور تراکنش"
\ No newline at end of file
+    transaction_screenshot_preview.short_description = "پیش نمایش فاکتور تراکنش"
+
+
+@admin.register(ServiceTransition)
+class ServiceTransitionAdmin(admin.ModelAdmin):
+    list_display = ('service', 'from_status', 'to_status', 'actor', 'created_at')
+    list_filter = ('to_status',)
+    raw_id_fields = ('service', 'actor')
+    readonly_fields = ('service', 'from_status', 'to_status', 'actor', 'created_at')
+
+
+@admin.register(ExpertSlot)
+class ExpertSlotAdmin(admin.ModelAdmin):
+    list_display = ('expert', 'company', 'starts_at', 'service')
+    list_filter = ('company',)
+    raw_id_fields = ('expert', 'company', 'service')
+    date_hierarchy = 'starts_at'
@@ -0,0 +1,69 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Subquery
+
+from .models import ExpertSlot, Service
+from .slots import book_claimed_slot, has_passed, slot_start
+
+from Companies.models import CompanyAccountant, CompanyExpert, CompanyReceptionist
+
+
+
+
+# Service field -> the table of who may hold it in each company.
+CLAIM_ROLES = {
+    'receptionist': CompanyReceptionist,
+    'accountant': CompanyAccountant,
+    'expert': CompanyExpert,
+}
+
+
+def claim(service_id, role, user):
+    """
+    Make `user` the service's `role` (receptionist, accountant or expert)
+    if the seat is free and they hold that role in the service's company,
+    in one statement:
+
+        UPDATE service SET expert_id = (SELECT id FROM expert WHERE company_id = service.company_id AND employee_id = :user)
+        WHERE id = :id AND expert_id IS NULL AND EXISTS (same subquery)
+
+    Two claims for the same seat cannot both match. An expert also books
+    the slot of the service's suggested_time (Services.slots) in the same
+    transaction, and does not get the seat if they are booked then.
+    Returns whether this call took it; see explain_claim_refusal for why
+    not.
+    """
+    membership = CLAIM_ROLES[role].objects.filter(company_id=OuterRef('company_id'), employee=user).values('pk')[:1]
+    seat = Service.objects.filter(Exists(membership), pk=service_id, **{f'{role}__isnull': True})
+    if role != 'expert':
+        return bool(seat.update(**{role: Subquery(membership)}))
+    try:
+        with transaction.atomic():
+            if not seat.update(expert=Subquery(membership)):
+                return False
+            book_claimed_slot(service_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def explain_claim_refusal(service_id, role, user):
+    """
+    After a lost claim: 'not_found', 'forbidden' (not a member of the
+    company in that role), 'mine' (already held by `user`), 'booked' (an
+    expert booked at the service's suggested time) or 'conflict'.
+    """
+    service = Service.objects.filter(pk=service_id).values(
+        'company_id', 'suggested_time', f'{role}__employee_id'
+    ).first()
+    if service is None:
+        return 'not_found'
+    holder = service[f'{role}__employee_id']
+    if holder == user.pk:
+        return 'mine'
+    if not CLAIM_ROLES[role].objects.filter(company_id=service['company_id'], employee=user).exists():
+        return 'forbidden'
+    if role == 'expert' and holder is None and service['suggested_time'] is not None:
+        start = slot_start(service['suggested_time'])
+        if not has_passed(start) and ExpertSlot.objects.filter(expert__employee=user, starts_at=start).exists():
+            return 'booked'
+    return 'conflict'
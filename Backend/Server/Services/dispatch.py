@@ -0,0 +1,217 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Expression, F, IntegerField, Q
+from django.utils import timezone
+
+from .experts import ACTIVE_STATUSES, COMPATIBLE_EXPERTS
+from .models import ExpertSlot, Service
+from .slots import has_passed, slot_start
+
+from Companies.availability import availability, minute_of_week
+from Companies.models import CompanyExpert
+
+
+
+
+Status = Service.ServiceStatusChoices
+
+
+
+class ExpertPool:
+    """
+    The experts of every company, built once per dispatch cycle with two
+    queries: one heap per (company, service type) ordered by current load,
+    so picking the least busy compatible expert is O(log n).
+
+    Only experts whose ServiceProviderProfile.is_available is set, and
+    whose load is under `max_load`, are offered.
+    """
+
+    def __init__(self, max_load):
+        self.max_load = max_load
+        self.load = Counter(dict(
+            Service.objects.filter(expert__isnull=False, service_status__in=ACTIVE_STATUSES)
+            .values('expert_id').annotate(active=Count('pk')).values_list('expert_id', 'active')
+        ))
+        self.heaps = defaultdict(list)
+        experts = CompanyExpert.objects.filter(employee__provider_profile__is_available=True).values_list(
+            'pk', 'company_id', 'service_type'
+        )
+        for expert_id, company_id, expert_type in experts.iterator():
+            if self.load[expert_id] >= max_load:
+                continue
+            for service_type, expert_types in COMPATIBLE_EXPERTS.items():
+                if expert_type in expert_types:
+                    self.heaps[company_id, service_type].append((self.load[expert_id], expert_id))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def take(self, company_id, service_type, busy=frozenset()):
+        """
+        The least loaded expert of `company_id` able to serve `service_type`
+        and not in `busy` (booked at the service's slot), counted as one
+        service busier; None if there is none.
+        """
+        heap = self.heaps.get((company_id, service_type))
+        skipped = []
+        chosen = None
+        while heap:
+            load, expert_id = heap[0]
+            current = self.load[expert_id]
+            if current != load:
+                # Taken meanwhile through the other service type's heap.
+                if current >= self.max_load:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (current, expert_id))
+                continue
+            if expert_id in busy:
+                skipped.append(heapq.heappop(heap))
+                continue
+            self.load[expert_id] = load + 1
+            if load + 1 >= self.max_load:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (load + 1, expert_id))
+            chosen = expert_id
+            break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return chosen
+
+
+
+class ExpertByService(Expression):
+    """
+    CASE id WHEN :service THEN :expert ... END over a {service_id: expert_id}
+    map, compiled in one go: a Case of When(pk=...) arms costs a full
+    filter resolution per service, which dominated the dispatch cycle.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, assignments):
+        super().__init__()
+        self.assignments = assignments
+
+    def as_sql(self, compiler, connection):
+        pk = Service._meta.pk
+        column = compiler.quote_name_unless_alias(pk.column)
+        params = []
+        for service_id, expert_id in self.assignments.items():
+            params += [pk.get_db_prep_value(service_id, connection), expert_id]
+        return f"CASE {column}{' WHEN %s THEN %s' * len(self.assignments)} END", params
+
+
+def assign_experts(assignments, slots=None, chunk_size=500):
+    """
+    Write {service_id: expert_id} with one UPDATE per `chunk_size` services,
+    only where the service is still pending and has no expert: a seat
+    claimed meanwhile (Services.claims) is left alone.
+
+    `slots` ({service_id: (company_id, starts_at)}) are booked for the
+    assigned expert in the same transaction, so dispatch never overbooks
+    the calendar of Services.slots: a service whose slot was booked
+    meanwhile is not assigned, and the slot of a service claimed meanwhile
+    is released. Returns the number of services assigned.
+    """
+    slots = slots or {}
+    assigned = 0
+    with transaction.atomic():
+        if slots:
+            ExpertSlot.objects.bulk_create([
+                ExpertSlot(expert_id=assignments[service_id], company_id=company_id,
+                           service_id=service_id, starts_at=starts_at)
+                for service_id, (company_id, starts_at) in slots.items()
+            ], ignore_conflicts=True)
+            booked = set(ExpertSlot.objects.filter(service_id__in=list(slots)).values_list('service_id', 'expert_id'))
+            assignments = {
+                service_id: expert_id for service_id, expert_id in assignments.items()
+                if service_id not in slots or (service_id, expert_id) in booked
+            }
+
+        items = list(assignments.items())
+        for start in range(0, len(items), chunk_size):
+            chunk = dict(items[start:start + chunk_size])
+            assigned += Service.objects.filter(
+                pk__in=list(chunk), expert__isnull=True, service_status=Status.PENDING,
+            ).update(expert_id=ExpertByService(chunk), updated_at=timezone.now())
+
+        if slots:
+            ExpertSlot.objects.filter(service_id__in=list(slots)).exclude(service__expert=F('expert')).delete()
+    return assigned
+
+
+def dispatch_pending_services(batch_size=None, max_load=None, now=None):
+    """
+    One dispatch cycle: give every pending service without an expert the
+    least loaded available expert of its company who handles its
+    service_type, if the company works at the service's suggested time (or
+    now, if it is unset or past) and the expert is not booked in that slot
+    (Services.slots).
+    Services are read oldest first in keyset batches of `batch_size` and
+    assigned, with their slots booked, by assign_experts.
+
+    Returns a Counter: 'pending' seen, 'assigned', and the services left
+    waiting because the company was 'closed' or had 'no_expert'.
+
+    Settings:
+      - DISPATCH_BATCH_SIZE: services per batch (default 1000).
+      - DISPATCH_MAX_LOAD: pending + in progress services an expert may
+        hold before getting no more (default 5).
+    """
+    batch_size = batch_size or getattr(settings, 'DISPATCH_BATCH_SIZE', 1000)
+    max_load = max_load or getattr(settings, 'DISPATCH_MAX_LOAD', 5)
+    now = now or timezone.now()
+    now_minute = minute_of_week(now)
+    # Checked for freshness once: the loop below only does in-memory lookups.
+    schedules = availability.fresh()
+
+    pool = ExpertPool(max_load)
+    counts = Counter()
+    pending = Service.objects.filter(service_status=Status.PENDING, expert__isnull=True)
+    last = None
+    while True:
+        batch = pending.order_by('created_at', 'id')
+        if last is not None:
+            created_at, service_id = last
+            batch = batch.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=service_id))
+        rows = list(batch.values_list('created_at', 'id', 'company_id', 'service_type', 'suggested_time')[:batch_size])
+        if not rows:
+            return counts
+
+        # Who is already booked at the slots this batch asks for: one query.
+        # A suggested time whose slot is over is not booked; the service
+        # goes by now instead.
+        starts = {
+            service_id: slot_start(suggested_time) for _, service_id, _, _, suggested_time in rows
+            if suggested_time and not has_passed(slot_start(suggested_time), now)
+        }
+        booked = defaultdict(set)
+        bookings = ExpertSlot.objects.filter(
+            company_id__in={row[2] for row in rows}, starts_at__in=set(starts.values())
+        ).values_list('starts_at', 'expert_id')
+        for starts_at, expert_id in bookings:
+            booked[starts_at].add(expert_id)
+
+        assignments, slots = {}, {}
+        for created_at, service_id, company_id, service_type, suggested_time in rows:
+            minute = minute_of_week(suggested_time) if service_id in starts else now_minute
+            if not schedules.is_open(company_id, minute):
+                counts['closed'] += 1
+                continue
+            start = starts.get(service_id)
+            expert_id = pool.take(company_id, service_type, booked[start] if start else frozenset())
+            if expert_id is None:
+                counts['no_expert'] += 1
+                continue
+            assignments[service_id] = expert_id
+            if start:
+                booked[start].add(expert_id)
+                slots[service_id] = (company_id, start)
+
+        counts['pending'] += len(rows)
+        counts['assigned'] += assign_experts(assignments, slots)
+        last = rows[-1][:2]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Service
+
+from Companies.models import CompanyExpert
+
+
+
+
+Status = Service.ServiceStatusChoices
+ExpertType = CompanyExpert.ExpertServiceType
+
+# Service.service_type -> CompanyExpert.service_type values that can take it.
+COMPATIBLE_EXPERTS = {
+    Service.ServiceType.IN_HOUSE_SERVICE: (ExpertType.IN_HOUSE, ExpertType.BOTH),
+    Service.ServiceType.IN_COMPANY_SERVICE: (ExpertType.COMPANY, ExpertType.BOTH),
+}
+
+# Statuses counting towards an expert's load.
+ACTIVE_STATUSES = (Status.PENDING, Status.IN_PROGRESS)
+
+
+def ranked_roster(company_id, service_type=None, max_load=None):
+    """
+    Ids of the company's available experts (able to serve `service_type`,
+    if given), least loaded first, without those already holding
+    `max_load` (DISPATCH_MAX_LOAD) pending + in progress services: the
+    order Services.dispatch hands experts out in. One query.
+    """
+    max_load = max_load or getattr(settings, 'DISPATCH_MAX_LOAD', 5)
+    experts = CompanyExpert.objects.filter(company_id=company_id, employee__provider_profile__is_available=True)
+    if service_type:
+        experts = experts.filter(service_type__in=COMPATIBLE_EXPERTS.get(service_type, ()))
+    return list(
+        experts.annotate(active=Count('expert_services', filter=Q(expert_services__service_status__in=ACTIVE_STATUSES)))
+        .filter(active__lt=max_load)
+        .order_by('active', 'pk')
+        .values_list('pk', flat=True)
+    )
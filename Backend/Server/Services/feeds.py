@@ -0,0 +1,89 @@
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied, ValidationError
+
+from .models import Service
+
+from Companies.models import Company, CompanyAccountant, CompanyExpert, CompanyReceptionist
+from Server.slug_resolver import slug_resolver
+
+
+
+
+# Staff roles and the table saying who holds them in which company.
+COMPANY_ROLES = {
+    'receptionist': CompanyReceptionist,
+    'accountant': CompanyAccountant,
+    'expert': CompanyExpert,
+}
+ROLES = ('recipient', 'owner') + tuple(COMPANY_ROLES)
+
+# Role used when the request names none.
+DEFAULT_ROLES = {
+    'SC': 'recipient',
+    'OW': 'owner',
+}
+
+
+def service_feed(user, role=None, company_slug=None, service_status=None):
+    """
+    The services `user` may list as `role`, newest first once paginated:
+
+      - recipient: the services they asked for            (recipient, created_at)
+      - owner: services of their company, or of
+        `company_slug` if they own several                  (company, created_at)
+      - receptionist / accountant / expert: services of
+        `company_slug`, where they hold that role          (company, created_at)
+
+    `service_status` narrows any feed; company feeds then use the
+    (company, service_status, created_at) index. Staff without a role see
+    every service.
+
+    Raises NotAuthenticated, PermissionDenied or ValidationError (DRF turns
+    them into 401/403/400).
+    """
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    role = role or DEFAULT_ROLES.get(user.user_type)
+    if service_status and service_status not in Service.ServiceStatusChoices.values:
+        raise ValidationError({'status': f'Unknown service status {service_status!r}.'})
+
+    company_id = None
+    if company_slug:
+        company_id = slug_resolver.resolve(Company, company_slug)
+        if company_id is None:
+            raise ValidationError({'company': 'Company not found.'})
+
+    if role is None:
+        if not user.is_staff:
+            raise ValidationError({'role': f'Choose one of: {", ".join(ROLES)}.'})
+        queryset = Service.objects.all()
+        if company_id is not None:
+            queryset = queryset.filter(company_id=company_id)
+
+    elif role == 'recipient':
+        queryset = Service.objects.filter(recipient=user)
+
+    elif role == 'owner':
+        if company_id is None:
+            owned = list(Company.objects.filter(employer=user).values_list('pk', flat=True)[:2])
+            # Interleaving several companies by date has no index to read
+            # from, so owners of more than one pick a company.
+            if len(owned) > 1:
+                raise ValidationError({'company': 'You own several companies; choose one.'})
+            company_id = owned[0] if owned else None
+        elif not Company.objects.filter(pk=company_id, employer=user).exists():
+            raise PermissionDenied('You do not own this company.')
+        queryset = Service.objects.filter(company_id=company_id) if company_id else Service.objects.none()
+
+    elif role in COMPANY_ROLES:
+        if company_id is None:
+            raise ValidationError({'company': f'The {role} feed needs a company.'})
+        if not COMPANY_ROLES[role].objects.filter(company_id=company_id, employee=user).exists():
+            raise PermissionDenied(f'You are not a {role} in this company.')
+        queryset = Service.objects.filter(company_id=company_id)
+
+    else:
+        raise ValidationError({'role': f'Choose one of: {", ".join(ROLES)}.'})
+
+    if service_status:
+        queryset = queryset.filter(service_status=service_status)
+    return queryset
@@ -0,0 +1,134 @@
+import statistics
+import time
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from Addresses.models import City, Province, RecipientAddress
+from Companies.models import Company, CompanyReceptionist
+from Industries.models import Industry, IndustryCategory
+from Services.feeds import service_feed
+from Services.models import Service
+from Services.views import ServiceViewSet
+from Users.models import User
+from Users.provisioning import provision_users
+
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure p50/p95 latency and queries per page of the role-scoped service feeds "
+        "over a throwaway data set (rolled back at the end), and print their query plans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--services', type=int, default=1_000_000, help="Services generated.")
+        parser.add_argument('--companies', type=int, default=100, help="Companies they are spread over.")
+        parser.add_argument('--recipients', type=int, default=1000, help="Recipients they are spread over.")
+        parser.add_argument('--samples', type=int, default=200, help="Requests timed per feed.")
+
+    def handle(self, *args, **options):
+        # Requests are built in-process, for the test client's host name.
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*']):
+            owner, receptionist, recipient, company = self.seed(
+                options['services'], options['companies'], options['recipients']
+            )
+            feeds = [
+                ("recipient", recipient, {}),
+                ("owner", owner, {'company': company.slug}),
+                ("receptionist", receptionist, {'role': 'receptionist', 'company': company.slug}),
+                ("receptionist, pending", receptionist,
+                 {'role': 'receptionist', 'company': company.slug, 'status': 'PE'}),
+            ]
+            for label, user, params in feeds:
+                self.measure(label, user, params, options['samples'])
+                self.measure(f"{label}, page 2", user, params, options['samples'], second_page=True)
+            for label, user, params in feeds:
+                queryset = service_feed(
+                    user, params.get('role'), params.get('company'), params.get('status')
+                ).order_by('-created_at', '-id')[:21]
+                self.stdout.write(f"\nQuery plan, {label}:\n{queryset.explain()}")
+            transaction.set_rollback(True)
+
+    def seed(self, services, companies, recipients):
+        started = time.perf_counter()
+        suffix = f"{time.time_ns()}"[-9:]
+
+        def user(prefix, user_type, i=0):
+            return User(
+                phone=f"{prefix}{i:09d}", username=f"feeds-{prefix}-{i}-{suffix}",
+                email=f"feeds-{prefix}-{i}-{suffix}@example.com", user_type=user_type,
+            )
+
+        staff = [user('70', 'OW'), user('71', 'SP')]
+        people = [user('72', 'SC', i) for i in range(recipients)]
+        provision_users(staff + people)
+        owner, receptionist = staff
+
+        category = IndustryCategory.objects.create(name=f"feeds-{suffix}", slug=f"feeds-{suffix}")
+        industry = Industry.objects.create(name=f"feeds-{suffix}", slug=f"feeds-{suffix}", category=category)
+        province = Province.objects.create(name=f"feeds-{suffix}", slug=f"feeds-{suffix}")
+        city = City.objects.create(name=f"feeds-{suffix}", slug=f"feeds-{suffix}", province=province)
+        company_rows = Company.objects.bulk_create(
+            Company(
+                employer=owner, industry=industry, name=f"feeds-{suffix}-{i}",
+                slug=f"feeds-{suffix}-{i}", is_validated=True,
+            )
+            for i in range(companies)
+        )
+        CompanyReceptionist.objects.create(company=company_rows[0], employee=receptionist)
+        addresses = RecipientAddress.objects.bulk_create(
+            RecipientAddress(city=city, recipient=person, title="home", address="street") for person in people
+        )
+
+        statuses = Service.ServiceStatusChoices.values
+        rows = (
+            Service(
+                company=company_rows[i % companies],
+                recipient=people[i % recipients],
+                recipient_address=addresses[i % recipients],
+                title="service", phone="09120000000", descriptions="description",
+                service_status=statuses[i % len(statuses)], service_type='ICS',
+            )
+            for i in range(services)
+        )
+        while batch := list(islice(rows, 10000)):
+            Service.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {services} services in {time.perf_counter() - started:.1f}s.")
+        return owner, receptionist, people[0], company_rows[0]
+
+    def measure(self, label, user, params, samples, second_page=False):
+        factory = APIRequestFactory()
+        view = ServiceViewSet.as_view({'get': 'list'})
+
+        def get(query):
+            request = factory.get('/services/service/', query)
+            force_authenticate(request, user=user)
+            return view(request)
+
+        query = dict(params)
+        if second_page:
+            next_link = get(query).data['next']
+            if not next_link:
+                return
+            query['cursor'] = parse_qs(urlsplit(next_link).query)['cursor'][0]
+
+        timings = []
+        for _ in range(samples):
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = get(query)
+                timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.data
+        p50 = statistics.median(timings)
+        p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        self.stdout.write(
+            f"{label}: p50 {p50:.1f} ms, p95 {p95:.1f} ms, "
+            f"{len(queries)} queries, {len(response.data['results'])} rows"
+        )
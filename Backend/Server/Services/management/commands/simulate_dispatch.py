@@ -0,0 +1,114 @@
+import time
+from datetime import time as clock
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from Addresses.models import City, Province, RecipientAddress
+from Companies.availability import WEEKDAY_CODES, availability
+from Companies.models import Company, CompanyExpert, WorkDay
+from Industries.models import Industry, IndustryCategory
+from Profiles.models import ServiceProviderProfile
+from Services.dispatch import dispatch_pending_services
+from Services.models import Service
+from Users.models import User
+from Users.provisioning import provision_users
+
+
+
+class Command(BaseCommand):
+    help = (
+        "Run one dispatch cycle over a throwaway data set (rolled back at the end) "
+        "and report services dispatched per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--services', type=int, default=100_000, help="Pending services generated.")
+        parser.add_argument('--companies', type=int, default=200, help="Companies they are spread over.")
+        parser.add_argument('--experts', type=int, default=20, help="Experts per company.")
+        parser.add_argument('--max-load', type=int, default=5, help="DISPATCH_MAX_LOAD for the run.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="DISPATCH_BATCH_SIZE for the run.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['services'], options['companies'], options['experts'])
+                availability.invalidate()
+
+                started = time.perf_counter()
+                counts = dispatch_pending_services(options['batch_size'], options['max_load'])
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"Dispatched {counts['assigned']} of {counts['pending']} pending services in {elapsed:.2f}s "
+                    f"({counts['pending'] / elapsed:,.0f} services/s); "
+                    f"{counts['closed']} at closed companies, {counts['no_expert']} without a free expert."
+                )
+                transaction.set_rollback(True)
+        finally:
+            availability.invalidate()
+
+    def seed(self, services, companies, experts):
+        started = time.perf_counter()
+        suffix = f"{time.time_ns()}"[-9:]
+
+        def user(prefix, user_type, i=0):
+            return User(
+                phone=f"{prefix}{i:09d}", username=f"dispatch-{prefix}-{i}-{suffix}",
+                email=f"dispatch-{prefix}-{i}-{suffix}@example.com", user_type=user_type,
+            )
+
+        owner, recipient = user('73', 'OW'), user('74', 'SC')
+        staff = [user('75', 'SP', i) for i in range(companies * experts)]
+        provision_users([owner, recipient] + staff)
+        # Every tenth expert is off duty.
+        ServiceProviderProfile.objects.filter(user__in=staff[::10]).update(is_available=False)
+
+        category = IndustryCategory.objects.create(name=f"dispatch-{suffix}", slug=f"dispatch-{suffix}")
+        industry = Industry.objects.create(name=f"dispatch-{suffix}", slug=f"dispatch-{suffix}", category=category)
+        province = Province.objects.create(name=f"dispatch-{suffix}", slug=f"dispatch-{suffix}")
+        city = City.objects.create(name=f"dispatch-{suffix}", slug=f"dispatch-{suffix}", province=province)
+        address = RecipientAddress.objects.create(city=city, recipient=recipient, title="home", address="street")
+        company_rows = Company.objects.bulk_create(
+            Company(
+                employer=owner, industry=industry, name=f"dispatch-{suffix}-{i}",
+                slug=f"dispatch-{suffix}-{i}", is_validated=True,
+            )
+            for i in range(companies)
+        )
+        # Every company but one in ten works around the clock; those have no workdays.
+        WorkDay.objects.bulk_create(
+            WorkDay(company=company, day_of_week=day, open_time=clock(0), close_time=clock(0))
+            for i, company in enumerate(company_rows) if i % 10
+            for day in WEEKDAY_CODES
+        )
+        expert_types = CompanyExpert.ExpertServiceType.values
+        CompanyExpert.objects.bulk_create(
+            CompanyExpert(
+                company=company_rows[i // experts], employee=employee,
+                service_type=expert_types[i % len(expert_types)],
+            )
+            for i, employee in enumerate(staff)
+        )
+
+        service_types = Service.ServiceType.values
+        rows = (
+            Service(
+                company=company_rows[i % companies], recipient=recipient, recipient_address=address,
+                title="service", phone="09120000000", descriptions="description",
+                service_status=Service.ServiceStatusChoices.PENDING,
+                service_type=service_types[i % len(service_types)],
+            )
+            for i in range(services)
+        )
+        while batch := list(islice(rows, 10000)):
+            Service.objects.bulk_create(batch)
+        self.stdout.write(
+            f"Seeded {services} services, {companies} companies and {len(staff)} experts "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+        # Planner statistics, as a live table has them: without any, SQLite
+        # reads `expert_id IS NULL` as selective and skips the primary key.
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 17:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Addresses', '0003_rename_recipient_recipientaddress_recipient'),
+        ('Companies', '0003_company_company_created_id_idx'),
+        ('Items', '0001_initial'),
+        ('Services', '0006_service_suggested_time_alter_service_finished_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['-created_at', '-id'], name='service_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 18:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Addresses', '0003_rename_recipient_recipientaddress_recipient'),
+        ('Companies', '0005_company_search_index'),
+        ('Items', '0001_initial'),
+        ('Services', '0007_service_service_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['company', '-created_at', '-id'], name='service_company_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['company', 'service_status', '-created_at', '-id'], name='service_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='service_recipient_created_idx'),
+        ),
+    ]
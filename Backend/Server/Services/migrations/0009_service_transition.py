@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 18:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Services', '0008_service_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('PE', 'درحال بررسی'), ('IP', 'درحال اجرا'), ('FI', 'تمام شده'), ('CA', 'کنسل شده'), ('FA', 'شکست خورده'), ('RE', 'گزارش شده')], max_length=3, verbose_name='وضعیت قبلی')),
+                ('to_status', models.CharField(choices=[('PE', 'درحال بررسی'), ('IP', 'درحال اجرا'), ('FI', 'تمام شده'), ('CA', 'کنسل شده'), ('FA', 'شکست خورده'), ('RE', 'گزارش شده')], max_length=3, verbose_name='وضعیت جدید')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='زمان')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='service_transitions', to=settings.AUTH_USER_MODEL, verbose_name='انجام دهنده')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='Services.service', verbose_name='سرویس')),
+            ],
+            options={
+                'verbose_name': 'تغییر وضعیت سرویس',
+                'verbose_name_plural': 'تغییرات وضعیت سرویس',
+                'indexes': [models.Index(fields=['service', 'created_at'], name='transition_service_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 18:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Addresses', '0003_rename_recipient_recipientaddress_recipient'),
+        ('Companies', '0005_company_search_index'),
+        ('Items', '0001_initial'),
+        ('Services', '0009_service_transition'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('service_status', 'PE')), fields=['expert', 'created_at', 'id'], name='service_dispatch_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Companies', '0005_company_search_index'),
+        ('Services', '0010_service_dispatch_queue_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpertSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField(verbose_name='زمان شروع')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expert_slots', to='Companies.company', verbose_name='شرکت')),
+                ('expert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='Companies.companyexpert', verbose_name='متخصص')),
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='slot', to='Services.service', verbose_name='سرویس')),
+            ],
+            options={
+                'verbose_name': 'نوبت متخصص',
+                'verbose_name_plural': 'نوبت\u200cهای متخصصان',
+                'indexes': [models.Index(fields=['company', 'starts_at'], name='expert_slot_company_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('expert', 'starts_at'), name='expert_slot_unique')],
+            },
+        ),
+    ]
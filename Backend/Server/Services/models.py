@@ -120,6 +120,23 @@ class Service(models.Model):
     class Meta:
         verbose_name = "سرویس"
         verbose_name_plural = "سرویس‌ها"
+        indexes = [
+            # Keyset pagination: ORDER BY created_at DESC, id DESC.
+            models.Index(fields=['-created_at', '-id'], name='service_created_id_idx'),
+            # Role feeds (feeds.service_feed), same order within one company
+            # or recipient, optionally one status.
+            models.Index(fields=['company', '-created_at', '-id'], name='service_company_created_idx'),
+            models.Index(
+                fields=['company', 'service_status', '-created_at', '-id'], name='service_company_status_idx'
+            ),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='service_recipient_created_idx'),
+            # Dispatch queue (Services.dispatch): pending services without an expert, oldest first.
+            models.Index(
+                fields=['expert', 'created_at', 'id'],
+                condition=models.Q(service_status='PE'),
+                name='service_dispatch_queue_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -145,6 +162,102 @@ class Service(models.Model):
         return None
 
 
+class ServiceTransition(models.Model):
+    """
+    One status change of a service, written by Services.transitions when
+    its conditional UPDATE wins.
+    """
+
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="transitions",
+        verbose_name="سرویس"
+    )
+
+    from_status = models.CharField(
+        max_length=3,
+        choices=Service.ServiceStatusChoices.choices,
+        verbose_name="وضعیت قبلی"
+    )
+
+    to_status = models.CharField(
+        max_length=3,
+        choices=Service.ServiceStatusChoices.choices,
+        verbose_name="وضعیت جدید"
+    )
+
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="service_transitions",
+        verbose_name="انجام دهنده",
+        null=True, blank=True
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان")
+
+    class Meta:
+        verbose_name = "تغییر وضعیت سرویس"
+        verbose_name_plural = "تغییرات وضعیت سرویس"
+        indexes = [
+            # A service's history, in order.
+            models.Index(fields=['service', 'created_at'], name='transition_service_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.service_id}: {self.from_status} -> {self.to_status}"
+
+
+class ExpertSlot(models.Model):
+    """
+    A booked slot of an expert's calendar, SERVICE_SLOT_MINUTES long,
+    reserved by Services.slots when a service is created. The unique
+    (expert, starts_at) pair makes booking one slot twice impossible; the
+    company is copied from the expert so a company's whole roster is one
+    range of the (company, starts_at) index.
+    """
+
+    expert = models.ForeignKey(
+        CompanyExpert,
+        on_delete=models.CASCADE,
+        related_name="slots",
+        verbose_name="متخصص"
+    )
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="expert_slots",
+        verbose_name="شرکت"
+    )
+
+    service = models.OneToOneField(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="slot",
+        verbose_name="سرویس"
+    )
+
+    starts_at = models.DateTimeField(verbose_name="زمان شروع")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
+
+    class Meta:
+        verbose_name = "نوبت متخصص"
+        verbose_name_plural = "نوبت‌های متخصصان"
+        constraints = [
+            models.UniqueConstraint(fields=['expert', 'starts_at'], name='expert_slot_unique'),
+        ]
+        indexes = [
+            # A company's bookings over a time range, every expert at once.
+            models.Index(fields=['company', 'starts_at'], name='expert_slot_company_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.expert_id} @ {self.starts_at:%Y-%m-%d %H:%M}"
+
+
 class ServicePayment(models.Model):
 
     class PaymentStatusChoices(models.TextChoices):
@@ -39,13 +39,13 @@ class IsServiceActionAllowed(BasePermission):
         if obj.recipient == request.user:
             return True
         
-        if obj.accountant.employee == request.user:
+        if obj.accountant_id and obj.accountant.employee_id == request.user.id:
             return True
         
-        if obj.expert.employee == request.user:
+        if obj.expert_id and obj.expert.employee_id == request.user.id:
             return True
         
-        if obj.receptionist.employee == request.user:
+        if obj.receptionist_id and obj.receptionist.employee_id == request.user.id:
             return True
         
         return False
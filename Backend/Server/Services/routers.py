@@ -13,6 +13,8 @@ class ServiceRouter(routers.DefaultRouter):
       - Create:    POST /services/create/
       - Retrieve:  GET /services/<id>/
       - Update:    PUT/PATCH /services/<id>/update/
+      - Transition: POST /services/transition/<id>/
+      - Slots:     GET /services/slots/
     """
     def __init__(self):
         super().__init__()
@@ -39,6 +41,10 @@ class ServiceRouter(routers.DefaultRouter):
                 path('detail/<uuid:id>/', ServiceViewSet.as_view({'get': 'retrieve'}), name='service-detail'),
                 # Update route: PUT/PATCH /services/update/<id>/
                 path('update/<uuid:id>/', ServiceViewSet.as_view({'put': 'update', 'patch': 'update'}), name='service-update'),
+                # Status change: POST /services/transition/<id>/
+                path('transition/<uuid:id>/', ServiceViewSet.as_view({'post': 'transition'}), name='service-transition'),
+                # Free expert slots: GET /services/slots/?company=<slug>
+                path('slots/', ServiceViewSet.as_view({'get': 'slots'}), name='service-slots'),
             ])),
         ]
         return custom_urls
@@ -1,6 +1,8 @@
 import uuid
+from django.db import transaction
 from rest_framework import serializers
 from .models import Service, ServicePayment
+from .slots import SlotUnavailable, reserve_slot
 from Companies.models import Company, CompanyCard, CompanyReceptionist, CompanyAccountant, CompanyExpert
 from Companies.serializers import CompanyCardSerializer
 from Addresses.models import RecipientAddress
@@ -8,10 +10,17 @@ from Addresses.models import RecipientAddress
 from Items.models import FirstItem, SecondItem
 from Items.serializers import FirstItemSerializer, SecondItemSerializer
 
+from Server.query_plans import QueryPlanMixin
+from Server.slug_resolver import slug_resolver
 
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+
+class ServiceSerializer(QueryPlanMixin, serializers.ModelSerializer):
+    # company.name, recipient.full_name and score (for overall_score) are
+    # joined in; the other relations are rendered as ids.
+    select_related_fields = ('company', 'recipient', 'score')
+
     # Read-only fields for display
     company = serializers.SlugRelatedField(read_only=True, slug_field='name')
     recipient = serializers.SlugRelatedField(read_only=True, slug_field='full_name')
@@ -76,6 +85,7 @@ class ServiceSerializer(serializers.ModelSerializer):
             "overall_score",
             "time_elapsed",
             "company_card",
+            "service_status",
         ]
     
     def get_overall_score(self, obj):
@@ -92,6 +102,10 @@ class ServiceSerializer(serializers.ModelSerializer):
           - Use company_slug to look up and validate the Company.
           - Look up the RecipientAddress using recipient_address_id.
           - Set the current user as the recipient.
+          - Book the slot of suggested_time with the least loaded free expert
+            (Services.slots); if they are all booked, answer with the nearest
+            free slots instead. Companies with nobody to book leave the
+            service to dispatch.
           - (No need for slug handling as the id is an auto-generated UUID.)
         """
         request = self.context.get("request")
@@ -108,15 +122,15 @@ class ServiceSerializer(serializers.ModelSerializer):
         company_slug = validated_data.pop("company_slug", None)
         if not company_slug:
             raise serializers.ValidationError({"company_slug": "Company slug is required."})
-        try:
-            company = Company.objects.get(slug=company_slug)
-        except Company.DoesNotExist:
+        # The id and both flags come from the shared slug cache.
+        company = slug_resolver.lookup(Company, company_slug)
+        if company is None:
             raise serializers.ValidationError({"company_slug": "Company not found."})
-        if not company.is_validated:
+        if not company["is_validated"]:
             raise serializers.ValidationError({"company": "The company is not validated."})
-        if getattr(company, "is_off_season", False):
+        if company["is_off_season"]:
             raise serializers.ValidationError({"company": "The company is currently off season."})
-        validated_data["company"] = company
+        validated_data["company_id"] = company["pk"]
 
         validated_data["recipient"] = user
 
@@ -130,25 +144,34 @@ class ServiceSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"recipient_address_id": "Recipient address not found."})
         validated_data["recipient_address"] = recipient_address
 
+        # Item slugs are resolved to ids through the shared slug cache.
         first_item_slug = validated_data.pop('first_item_slug', None)
         second_item_slug = validated_data.pop('second_item_slug', None)
 
         if first_item_slug:
-            try:
-                first_item = FirstItem.objects.get(slug=first_item_slug)
-            except:
+            first_item_id = slug_resolver.resolve(FirstItem, first_item_slug)
+            if first_item_id is None:
                 raise serializers.ValidationError({"First item": "First item not find."})
+            validated_data.pop('first_item', None)
+            validated_data['first_item_id'] = first_item_id
 
         if second_item_slug:
-            try:
-                second_item = SecondItem.objects.get(slug=second_item_slug)
-            except:
-                raise serializers.ValidationError({"First item": "First item not find."})
-        
-        validated_data['first_item'] = first_item
-        validated_data['second_item'] = second_item
+            second_item_id = slug_resolver.resolve(SecondItem, second_item_slug)
+            if second_item_id is None:
+                raise serializers.ValidationError({"Second item": "Second item not find."})
+            validated_data.pop('second_item', None)
+            validated_data['second_item_id'] = second_item_id
         
-        instance = Service.objects.create(**validated_data)
+        # The service only exists with its slot booked.
+        with transaction.atomic():
+            instance = Service.objects.create(**validated_data)
+            try:
+                reserve_slot(instance, validated_data["suggested_time"])
+            except SlotUnavailable as unavailable:
+                raise serializers.ValidationError({
+                    "suggested_time": "No expert is free at this time.",
+                    "available_slots": [start.isoformat() for start in unavailable.offers],
+                })
         return instance
 
     def update(self, instance, validated_data):
@@ -157,29 +180,34 @@ class ServiceSerializer(serializers.ModelSerializer):
 
         * If the current user is the service recipient (creator), update basic fields:
             title, phone, descriptions, image, first_item, second_item, service_type, recipient_address.
-        * If the current user is a receptionist – either already assigned or exists in CompanyReceptionist for the
-        service's company – update is_validated_by_receptionist, service_status and receptionist.
-        * If the current user is an accountant (either already assigned or found in CompanyAccountant for the
-        service's company), update the accountant field.
-        * If the current user is an expert (either already assigned or exists in CompanyExpert for the
-        service's company), update the expert field (and service_status, started_at, finished_at if provided).
+        * If the current user is the assigned receptionist, update is_validated_by_receptionist.
+        * If the current user is the assigned expert, update the expert field (and started_at,
+        finished_at if provided).
+
+        service_status is not written here: it only moves through Services.transitions.
+        Only the changed columns are saved.
         """
         request = self.context.get("request")
         user = request.user
+        changed = set()
 
         # --- Service recipient updates (creator) ---
         if instance.recipient == user:
             if "title" in validated_data:
                 instance.title = validated_data["title"]
+                changed.add('title')
 
             if "phone" in validated_data:
                 instance.phone = validated_data["phone"]
+                changed.add('phone')
 
             if "descriptions" in validated_data:
                 instance.descriptions = validated_data["descriptions"]
+                changed.add('descriptions')
 
             if "image" in validated_data:
                 instance.image = validated_data["image"]
+                changed.add('image')
 
             # Lookup first_item using 'first_item_slug'
             if "first_item_slug" in validated_data:
@@ -188,6 +216,7 @@ class ServiceSerializer(serializers.ModelSerializer):
                 except FirstItem.DoesNotExist:
                     raise serializers.ValidationError({"first_item_slug": "First item not found."})
                 instance.first_item = first_item
+                changed.add('first_item')
 
             # Lookup second_item using 'second_item_slug'
             if "second_item_slug" in validated_data:
@@ -196,9 +225,11 @@ class ServiceSerializer(serializers.ModelSerializer):
                 except SecondItem.DoesNotExist:
                     raise serializers.ValidationError({"second_item_slug": "Second item not found."})
                 instance.second_item = second_item
+                changed.add('second_item')
 
             if "service_type" in validated_data:
                 instance.service_type = validated_data["service_type"]
+                changed.add('service_type')
 
             if "recipient_address_id" in validated_data:
                 try:
@@ -206,24 +237,26 @@ class ServiceSerializer(serializers.ModelSerializer):
                 except RecipientAddress.DoesNotExist:
                     raise serializers.ValidationError({"recipient_address_id": "Address not found."})
                 instance.recipient_address = address
+                changed.add('recipient_address')
 
-        if instance.receptionist.employee == user:
+        if instance.receptionist and instance.receptionist.employee == user:
             if "is_validated_by_receptionist" in validated_data:
                 instance.is_validated_by_receptionist = validated_data["is_validated_by_receptionist"]
-            if "service_status" in validated_data:
-                instance.service_status = validated_data["service_status"]
+                changed.add('is_validated_by_receptionist')
 
-        if instance.expert.employee == user:
+        if instance.expert and instance.expert.employee == user:
             if "expert" in validated_data:
                 instance.expert = validated_data["expert"]
-            if "service_status" in validated_data:
-                instance.service_status = validated_data["service_status"]
+                changed.add('expert')
             if "started_at" in validated_data:
                 instance.started_at = validated_data["started_at"]
+                changed.add('started_at')
             if "finished_at" in validated_data:
                 instance.finished_at = validated_data["finished_at"]
+                changed.add('finished_at')
 
-        instance.save()
+        if changed:
+            instance.save(update_fields=changed | {'updated_at'})
         return instance
 
 
@@ -0,0 +1,190 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .experts import ranked_roster
+from .models import ExpertSlot, Service
+
+from Companies.availability import availability, minute_of_week
+
+
+
+
+class SlotUnavailable(Exception):
+    """
+    The requested slot cannot be booked; `offers` are the nearest free
+    slot starts after it.
+    """
+
+    def __init__(self, offers):
+        super().__init__("No expert is free at this time.")
+        self.offers = offers
+
+
+# -------------------------------
+# Slot grid
+# -------------------------------
+
+def slot_length():
+    return timedelta(minutes=getattr(settings, 'SERVICE_SLOT_MINUTES', 60))
+
+
+def slot_start(moment):
+    """
+    Start of the slot containing `moment`: slots tile each local day from
+    midnight.
+    """
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    length = int(slot_length().total_seconds() // 60)
+    minutes = moment.hour * 60 + moment.minute
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(minutes=minutes - minutes % length)
+
+
+def has_passed(start, now=None):
+    """
+    Whether the slot at `start` is over.
+    """
+    return start + slot_length() <= (now or timezone.now())
+
+
+def within_hours(company_id, start, schedules=None):
+    """
+    Whether the slot at `start` lies inside one of the company's WorkDay
+    shifts (a binary search in Companies.availability). Loops pass the
+    `schedules` of availability.fresh() so they check freshness once.
+    """
+    schedules = schedules or availability.fresh()
+    minute = minute_of_week(start)
+    open_until = schedules.open_until(company_id, minute)
+    return open_until is not None and minute + slot_length().total_seconds() // 60 <= open_until
+
+
+# -------------------------------
+# Calendars
+# -------------------------------
+
+def booked_experts(company_id, start):
+    """
+    Ids of the company's experts booked in the slot at `start`.
+    """
+    return set(ExpertSlot.objects.filter(company_id=company_id, starts_at=start).values_list('expert_id', flat=True))
+
+
+def roster_calendar(company_id, start, end, service_type=None):
+    """
+    Free slots of the company's whole expert roster between `start` and
+    `end`: {slot start: [free expert ids, least loaded first]}, for the
+    slots inside its working hours that still have a free expert.
+
+    Two queries, the roster and one range of the (company, starts_at)
+    index for every booking of every expert, and one read of the
+    company's hours, then a single pass over the slot grid.
+    """
+    experts = ranked_roster(company_id, service_type)
+    schedules = availability.fresh()
+    booked = defaultdict(set)
+    bookings = ExpertSlot.objects.filter(company_id=company_id, starts_at__gte=start, starts_at__lt=end)
+    for starts_at, expert_id in bookings.values_list('starts_at', 'expert_id'):
+        booked[starts_at].add(expert_id)
+
+    calendar = {}
+    step = slot_length()
+    moment = slot_start(start)
+    if moment < start:
+        moment += step
+    while moment < end:
+        if within_hours(company_id, moment, schedules):
+            free = [expert_id for expert_id in experts if expert_id not in booked[moment]]
+            if free:
+                calendar[moment] = free
+        moment += step
+    return calendar
+
+
+def nearest_free_slots(company_id, after, service_type=None, count=None):
+    """
+    The first `count` (SERVICE_SLOT_OFFERS) free slot starts from `after`
+    (or now, if later), looking SERVICE_SLOT_SEARCH_DAYS ahead.
+    """
+    count = count or getattr(settings, 'SERVICE_SLOT_OFFERS', 3)
+    after = max(after, timezone.now())
+    horizon = timedelta(days=getattr(settings, 'SERVICE_SLOT_SEARCH_DAYS', 7))
+    calendar = roster_calendar(company_id, after, after + horizon, service_type)
+    return sorted(calendar)[:count]
+
+
+# -------------------------------
+# Booking
+# -------------------------------
+
+def reserve_slot(service, moment):
+    """
+    Book the slot containing `moment` with the least loaded free expert of
+    the service's company (the order of Services.dispatch, under
+    DISPATCH_MAX_LOAD), make them the service's expert and move its
+    suggested_time to the slot start. The unique (expert, starts_at)
+    constraint settles races: losing one moves on to the next free expert.
+
+    Returns None, booking nothing, when the company has no working hours or
+    no expert who could take the service now: it waits for dispatch, which
+    books the slot when it assigns an expert.
+
+    Raises SlotUnavailable, with the nearest free slots, when the slot is
+    past, outside the company's hours, or every such expert is booked.
+    """
+    company_id = service.company_id
+    experts = ranked_roster(company_id, service.service_type)
+    schedules = availability.fresh()
+    if not experts or not schedules.has_schedule(company_id):
+        return None
+
+    start = slot_start(moment)
+    if not has_passed(start) and within_hours(company_id, start, schedules):
+        busy = booked_experts(company_id, start)
+        for expert_id in experts:
+            if expert_id in busy:
+                continue
+            try:
+                with transaction.atomic():
+                    slot = ExpertSlot.objects.create(
+                        expert_id=expert_id, company_id=company_id, service=service, starts_at=start
+                    )
+            except IntegrityError:
+                continue
+            service.expert_id = expert_id
+            service.suggested_time = start
+            Service.objects.filter(pk=service.pk).update(expert_id=expert_id, suggested_time=start)
+            return slot
+    raise SlotUnavailable(nearest_free_slots(company_id, start, service.service_type))
+
+
+def book_claimed_slot(service_id):
+    """
+    Book the slot of the service's suggested_time for the expert who just
+    claimed it (Services.claims). Nothing is booked for a service without
+    a suggested_time or whose slot is over.
+
+    Raises IntegrityError when the expert is booked in that slot already.
+    """
+    service = Service.objects.values('company_id', 'expert_id', 'suggested_time').get(pk=service_id)
+    if service['suggested_time'] is None:
+        return None
+    start = slot_start(service['suggested_time'])
+    if has_passed(start):
+        return None
+    with transaction.atomic():
+        return ExpertSlot.objects.create(
+            expert_id=service['expert_id'], company_id=service['company_id'], service_id=service_id, starts_at=start
+        )
+
+
+def release_slot(service_id):
+    """
+    Free the slot booked for a service (on cancellation).
+    """
+    ExpertSlot.objects.filter(service_id=service_id).delete()
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .dispatch import dispatch_pending_services
+
+
+
+
+@shared_task
+def dispatch_experts_task():
+    """
+    Dispatch cycle run every minute (CELERY_BEAT_SCHEDULE). Returns the
+    counts of dispatch_pending_services.
+    """
+    return dict(dispatch_pending_services())
@@ -1,3 +1,519 @@
-from django.test import TestCase
+import datetime
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Addresses.models import City, Province, RecipientAddress
+from Companies.availability import WEEKDAY_CODES, availability
+from Companies.models import Company, CompanyExpert, CompanyReceptionist, WorkDay
+from Industries.models import Industry, IndustryCategory
+from Profiles.models import ServiceProviderProfile
+from Scores.models import ServiceScore
+from Users.models import User
+
+from .models import ExpertSlot, Service, ServiceTransition
+from .claims import claim
+from .dispatch import dispatch_pending_services
+from .slots import SlotUnavailable, reserve_slot, roster_calendar
+from .transitions import InvalidTransition, transition
+
+
+
+
+class ServiceTestData(TestCase):
+    """
+    Two companies, their staff, and four services.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        def user(number, username, user_type):
+            return User.objects.create_user(
+                phone=f"091200001{number:02d}", username=username, email=f"{username}@example.com",
+                user_type=user_type, full_name=username.title(), password="password123",
+            )
+        cls.owner = user(1, "feed-owner", "OW")
+        cls.recipient = user(2, "feed-recipient", "SC")
+        cls.other_recipient = user(3, "feed-other", "SC")
+        cls.receptionist = user(4, "feed-receptionist", "SP")
+        cls.outsider = user(5, "feed-outsider", "SP")
+
+        category = IndustryCategory.objects.create(name="category", slug="category")
+        industry = Industry.objects.create(name="industry", slug="industry", category=category)
+        province = Province.objects.create(name="province", slug="province")
+        city = City.objects.create(name="city", slug="city", province=province)
+        cls.company = Company.objects.create(
+            employer=cls.owner, industry=industry, name="feed-company", is_validated=True
+        )
+        cls.other_company = Company.objects.create(
+            employer=cls.outsider, industry=industry, name="feed-other-company", is_validated=True
+        )
+        CompanyReceptionist.objects.create(company=cls.company, employee=cls.receptionist)
+
+        services = []
+        for i, (company, recipient) in enumerate([
+            (cls.company, cls.recipient),
+            (cls.company, cls.recipient),
+            (cls.company, cls.other_recipient),
+            (cls.other_company, cls.recipient),
+        ]):
+            address = RecipientAddress.objects.create(city=city, recipient=recipient, title="home", address="street")
+            services.append(Service.objects.create(
+                company=company, recipient=recipient, recipient_address=address,
+                title=f"service-{i}", phone="09120000002", descriptions="description",
+                service_type=Service.ServiceType.IN_HOUSE_SERVICE,
+                service_status="IP" if i == 0 else "PE",
+            ))
+        ServiceScore.objects.create(service=services[0], quality=6, behavior=9, time=9)
+        cls.services = services
+
+        cls.expert = user(6, "feed-expert", "SP")
+        cls.expert_row = CompanyExpert.objects.create(company=cls.company, employee=cls.expert)
+        cls.receptionist_row = CompanyReceptionist.objects.get(employee=cls.receptionist)
+
+
+class ServiceFeedTests(ServiceTestData):
+    """
+    The service list is scoped to the caller's role, and each page costs
+    the same number of queries however many services it shows.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self, user, **params):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client.get("/services/service/", params)
+
+    def titles(self, response):
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(service["title"] for service in response.data["results"])
+
+    def test_recipient_feed(self):
+        with self.assertNumQueries(1):
+            response = self.feed(self.recipient)
+        self.assertEqual(self.titles(response), ["service-0", "service-1", "service-3"])
+        scores = {service["title"]: service["overall_score"] for service in response.data["results"]}
+        self.assertEqual(scores["service-0"], 8)
+        self.assertEqual(response.data["results"][0]["recipient"], "Feed-Recipient")
+
+    def test_owner_feed(self):
+        with self.assertNumQueries(2):  # owned companies, page
+            response = self.feed(self.owner)
+        self.assertEqual(self.titles(response), ["service-0", "service-1", "service-2"])
+        self.assertEqual(self.feed(self.owner, company="feed-other-company").status_code, 403)
+
+        Company.objects.create(employer=self.owner, industry=self.company.industry, name="second-company")
+        self.assertEqual(self.feed(self.owner).status_code, 400)
+        self.assertEqual(len(self.titles(self.feed(self.owner, company="feed-company"))), 3)
+
+    def test_company_role_feed(self):
+        params = {"role": "receptionist", "company": "feed-company"}
+        self.feed(self.receptionist, **params)  # warms the slug cache
+        with self.assertNumQueries(2):  # membership, page
+            response = self.feed(self.receptionist, **params)
+        self.assertEqual(self.titles(response), ["service-0", "service-1", "service-2"])
+        self.assertEqual(self.titles(self.feed(self.receptionist, status="PE", **params)), ["service-1", "service-2"])
+
+        self.assertEqual(self.feed(self.outsider, **params).status_code, 403)
+        self.assertEqual(self.feed(self.receptionist, role="receptionist").status_code, 400)
+        self.assertEqual(self.feed(self.receptionist).status_code, 400)  # no default role
+        self.assertEqual(self.feed(self.receptionist, status="XX", **params).status_code, 400)
+
+    def test_staff_and_anonymous(self):
+        admin = User.objects.create_superuser(
+            phone="09120000199", username="feed-admin", email="feed-admin@example.com",
+            full_name="Admin", password="password123",
+        )
+        self.assertEqual(len(self.titles(self.feed(admin))), 4)
+        self.assertIn(self.feed(None).status_code, (401, 403))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_service_feeds", services=50, companies=2, recipients=5, samples=3, stdout=out)
+        self.assertIn("receptionist, page 2:", out.getvalue())
+        self.assertIn("Query plan, recipient:", out.getvalue())
+        self.assertEqual(Service.objects.count(), 4)
+
+
+
+class ServiceTransitionTests(ServiceTestData):
+    """
+    Status changes are single conditional UPDATEs: the first of two
+    competing moves wins, the second is told about the conflict.
+    """
+
+    def setUp(self):
+        self.service = self.services[1]  # pending, at feed-company
+        Service.objects.filter(pk=self.service.pk).update(
+            expert=self.expert_row, receptionist=self.receptionist_row
+        )
+
+    def post(self, user, **data):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f"/services/service/transition/{self.service.pk}/", data, format="json")
+
+    def test_one_update_and_a_log_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(transition(self.service.pk, "PE", "IP", self.expert))
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.service_status, "IP")
+        self.assertIsNotNone(self.service.started_at)
+        log = ServiceTransition.objects.get()
+        self.assertEqual((log.from_status, log.to_status, log.actor), ("PE", "IP", self.expert))
+
+    def test_only_the_first_competing_move_wins(self):
+        self.assertTrue(transition(self.service.pk, "PE", "IP", self.receptionist))
+        self.assertFalse(transition(self.service.pk, "PE", "IP", self.expert))
+        self.assertFalse(transition(self.service.pk, "PE", "CA", self.recipient))
+        self.assertEqual(ServiceTransition.objects.count(), 1)
+
+        response = self.post(self.expert, **{"from": "PE", "to": "IP"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["service_status"], "IP")
+
+    def test_roles_and_lifecycle(self):
+        with self.assertRaises(InvalidTransition):
+            transition(self.service.pk, "PE", "FI", self.expert)
+        self.assertEqual(self.post(self.expert, **{"from": "PE", "to": "FI"}).status_code, 400)
+        # The recipient may cancel but not start, outsiders nothing.
+        self.assertEqual(self.post(self.recipient, **{"from": "PE", "to": "IP"}).status_code, 403)
+        self.assertEqual(self.post(self.outsider, **{"from": "PE", "to": "CA"}).status_code, 403)
+        self.assertEqual(self.post(self.recipient, **{"from": "PE", "to": "CA"}).status_code, 200)
+
+    def test_update_routes_the_status_through_the_engine(self):
+        client = APIClient()
+        client.force_authenticate(self.expert)
+        url = f"/services/service/update/{self.service.pk}/"
+        response = client.patch(url, {"service_status": "IP"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["data"]["service_status"], "IP")
+        self.assertEqual(ServiceTransition.objects.get().to_status, "IP")
+
+        response = client.patch(url, {"service_status": "CA"}, format="json")
+        self.assertEqual(response.status_code, 403)  # only a receptionist cancels a running service
+
+    def test_failed_update_undoes_the_status_move(self):
+        client = APIClient()
+        client.force_authenticate(self.recipient)
+        url = f"/services/service/update/{self.service.pk}/"
+        response = client.patch(url, {"service_status": "CA", "first_item_slug": "missing"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.service_status, "PE")
+        self.assertFalse(ServiceTransition.objects.exists())
+
+
+class ServiceClaimTests(ServiceTestData):
+    """
+    Staff take a service's seat with one conditional UPDATE; a seat that is
+    already taken answers 409.
+    """
+
+    def setUp(self):
+        self.service = self.services[2]  # no staff yet, at feed-company
+
+    def get(self, user, role):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f"/services/service/set-{role}/{self.service.pk}/")
+
+    def test_claim_is_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(claim(self.service.pk, "receptionist", self.receptionist))
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("UPDATE"))
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.receptionist, self.receptionist_row)
+
+    def test_expert_claim_books_the_slot(self):
+        start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + datetime.timedelta(days=2)
+        Service.objects.filter(pk__in=[self.services[1].pk, self.service.pk]).update(suggested_time=start)
+
+        self.assertTrue(claim(self.services[1].pk, "expert", self.expert))
+        self.assertEqual(ExpertSlot.objects.get(service=self.services[1]).starts_at, start)
+
+        # Booked at that time already: the seat stays free.
+        response = self.get(self.expert, "expert")
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("booked", response.data["massage"])
+        self.service.refresh_from_db()
+        self.assertIsNone(self.service.expert)
+        self.assertFalse(ExpertSlot.objects.filter(service=self.service).exists())
+
+    def test_second_expert_gets_a_conflict(self):
+        rival = User.objects.create_user(
+            phone="09120000107", username="feed-rival", email="feed-rival@example.com",
+            user_type="SP", full_name="Rival", password="password123",
+        )
+        CompanyExpert.objects.create(company=self.company, employee=rival)
+
+        self.assertEqual(self.get(self.expert, "expert").status_code, 202)
+        self.assertEqual(self.get(rival, "expert").status_code, 409)
+        self.assertEqual(self.get(self.expert, "expert").status_code, 200)
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.expert, self.expert_row)
+
+    def test_only_members_of_the_company(self):
+        self.assertEqual(self.get(self.outsider, "receptionist").status_code, 403)
+        self.assertEqual(self.get(self.expert, "accountant").status_code, 403)
+        self.assertEqual(self.get(self.receptionist, "receptionist").status_code, 202)
+        other = self.services[3]  # at the other company
+        self.assertFalse(claim(other.pk, "receptionist", self.receptionist))
+
+
+class DispatchTests(ServiceTestData):
+    """
+    Pending services go to the least loaded available expert of their
+    company who handles their service type, while the company is open.
+    """
+
+    def setUp(self):
+        WorkDay.objects.bulk_create(
+            WorkDay(company=company, day_of_week=day, open_time=datetime.time(0), close_time=datetime.time(0))
+            for company in (self.company, self.other_company)
+            for day in WEEKDAY_CODES
+        )
+        availability.invalidate()
+        self.addCleanup(availability.invalidate)
+        # services[1] and [2] are pending at feed-company, [3] at the other one.
+        self.pending = self.services[1:]
+        self.expert_row.service_type = CompanyExpert.ExpertServiceType.IN_HOUSE
+        self.expert_row.save()
+
+    def new_expert(self, number, company=None, service_type="BO"):
+        employee = User.objects.create_user(
+            phone=f"091200002{number:02d}", username=f"dispatch-{number}", email=f"dispatch-{number}@example.com",
+            user_type="SP", full_name="Expert", password="password123",
+        )
+        return CompanyExpert.objects.create(company=company or self.company, employee=employee, service_type=service_type)
+
+    def experts(self):
+        return list(Service.objects.filter(pk__in=[s.pk for s in self.pending]).order_by("title").values_list("expert", flat=True))
+
+    def test_compatible_and_available_experts_only(self):
+        self.new_expert(1, service_type="CP")  # cannot take in-house services
+        off_duty = self.new_expert(2)
+        ServiceProviderProfile.objects.filter(user=off_duty.employee).update(is_available=False)
+
+        counts = dispatch_pending_services(max_load=5)
+        self.assertEqual(counts["assigned"], 2)
+        self.assertEqual(counts["no_expert"], 1)  # nobody at the other company
+        self.assertEqual(self.experts(), [self.expert_row.pk, self.expert_row.pk, None])
+
+    def test_load_is_spread_and_capped(self):
+        second = self.new_expert(3)
+        Service.objects.filter(pk=self.services[0].pk).update(expert=self.expert_row)
+        counts = dispatch_pending_services(max_load=1)
+        # The expert already has services[0] in progress: only the idle one is free.
+        self.assertEqual(counts["assigned"], 1)
+        self.assertEqual(self.experts()[:2], [second.pk, None])
+
+        Service.objects.filter(pk=self.services[0].pk).update(service_status="FI")
+        dispatch_pending_services(max_load=1)
+        self.assertEqual(self.experts()[:2], [second.pk, self.expert_row.pk])
+
+    def test_bulk_assignment_in_one_update(self):
+        self.new_expert(4)
+        with CaptureQueriesContext(connection) as queries:
+            dispatch_pending_services(max_load=5)
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+
+    def test_availability_checked_once_per_cycle(self):
+        with mock.patch.object(cache, "get_or_set", wraps=cache.get_or_set) as get_or_set:
+            dispatch_pending_services(max_load=5, batch_size=1)
+        keys = [call.args[0] for call in get_or_set.call_args_list]
+        self.assertEqual(keys.count(availability.generation_key), 1)
+
+    def test_closed_companies_and_claimed_seats_wait(self):
+        WorkDay.objects.filter(company=self.company).update(is_closed=True)
+        availability.invalidate()
+        self.new_expert(5, company=self.other_company)
+        counts = dispatch_pending_services(max_load=5)
+        self.assertEqual((counts["closed"], counts["assigned"]), (2, 1))
+
+        # A seat claimed by hand is never overwritten.
+        claimed = self.services[3]
+        rival = self.new_expert(6, company=self.other_company)
+        Service.objects.filter(pk=claimed.pk).update(expert=rival)
+        dispatch_pending_services(max_load=5)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.expert, rival)
+
+    def test_simulation_command(self):
+        out = StringIO()
+        call_command("simulate_dispatch", services=200, companies=4, experts=5, stdout=out)
+        self.assertIn("services/s", out.getvalue())
+        self.assertEqual(Service.objects.count(), 4)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SlotBookingTests(ServiceTestData):
+    """
+    Creating a service books a slot of a free expert inside the company's
+    hours; a taken or closed slot is answered with the nearest free ones.
+    """
+
+    def setUp(self):
+        WorkDay.objects.bulk_create(
+            WorkDay(company=self.company, day_of_week=day, open_time=datetime.time(9), close_time=datetime.time(17))
+            for day in WEEKDAY_CODES
+        )
+        availability.invalidate()
+        self.addCleanup(availability.invalidate)
+        CompanyExpert.objects.filter(pk=self.expert_row.pk).update(service_type="BO")
+        self.day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=8)
+        self.address = self.services[1].recipient_address
+
+    def at(self, hour, minute=0):
+        return self.day + datetime.timedelta(hours=hour, minutes=minute)
+
+    def create(self, moment, company="feed-company"):
+        client = APIClient()
+        client.force_authenticate(self.recipient)
+        return client.post("/services/service/create/", {
+            "company_slug": company, "recipient_address_id": self.address.pk,
+            "title": "booked", "phone": "09120000002", "descriptions": "description",
+            "service_type": "IHS", "suggested_time": moment.isoformat(),
+            "image": SimpleUploadedFile("photo.txt", b"photo"),
+        }, format="multipart")
+
+    def test_create_books_the_slot(self):
+        response = self.create(self.at(10, 30))
+        self.assertEqual(response.status_code, 201, response.data)
+        service = Service.objects.get(pk=response.data["data"]["id"])
+        self.assertEqual(service.expert, self.expert_row)
+        self.assertEqual(service.suggested_time, self.at(10))
+        self.assertEqual(service.slot.starts_at, self.at(10))
+
+    def test_company_flags_come_from_the_slug_cache(self):
+        self.assertEqual(self.create(self.at(10)).status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.create(self.at(11)).status_code, 201)
+        company_reads = [q["sql"] for q in queries if q["sql"].startswith("SELECT") and 'FROM "Companies_company" ' in q["sql"]]
+        # Only the response's; the flags were checked from the cache.
+        self.assertEqual(len(company_reads), 1)
+
+    def test_taken_slot_offers_the_nearest_free_ones(self):
+        self.assertEqual(self.create(self.at(10)).status_code, 201)
+        response = self.create(self.at(10, 15))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["available_slots"][:2], [self.at(11).isoformat(), self.at(12).isoformat()])
+        self.assertEqual(Service.objects.filter(title="booked").count(), 1)  # rolled back
+
+        # A second expert takes the same hour.
+        second = User.objects.create_user(
+            phone="09120000301", username="slot-expert", email="slot-expert@example.com",
+            user_type="SP", full_name="Second", password="password123",
+        )
+        CompanyExpert.objects.create(company=self.company, employee=second, service_type="IH")
+        self.assertEqual(self.create(self.at(10, 15)).status_code, 201)
+        self.assertEqual(ExpertSlot.objects.filter(starts_at=self.at(10)).count(), 2)
+
+    def test_outside_hours_or_in_the_past(self):
+        response = self.create(self.at(17, 30))  # after closing time
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["available_slots"][0], (self.at(9) + datetime.timedelta(days=1)).isoformat())
+        self.assertEqual(self.create(self.at(10) - datetime.timedelta(days=10)).status_code, 400)
+
+    def test_cancelling_frees_the_slot(self):
+        service_id = self.create(self.at(10)).data["data"]["id"]
+        self.assertTrue(transition(service_id, "PE", "CA", self.recipient))
+        self.assertFalse(ExpertSlot.objects.exists())
+        self.assertEqual(self.create(self.at(10)).status_code, 201)
+
+    def second_expert(self):
+        employee = User.objects.create_user(
+            phone="09120000302", username="slot-second", email="slot-second@example.com",
+            user_type="SP", full_name="Second", password="password123",
+        )
+        return CompanyExpert.objects.create(company=self.company, employee=employee, service_type="BO")
+
+    def test_lost_race_moves_on(self):
+        second = self.second_expert()
+        # Booked by a concurrent request after this one read the free experts.
+        ExpertSlot.objects.create(expert=self.expert_row, company=self.company, service=self.services[1], starts_at=self.at(9))
+        with mock.patch("Services.slots.booked_experts", return_value=set()):
+            slot = reserve_slot(self.services[2], self.at(9))
+            self.assertEqual(slot.expert, second)
+
+            # With nobody left, the constraint refuses every attempt.
+            Service.objects.filter(pk=self.services[3].pk).update(company=self.company)
+            self.services[3].refresh_from_db()
+            with self.assertRaises(SlotUnavailable) as raised:
+                reserve_slot(self.services[3], self.at(9))
+        self.assertEqual(raised.exception.offers[0], self.at(10))
+        self.assertEqual(ExpertSlot.objects.filter(starts_at=self.at(9)).count(), 2)
+
+    def test_least_loaded_expert_is_booked(self):
+        second = self.second_expert()
+        Service.objects.filter(pk=self.services[1].pk).update(expert=self.expert_row)
+        service = Service.objects.get(pk=self.create(self.at(10)).data["data"]["id"])
+        self.assertEqual(service.expert, second)
+
+    @override_settings(DISPATCH_MAX_LOAD=1)
+    def test_nobody_to_book_leaves_the_service_to_dispatch(self):
+        # The only expert is at DISPATCH_MAX_LOAD, the other company has none.
+        Service.objects.filter(pk=self.services[1].pk).update(expert=self.expert_row)
+        for company in ("feed-company", "feed-other-company"):
+            response = self.create(self.at(10), company=company)
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertIsNone(response.data["data"]["expert"])
+        self.assertFalse(ExpertSlot.objects.exists())
+
+    def test_dispatch_does_not_book_past_slots(self):
+        late = self.services[2]
+        Service.objects.filter(pk=late.pk).update(suggested_time=self.at(9))
+        dispatch_pending_services(now=self.at(10))  # the 9:00 slot is over
+        late.refresh_from_db()
+        self.assertEqual(late.expert, self.expert_row)
+        self.assertFalse(ExpertSlot.objects.filter(service=late).exists())
+
+    def test_dispatch_books_the_slot(self):
+        waiting = self.services[2]
+        Service.objects.filter(pk=waiting.pk).update(suggested_time=self.at(10, 20))
+        ExpertSlot.objects.create(expert=self.expert_row, company=self.company, service=self.services[1], starts_at=self.at(10))
+
+        # The only expert is booked at 10:00: the service keeps waiting.
+        dispatch_pending_services()
+        waiting.refresh_from_db()
+        self.assertIsNone(waiting.expert)
+
+        second = self.second_expert()
+        dispatch_pending_services()
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.expert, second)
+        self.assertEqual(waiting.slot.starts_at, self.at(10))
+        self.assertEqual(waiting.slot.expert, second)
+
+    def test_roster_calendar_in_one_pass(self):
+        self.create(self.at(13))
+        availability.is_open(self.company.pk, 0)  # warms the hours index
+        with self.assertNumQueries(2):  # roster, bookings
+            with mock.patch.object(cache, "get_or_set", wraps=cache.get_or_set) as get_or_set:
+                calendar = roster_calendar(self.company.pk, self.day, self.day + datetime.timedelta(days=1))
+        get_or_set.assert_called_once_with(availability.generation_key, 0, timeout=None)
+        self.assertEqual(sorted(calendar), [self.at(hour) for hour in range(9, 17) if hour != 13])
+        self.assertEqual(calendar[self.at(9)], [self.expert_row.pk])
+
+        client = APIClient()
+        response = client.get("/services/service/slots/", {"company": "feed-company", "from": self.day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["slots"]), 7)
+        self.assertEqual(client.get("/services/service/slots/", {"company": "nope"}).status_code, 400)
@@ -0,0 +1,105 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Service, ServiceTransition
+from .slots import release_slot
+
+from Companies.models import CompanyExpert, CompanyReceptionist
+
+
+
+
+Status = Service.ServiceStatusChoices
+
+# (from, to) -> roles allowed to make the move. Staff may make any of them.
+TRANSITIONS = {
+    (Status.PENDING, Status.IN_PROGRESS): {'receptionist', 'expert'},
+    (Status.PENDING, Status.CANCELED): {'recipient', 'receptionist'},
+    (Status.IN_PROGRESS, Status.FINISHED): {'expert'},
+    (Status.IN_PROGRESS, Status.FAILED): {'receptionist', 'expert'},
+    (Status.IN_PROGRESS, Status.CANCELED): {'receptionist'},
+    (Status.FINISHED, Status.REPORTED): {'recipient'},
+    (Status.FAILED, Status.REPORTED): {'recipient'},
+}
+
+# Timestamps stamped by a move into the status.
+STAMPS = {
+    Status.IN_PROGRESS: 'started_at',
+    Status.FINISHED: 'finished_at',
+    Status.FAILED: 'finished_at',
+}
+
+
+class InvalidTransition(Exception):
+    pass
+
+
+def actor_filter(user, roles):
+    """
+    Q matching the services on which `user` holds one of `roles`, so the
+    permission check rides along in the UPDATE's WHERE clause. Subqueries
+    rather than joins keep it a plain single-table UPDATE.
+    """
+    if user.is_staff:
+        return Q()
+    lookups = {
+        'recipient': Q(recipient=user),
+        'receptionist': Q(receptionist__in=CompanyReceptionist.objects.filter(employee=user).values('pk')),
+        'expert': Q(expert__in=CompanyExpert.objects.filter(employee=user).values('pk')),
+    }
+    allowed = Q(pk__in=[])
+    for role in roles:
+        allowed |= lookups[role]
+    return allowed
+
+
+def transition(service_id, from_status, to_status, user):
+    """
+    Move a service from `from_status` to `to_status` as `user`, in one
+    conditional UPDATE:
+
+        UPDATE service SET service_status = :to, ...
+        WHERE id = :id AND service_status = :from AND <user holds an allowed role>
+
+    Of several concurrent moves out of the same status exactly one matches,
+    without locks; the others get False. A won move is recorded in
+    ServiceTransition in the same transaction; a cancellation also frees
+    the service's booked slot.
+
+    Returns whether this call made the move; see explain_refusal for why
+    not. Raises InvalidTransition for a move the lifecycle does not have.
+    """
+    roles = TRANSITIONS.get((from_status, to_status))
+    if roles is None:
+        raise InvalidTransition(f"{from_status} -> {to_status} is not a service transition.")
+
+    now = timezone.now()
+    changes = {'service_status': to_status, 'updated_at': now}
+    if to_status in STAMPS:
+        changes[STAMPS[to_status]] = now
+
+    with transaction.atomic():
+        won = Service.objects.filter(
+            actor_filter(user, roles), pk=service_id, service_status=from_status
+        ).update(**changes)
+        if won:
+            ServiceTransition.objects.create(
+                service_id=service_id, from_status=from_status, to_status=to_status, actor=user
+            )
+            if to_status == Status.CANCELED:
+                release_slot(service_id)
+    return bool(won)
+
+
+def explain_refusal(service_id, from_status):
+    """
+    After a lost transition: 'not_found', 'conflict' (the service is no
+    longer in `from_status`) or 'forbidden', with the current status.
+    """
+    current = Service.objects.filter(pk=service_id).values_list('service_status', flat=True).first()
+    if current is None:
+        return 'not_found', None
+    if current != from_status:
+        return 'conflict', current
+    return 'forbidden', current
@@ -1,4 +1,10 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from rest_framework import viewsets, status
 from rest_framework.response import Response
@@ -6,22 +12,32 @@ from rest_framework.response import Response
 from .models import Service, ServicePayment
 from .serializers import ServiceSerializer, ServicePaymentSerializer
 from .permissions import IsServiceActionAllowed, IsServicePaymentActionAllowed
+from .feeds import service_feed
+from .transitions import InvalidTransition, explain_refusal, transition
+from .claims import claim, explain_claim_refusal
+from .slots import roster_calendar
 
-from Companies.models import CompanyAccountant, CompanyExpert, CompanyReceptionist
+from Companies.models import Company
+from Server.pagination import PaginatedViewSetMixin
+from Server.slug_resolver import slug_resolver
 
 
 
 
 
-class ServiceViewSet(viewsets.ViewSet):
+class ServiceViewSet(PaginatedViewSetMixin, viewsets.ViewSet):
     """
     A ViewSet for managing Service records using id as lookup.
     
     Endpoints:
-      - List:      GET /services/
+      - List:      GET /services/?role=<role>&company=<slug>&status=<status>
+                   (cursor paginated, newest first; see feeds.service_feed)
       - Create:    POST /services/create/
       - Retrieve:  GET /services/<id>/
       - Update:    PUT/PATCH /services/<slug>/update/
+      - Transition: POST /services/transition/<id>/ {"from": "PE", "to": "IP"}
+      - Slots:     GET /services/slots/?company=<slug>&service_type=<type>&from=<datetime>&days=<n>
+                   (free slots of the company's experts; see slots.roster_calendar)
     
     Note: The destroy method is not provided.
     """
@@ -29,12 +45,18 @@ class ServiceViewSet(viewsets.ViewSet):
     lookup_field = 'id'
 
     def list(self, request):
-        queryset = Service.objects.all()
-        serializer = ServiceSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        queryset = service_feed(
+            request.user,
+            role=request.query_params.get('role'),
+            company_slug=request.query_params.get('company'),
+            service_status=request.query_params.get('status'),
+        )
+        page = self.paginate_queryset(ServiceSerializer.setup_eager_loading(queryset))
+        serializer = ServiceSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
     def retrieve(self, request, id):
-        service = get_object_or_404(Service, id=id)
+        service = get_object_or_404(ServiceSerializer.setup_eager_loading(Service.objects.all()), id=id)
         self.check_object_permissions(request, service)
         serializer = ServiceSerializer(service, context={'request': request})
         return Response(serializer.data)
@@ -55,7 +77,16 @@ class ServiceViewSet(viewsets.ViewSet):
         self.check_object_permissions(request, service)
         serializer = ServiceSerializer(service, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
-            service = serializer.save()
+            # The status move and the other changes commit together: a save
+            # that fails (e.g. an unknown item slug) undoes the move too.
+            with transaction.atomic():
+                if 'service_status' in request.data and request.data['service_status'] != service.service_status:
+                    # From the status this request read: a concurrent change is a conflict.
+                    refusal = self.apply_transition(request, id, service.service_status, request.data['service_status'])
+                    if refusal is not None:
+                        return refusal
+                    service.refresh_from_db()
+                service = serializer.save()
             response_serializer = ServiceSerializer(service, context={'request': request})
             return Response({
                 'message': 'Service updated successfully.',
@@ -64,45 +95,105 @@ class ServiceViewSet(viewsets.ViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
+    def transition(self, request, id):
+        from_status, to_status = request.data.get('from'), request.data.get('to')
+        if not from_status or not to_status:
+            return Response({'error': 'Both "from" and "to" are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        refusal = self.apply_transition(request, id, from_status, to_status)
+        if refusal is not None:
+            return refusal
+        return Response({'service_status': to_status}, status=status.HTTP_200_OK)
+
+    def apply_transition(self, request, id, from_status, to_status):
+        """
+        Run the transition; None if it was made, otherwise the error response.
+        """
+        try:
+            if transition(id, from_status, to_status, request.user):
+                return None
+        except InvalidTransition as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        reason, current = explain_refusal(id, from_status)
+        if reason == 'not_found':
+            return Response({'error': 'Service not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if reason == 'conflict':
+            return Response(
+                {'error': 'The service status has changed.', 'service_status': current},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            {'error': 'You may not make this status change.'}, status=status.HTTP_403_FORBIDDEN
+        )
+
+
     def my_services(self, request):
-        queryset = Service.objects.filter(recipient=request.user)
+        queryset = Service.objects.filter(recipient=request.user).order_by('-created_at', '-id')
         if queryset is None:
             return Response({"massage": "There is no services for you."}, status=status.HTTP_400_BAD_REQUEST)
         serializer = ServiceSerializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 
+    def slots(self, request):
+        company_id = slug_resolver.resolve(Company, request.query_params.get('company', ''))
+        if company_id is None:
+            return Response({"company": "Company not found."}, status=status.HTTP_400_BAD_REQUEST)
+        start = timezone.now()
+        if request.query_params.get('from'):
+            start = parse_datetime(request.query_params['from'])
+            if start is None:
+                return Response({"from": "Not a date and time."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(start):
+                start = timezone.make_aware(start)
+        try:
+            days = int(request.query_params.get('days', 1))
+        except ValueError:
+            return Response({"days": "Not a number."}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(max(days, 1), getattr(settings, 'SERVICE_SLOT_SEARCH_DAYS', 7))
+
+        calendar = roster_calendar(
+            company_id, start, start + timedelta(days=days), request.query_params.get('service_type')
+        )
+        return Response({
+            "slots": [{"starts_at": moment, "experts": experts} for moment, experts in sorted(calendar.items())]
+        }, status=status.HTTP_200_OK)
+
+
     def set_receptionist_service(self, request, id):
-        queryset = get_object_or_404(Service, id=id)
-        if CompanyReceptionist.objects.filter(company=queryset.company, employee=request.user).exists():
-            instance = CompanyReceptionist.objects.get(company=queryset.company, employee=request.user)
-            queryset.receptionist = instance
-            queryset.save()
-            return Response({"massage": "You have became the receptionist in this service"}, status=status.HTTP_202_ACCEPTED)
-        else:
-            return Response({"massage": "You are not a receptionist in this company"})
-        
+        return self.claim_seat(request, id, 'receptionist')
 
     def set_accountant_service(self, request, id):
-        queryset = get_object_or_404(Service, id=id)
-        if CompanyAccountant.objects.filter(company=queryset.company, employee=request.user).exists():
-            instance = CompanyAccountant.objects.get(company=queryset.company, employee=request.user)
-            queryset.accountant = instance
-            queryset.save()
-            return Response({"massage": "You have became the accountant in this service"}, status=status.HTTP_202_ACCEPTED)
-        else:
-            return Response({"massage": "You are not a accountant in this company"})
-        
-    
+        return self.claim_seat(request, id, 'accountant')
+
     def set_expert_service(self, request, id):
-        queryset = get_object_or_404(Service, id=id)
-        if CompanyExpert.objects.filter(company=queryset.company, employee=request.user).exists():
-            instance = CompanyExpert.objects.get(company=queryset.company, employee=request.user)
-            queryset.expert = instance
-            queryset.save()
-            return Response({"massage": "You have became the expert in this service"}, status=status.HTTP_202_ACCEPTED)
-        else:
-            return Response({"massage": "You are not a expert in this company"})
+        return self.claim_seat(request, id, 'expert')
+
+    def claim_seat(self, request, id, role):
+        """
+        Take the service's `role` seat in one conditional UPDATE (see
+        Services.claims); 409 if someone else holds it, or if an expert is
+        booked at the service's time already.
+        """
+        if not request.user.is_authenticated:
+            return Response({"massage": "Authentication is required."}, status=status.HTTP_401_UNAUTHORIZED)
+        if claim(id, role, request.user):
+            return Response({"massage": f"You have became the {role} in this service"}, status=status.HTTP_202_ACCEPTED)
+
+        reason = explain_claim_refusal(id, role, request.user)
+        if reason == 'mine':
+            return Response({"massage": f"You are already the {role} in this service"}, status=status.HTTP_200_OK)
+        if reason == 'not_found':
+            return Response({"massage": "Service not found."}, status=status.HTTP_404_NOT_FOUND)
+        if reason == 'forbidden':
+            return Response({"massage": f"You are not a {role} in this company"}, status=status.HTTP_403_FORBIDDEN)
+        if reason == 'booked':
+            return Response(
+                {"massage": "You are already booked at this service's time"}, status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            {"massage": f"Another {role} has already taken this service"}, status=status.HTTP_409_CONFLICT
+        )
 
 
 class ServicePaymentViewSet(viewsets.ViewSet):
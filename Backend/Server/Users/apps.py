@@ -6,7 +6,3 @@ class UsersConfig(AppConfig):
 
     name = 'Users'
     verbose_name = 'کاربران'
-
-
-    def ready(self):
-        import Users.signals
\ No newline at end of file
@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Users.models import User
+from Users.provisioning import export_rows, import_users
+
+
+
+class Command(BaseCommand):
+    help = "Measure users imported and exported per second, with throwaway users rolled back at the end."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help="Users imported per case.")
+        parser.add_argument('--workers', type=int, help="Processes hashing passwords.")
+        parser.add_argument('--batch-size', type=int, help="Users per transaction.")
+
+    def rows(self, prefix, count, password):
+        user_types = User.UserTypes.values
+        for i in range(count):
+            yield {
+                'phone': f"{prefix}{i:09d}",
+                'username': f"benchmark-{prefix}-{i}",
+                'email': f"benchmark-{prefix}-{i}@example.com",
+                'full_name': 'Benchmark',
+                'user_type': user_types[i % len(user_types)],
+                'password': password,
+            }
+
+    def handle(self, *args, **options):
+        count = options['rows']
+        self.stdout.write(f"Password hasher: {get_hasher().algorithm}")
+
+        with transaction.atomic():
+            cases = [
+                ("import, no passwords", '80', None),
+                ("import, clear-text passwords", '81', 'benchmark-password'),
+            ]
+            for label, prefix, password in cases:
+                started = time.perf_counter()
+                created, skipped = import_users(
+                    self.rows(prefix, count, password),
+                    batch_size=options['batch_size'],
+                    workers=options['workers'],
+                )
+                self.report(label, sum(created.values()), time.perf_counter() - started)
+
+            started = time.perf_counter()
+            exported = sum(1 for _ in export_rows())
+            self.report("export", exported, time.perf_counter() - started)
+            transaction.set_rollback(True)
+
+    def report(self, label, rows, elapsed):
+        self.stdout.write(f"{label}: {rows / elapsed:.0f} rows/s ({rows} rows in {elapsed:.2f}s)")
@@ -0,0 +1,44 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from Users.provisioning import EXPORT_FIELDS, export_rows
+
+
+
+class Command(BaseCommand):
+    help = "Write every user to a CSV or JSONL file, streamed from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write (.csv or .jsonl).")
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="Default: from the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched per database round trip.")
+        parser.add_argument(
+            '--with-password-hashes',
+            action='store_true',
+            help="Include password hashes, so users_import can restore the users' passwords."
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        with_hashes = options['with_password_hashes']
+        rows = export_rows(chunk_size=options['chunk_size'], with_password_hashes=with_hashes)
+
+        started = time.monotonic()
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            if file_format == 'csv':
+                writer = csv.DictWriter(handle, EXPORT_FIELDS + (('password_hash',) if with_hashes else ()))
+                writer.writeheader()
+            for row in rows:
+                if file_format == 'csv':
+                    writer.writerow(row)
+                else:
+                    handle.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+                count += 1
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(f"Exported {count} user(s) in {elapsed:.1f}s ({count / max(elapsed, 1e-6):.0f}/s).")
@@ -0,0 +1,65 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Users.provisioning import IMPORT_FIELDS, import_users
+
+
+
+def read_rows(handle, file_format):
+    """
+    Rows of the file one at a time, so large files are never held in memory.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(handle)
+        return
+    for line in handle:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users and their profiles from a CSV or JSONL file. Columns: "
+        + ", ".join(IMPORT_FIELDS) + ", and a clear-text password or a password_hash."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import (.csv or .jsonl).")
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="Default: from the file extension.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help="Users per transaction (default: settings.USER_PROVISION_BATCH_SIZE)."
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help="Processes hashing passwords (default: settings.USER_IMPORT_HASH_WORKERS or the CPU count)."
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+
+        started = time.monotonic()
+        try:
+            with open(path, newline='', encoding='utf-8') as handle:
+                created, skipped = import_users(
+                    read_rows(handle, file_format),
+                    batch_size=options['batch_size'],
+                    workers=options['workers'],
+                )
+        except (OSError, json.JSONDecodeError) as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+        elapsed = time.monotonic() - started
+
+        total = sum(created.values())
+        self.stdout.write(f"Created {total} user(s) in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.0f}/s).")
+        for user_type, count in sorted(created.items()):
+            self.stdout.write(f"  {user_type}: {count}")
+        for number, reason in skipped:
+            self.stdout.write(f"Skipped row {number}: {reason}")
@@ -6,6 +6,7 @@ from django.contrib.auth.models import BaseUserManager
 class UserManager(BaseUserManager):
 
     def create_user(self, phone, username, email, user_type, full_name, password=None, **extra_fields):
+        from .provisioning import provision_user
         
         if not email:
             raise ValueError("ایمیل باید وارد شود")
@@ -27,7 +28,8 @@ class UserManager(BaseUserManager):
 
         user.set_password(password)
 
-        user.save(using=self._db)
+        # Saves the user together with its profile.
+        provision_user(user, using=self._db)
 
         return user
 
@@ -0,0 +1,239 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import transaction
+
+from .models import User
+from Profiles.models import (
+    ServiceProviderProfile,
+    ServiceRecipientProfile,
+    OwnerProfile,
+    AdminProfile,
+    SupportProfile,
+)
+
+
+
+
+# Profile created with every user, by user type. Gender defaults to 'M';
+# the user can change it later.
+PROFILE_MODELS = {
+    User.UserTypes.SERVICEPROVIDER: ServiceProviderProfile,
+    User.UserTypes.SERVICERECIPIENT: ServiceRecipientProfile,
+    User.UserTypes.OWNER: OwnerProfile,
+    User.UserTypes.ADMIN: AdminProfile,
+    User.UserTypes.SUPPORT: SupportProfile,
+}
+DEFAULT_GENDER = 'M'
+
+
+def build_profile(user):
+    profile_model = PROFILE_MODELS.get(user.user_type)
+    return profile_model(user=user, gender=DEFAULT_GENDER) if profile_model else None
+
+
+
+# -------------------------------
+# One user
+# -------------------------------
+
+def provision_user(user, using=None):
+    """
+    Save a new `user` and its profile in one transaction. Every code path
+    creating users goes through here (UserManager.create_user, registration,
+    the admin) instead of a post_save signal, so bulk creation can share
+    the same profile rules.
+    """
+    with transaction.atomic(using=using):
+        user.save(using=using)
+        profile = build_profile(user)
+        if profile is not None:
+            profile.save(using=using)
+    return user
+
+
+
+# -------------------------------
+# Many users
+# -------------------------------
+
+def provision_users(users, batch_size=None):
+    """
+    Insert unsaved `users` and their profiles, `batch_size` users per
+    transaction: one bulk INSERT of users, then one per profile model.
+    The database must return primary keys from bulk_create (PostgreSQL,
+    SQLite, MariaDB).
+
+    Returns a Counter of created users per user type.
+    """
+    batch_size = batch_size or getattr(settings, 'USER_PROVISION_BATCH_SIZE', 1000)
+    created = Counter()
+    users = iter(users)
+    while batch := list(islice(users, batch_size)):
+        with transaction.atomic():
+            User.objects.bulk_create(batch)
+            profiles = {}
+            for user in batch:
+                profile = build_profile(user)
+                if profile is not None:
+                    profiles.setdefault(type(profile), []).append(profile)
+            for profile_model, rows in profiles.items():
+                profile_model.objects.bulk_create(rows)
+        created.update(user.user_type for user in batch)
+    return created
+
+
+
+# -------------------------------
+# Imports
+# -------------------------------
+
+IMPORT_FIELDS = ('phone', 'username', 'email', 'full_name', 'user_type', 'status', 'is_active')
+UNIQUE_FIELDS = ('phone', 'username', 'email')
+
+
+def user_from_row(row):
+    """
+    Unsaved User from an import row, a dict of IMPORT_FIELDS plus either a
+    clear-text 'password' or a 'password_hash' (as written by users_export).
+    The password is not hashed here; see hash_passwords.
+    Raises ValueError for unusable rows.
+    """
+    for field in ('phone', 'username', 'email', 'user_type'):
+        if not row.get(field):
+            raise ValueError(f"missing {field}")
+    if row['user_type'] not in User.UserTypes.values:
+        raise ValueError(f"unknown user_type {row['user_type']!r}")
+    if row.get('status') and row['status'] not in User.AccountStatus.values:
+        raise ValueError(f"unknown status {row['status']!r}")
+    if row.get('password_hash') and not is_password_hash(row['password_hash']):
+        raise ValueError("password_hash is not a known hash format")
+
+    fields = {field: row[field] for field in IMPORT_FIELDS if row.get(field) not in (None, '')}
+    fields['email'] = User.objects.normalize_email(fields['email'])
+    if isinstance(fields.get('is_active'), str):
+        fields['is_active'] = fields['is_active'].strip().lower() in ('1', 'true', 'yes')
+    return User(**fields, password=row.get('password_hash') or '')
+
+
+def is_password_hash(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _setup_worker():
+    # Workers started with "spawn" (not "fork") import Django from scratch.
+    import django
+    django.setup()
+
+
+def hash_passwords(passwords, pool=None, workers=1):
+    """
+    make_password for every password, in `pool` (a ProcessPoolExecutor of
+    `workers` processes) if given: hashing is deliberately slow and
+    CPU-bound, so it only scales across processes. Missing passwords
+    become unusable ones.
+    """
+    if pool is None:
+        return [make_password(password or None) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(make_password, [password or None for password in passwords], chunksize=chunksize))
+
+
+def import_users(rows, batch_size=None, workers=None):
+    """
+    Create users and profiles from import rows (see user_from_row), in
+    batches of `batch_size`. Rows that are invalid, or whose phone,
+    username or email is taken (in the database or earlier in `rows`),
+    are skipped. Clear-text passwords of the kept rows are hashed by
+    `workers` processes (1: in this process).
+
+    Returns (created Counter per user type, list of (row number, reason)).
+
+    Settings:
+      - USER_PROVISION_BATCH_SIZE: users per transaction (default 1000).
+      - USER_IMPORT_HASH_WORKERS: default `workers` (default: CPU count).
+    """
+    batch_size = batch_size or getattr(settings, 'USER_PROVISION_BATCH_SIZE', 1000)
+    workers = workers or getattr(settings, 'USER_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+
+    with ExitStack() as stack:
+        pool = None
+        if workers > 1:
+            pool = stack.enter_context(ProcessPoolExecutor(workers, initializer=_setup_worker))
+        return _import_chunks(rows, batch_size, pool, workers)
+
+
+def _import_chunks(rows, batch_size, pool, workers):
+    created, skipped = Counter(), []
+    seen = {field: set() for field in UNIQUE_FIELDS}
+
+    rows = enumerate(rows, start=1)
+    while chunk := list(islice(rows, batch_size)):
+        candidates = []
+        for number, row in chunk:
+            try:
+                candidates.append((number, user_from_row(row), row.get('password')))
+            except ValueError as error:
+                skipped.append((number, str(error)))
+
+        # One query per unique field for the whole chunk.
+        taken = {
+            field: set(User.objects.filter(
+                **{f'{field}__in': [getattr(user, field) for _, user, _ in candidates]}
+            ).values_list(field, flat=True))
+            for field in UNIQUE_FIELDS
+        }
+        batch, passwords = [], []
+        for number, user, password in candidates:
+            clash = next(
+                (field for field in UNIQUE_FIELDS
+                 if getattr(user, field) in taken[field] or getattr(user, field) in seen[field]),
+                None,
+            )
+            if clash:
+                skipped.append((number, f"{clash} already exists"))
+                continue
+            for field in UNIQUE_FIELDS:
+                seen[field].add(getattr(user, field))
+            batch.append(user)
+            if not user.password:
+                passwords.append((user, password))
+
+        # Only rows that will be inserted pay for a hash.
+        hashes = hash_passwords([password for _, password in passwords], pool, workers)
+        for (user, _), hashed in zip(passwords, hashes):
+            user.password = hashed
+
+        created.update(provision_users(batch, batch_size=batch_size))
+    return created, skipped
+
+
+
+# -------------------------------
+# Exports
+# -------------------------------
+
+EXPORT_FIELDS = ('id',) + IMPORT_FIELDS + ('joined_date',)
+
+
+def export_rows(chunk_size=2000, with_password_hashes=False):
+    """
+    Every user as a dict of EXPORT_FIELDS (and 'password_hash' if asked),
+    streamed from the database `chunk_size` rows at a time so the queryset
+    is never held in memory. The output can be fed back to users_import.
+    """
+    fields = EXPORT_FIELDS + (('password',) if with_password_hashes else ())
+    for values in User.objects.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size):
+        row = dict(zip(fields, values))
+        if with_password_hashes:
+            row['password_hash'] = row.pop('password')
+        yield row
@@ -1,3 +1,110 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from Profiles.models import OwnerProfile, ServiceProviderProfile, ServiceRecipientProfile
+
+from .models import User
+from .provisioning import hash_passwords, provision_users
+
+
+
+
+class ProvisioningTests(TestCase):
+    """
+    Users are created together with the profile of their type, one at a
+    time or in bulk.
+    """
+
+    def test_create_user_creates_the_profile(self):
+        user = User.objects.create_user(
+            phone="09120000050", username="provider", email="provider@example.com",
+            user_type="SP", full_name="Provider", password="password123",
+        )
+        self.assertEqual(user.provider_profile.gender, "M")
+
+    def test_bulk(self):
+        users = [
+            User(phone=f"0912000006{i}", username=f"bulk{i}", email=f"bulk{i}@example.com", user_type=user_type)
+            for i, user_type in enumerate(["SP", "SC", "SC", "OW"])
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            created = provision_users(users, batch_size=10)
+        inserts = [query["sql"] for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 4)  # users, then one per profile model
+
+        self.assertEqual(created, {"SP": 1, "SC": 2, "OW": 1})
+        self.assertEqual(ServiceProviderProfile.objects.count(), 1)
+        self.assertEqual(ServiceRecipientProfile.objects.count(), 2)
+        self.assertEqual(OwnerProfile.objects.get().user, users[3])
+
+    def test_import_command(self):
+        User.objects.create_user(
+            phone="09120000070", username="existing", email="existing@example.com",
+            user_type="SC", full_name="Existing", password="password123",
+        )
+        rows = [
+            {"phone": "09120000071", "username": "new1", "email": "new1@example.com",
+             "user_type": "SC", "password": "password123"},
+            {"phone": "09120000072", "username": "new2", "email": "new2@example.com", "user_type": "OW"},
+            {"phone": "09120000070", "username": "dup", "email": "dup@example.com", "user_type": "SC"},
+            {"phone": "09120000073", "username": "new2", "email": "new3@example.com", "user_type": "SC"},
+            {"phone": "09120000074", "username": "bad", "email": "bad@example.com", "user_type": "XX"},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as handle:
+            handle.write("\n".join(json.dumps(row) for row in rows))
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command("users_import", handle.name, batch_size=2, workers=1, stdout=out)
+
+        self.assertIn("Created 2 user(s)", out.getvalue())
+        self.assertIn("Skipped row 3: phone already exists", out.getvalue())
+        self.assertIn("Skipped row 4: username already exists", out.getvalue())
+        self.assertIn("Skipped row 5: unknown user_type 'XX'", out.getvalue())
+        self.assertTrue(User.objects.get(username="new1").check_password("password123"))
+        self.assertFalse(User.objects.get(username="new2").has_usable_password())
+        self.assertTrue(OwnerProfile.objects.filter(user__username="new2").exists())
+        self.assertEqual(ServiceRecipientProfile.objects.count(), 2)
+
+    def test_passwords_hashed_in_a_pool(self):
+        with ProcessPoolExecutor(2) as pool:
+            hashes = hash_passwords(["first", "second", None], pool, workers=2)
+        self.assertTrue(check_password("first", hashes[0]))
+        self.assertTrue(check_password("second", hashes[1]))
+        self.assertTrue(hashes[2].startswith("!"))  # unusable
+
+    def test_export_round_trip(self):
+        user = User.objects.create_user(
+            phone="09120000080", username="exported", email="exported@example.com",
+            user_type="OW", full_name="Exported", password="password123",
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        path = os.path.join(directory, "users.csv")
+        self.addCleanup(os.remove, path)
+
+        out = StringIO()
+        call_command("users_export", path, "--with-password-hashes", chunk_size=1, stdout=out)
+        self.assertIn("Exported 1 user(s)", out.getvalue())
+
+        user.delete()
+        call_command("users_import", path, workers=1, stdout=StringIO())
+        restored = User.objects.get(username="exported")
+        self.assertTrue(restored.check_password("password123"))
+        self.assertEqual((restored.full_name, restored.is_active), ("Exported", True))
+        self.assertTrue(OwnerProfile.objects.filter(user=restored).exists())
 
-# Create your tests here.
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_users_io", rows=3, workers=1, stdout=out)
+        self.assertIn("export:", out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="benchmark-").exists())
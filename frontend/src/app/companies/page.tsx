@@ -11,8 +11,8 @@ export default function Companies() {
     async function fetchData() {
       try {
         const res = await fetch("http://127.0.0.1:8000/companies/company/");
-        const data: Company[] = await res.json();
-        setCompanies(data);
+        const data: { results: Company[] } = await res.json();
+        setCompanies(data.results);
       } catch (error) {
         console.error("خطا در دریافت اطلاعات شرکت‌ها:", error);
       } finally {
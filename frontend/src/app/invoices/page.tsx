@@ -16,9 +16,9 @@ export default function InvoicesList() {
 
         console.log("داده‌های واکشی شده:", data);
 
-        // اگر داده برگشتی آرایه است، مستقیم استفاده می‌کنیم.
-        if (Array.isArray(data)) {
-          setInvoices(data);
+        // پاسخ صفحه‌بندی شده است؛ فاکتورها در results قرار دارند.
+        if (Array.isArray(data?.results)) {
+          setInvoices(data.results);
         } else if (data && typeof data === "object") {
           // اگر API یک شی واحد یا ابجکتی با یک ویژگی برمی‌گرداند،
           // لازم است بر اساس وضعیت خودتان آن را تنظیم کنید.
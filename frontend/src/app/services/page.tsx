@@ -12,8 +12,8 @@ export default function ServicesList() {
     async function fetchServices() {
       try {
         const res = await fetch("http://127.0.0.1:8000/services/service/");
-        const data: Service[] = await res.json();
-        setServices(data);
+        const data: { results: Service[] } = await res.json();
+        setServices(data.results);
       } catch (error) {
         console.error("خطا در دریافت خدمات:", error);
       } finally {